@@ -0,0 +1,150 @@
+# app/core/config.py
+from typing import Optional
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+
+class Settings(BaseSettings):
+    model_config = SettingsConfigDict(env_file=".env", extra="ignore")
+
+    # ----- Database -----
+    DATABASE_URL: str = "sqlite+aiosqlite:///./youtube.db"
+    DATABASE_READ_URL: Optional[str] = None  # defaults to a read-only view of DATABASE_URL
+    DB_ECHO: bool = False
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_READ_POOL_SIZE: int = 10
+    DB_COMPILED_CACHE_SIZE: int = 1000  # SQLAlchemy compiled-statement cache
+    DB_STATEMENT_CACHE_SIZE: int = 256  # driver prepared-statement cache per connection
+    DB_MIGRATE_ON_STARTUP: bool = False  # otherwise startup only checks the schema revision
+
+    # ----- SQLite -----
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_MMAP_SIZE: int = 256 * 1024 * 1024
+    SQLITE_CACHE_SIZE_KIB: int = 64 * 1024
+
+    # ----- Auth -----
+    SECRET_KEY: str = "supersecretkey"  # Change in production
+    ALGORITHM: str = "HS256"
+    ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24  # 1 day
+    PRINCIPAL_CACHE_SIZE: int = 10_000
+    PRINCIPAL_CACHE_TTL_SECONDS: float = 30.0  # how long other workers may trust a revoked token
+
+    # ----- Password hashing -----
+    BCRYPT_ROUNDS: int = 12
+    HASH_WORKERS: int = 4  # 0 hashes inline on the event loop
+    HASH_MAX_QUEUE: int = 64  # hash calls waiting for a worker before returning 503
+
+    # ----- Admission control -----
+    # Concurrency per route class; the limits adapt down to hold the latency targets
+    ADMISSION_ENABLED: bool = True
+    ADMISSION_QUEUE_TIMEOUT_SECONDS: float = 2.0  # queued longer than this is answered 503
+    ADMISSION_READ_CONCURRENCY: int = 64
+    ADMISSION_READ_QUEUE: int = 256
+    ADMISSION_READ_LATENCY_TARGET_MS: float = 250.0
+    ADMISSION_WRITE_CONCURRENCY: int = 16  # writes serialize on SQLite's single writer anyway
+    ADMISSION_WRITE_QUEUE: int = 64
+    ADMISSION_WRITE_LATENCY_TARGET_MS: float = 500.0
+    ADMISSION_AUTH_CONCURRENCY: int = 8  # bcrypt-bound; keep near HASH_WORKERS
+    ADMISSION_AUTH_QUEUE: int = 32
+    ADMISSION_AUTH_LATENCY_TARGET_MS: float = 1000.0
+
+    # ----- Per-user rate limits (token buckets; 0 disables) -----
+    RATE_LIMIT_ENGAGEMENT_PER_SECOND: float = 5.0  # likes, watch-later, subscriptions
+    RATE_LIMIT_ENGAGEMENT_BURST: int = 30
+    RATE_LIMIT_COMMENTS_PER_SECOND: float = 0.5
+    RATE_LIMIT_COMMENTS_BURST: int = 10
+    RATE_LIMIT_MAX_USERS: int = 100_000  # buckets kept in memory
+
+    # ----- Pagination -----
+    DEFAULT_PAGE_SIZE: int = 20
+    MAX_PAGE_SIZE: int = 100
+    DETAIL_COLLECTION_LIMIT: int = 10  # items per nested list in detail responses
+    MAX_BATCH_IDS: int = 500  # ids accepted by the batch like/watch-later/subscribe and multi-get endpoints
+
+    # ----- Comment threads -----
+    COMMENT_THREAD_REPLIES: int = 3  # replies attached to each top-level comment in a thread page
+    COMMENT_MAX_DEPTH: int = 32
+
+    # ----- Batch loaders (single-flight + batching of row lookups) -----
+    LOADER_WINDOW_MS: float = 1.0  # how long a new key waits for others to share its query
+    LOADER_MAX_BATCH: int = 500  # keys per IN query; a full batch is fetched without waiting
+    DETAIL_LOADER_MAX_BATCH: int = 20  # video detail payloads per fetch
+
+    # ----- Response cache -----
+    RESPONSE_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    RESPONSE_CACHE_MAX_ENTRY_BYTES: int = 1024 * 1024
+    RESPONSE_CACHE_TTL_SECONDS: float = 30.0
+
+    # ----- View counting -----
+    VIEW_FLUSH_INTERVAL_SECONDS: float = 5.0
+    VIEW_FLUSH_MAX_PENDING: int = 10_000  # flush early once this many views are buffered
+    VIEW_BUFFER_MAX_VIDEOS: int = 100_000  # distinct videos held in memory before views are dropped
+
+    # ----- Bulk export / import -----
+    BULK_EXPORT_CHUNK_ROWS: int = 1000  # rows fetched from the server-side cursor per round trip
+    BULK_IMPORT_BATCH_ROWS: int = 1000  # rows per executemany transaction
+    BULK_IMPORT_MAX_LINE_BYTES: int = 1024 * 1024
+    BULK_IMPORT_MAX_ERRORS: int = 1000  # row errors kept in the report
+    BULK_IMPORT_HISTORY: int = 20  # finished import reports kept for /bulk/imports
+
+    # ----- Home feed -----
+    FEED_MAX_ENTRIES: int = 1000  # newest entries kept per user
+    FEED_FANOUT_MAX_SUBSCRIBERS: int = 10_000  # above this, uploads are pulled at read time instead of pushed
+    FEED_PULL_MAX_CREATORS: int = 200  # pulled creators merged into one feed read; past it, those who uploaded last
+    FEED_PULL_CREATORS_TTL_SECONDS: float = 60.0
+    FEED_TRIM_INTERVAL_SECONDS: float = 30.0
+
+    # ----- Trending -----
+    TRENDING_INTERVAL_SECONDS: float = 30.0
+    TRENDING_BATCH_EVENTS: int = 10_000  # engagement events folded in per transaction
+    TRENDING_TOP_K: int = 100  # precomputed list length per period and uploader
+    TRENDING_MIN_SCORE: float = 0.01  # decayed scores below this are dropped
+    TRENDING_WEIGHT_VIEW: float = 1.0
+    TRENDING_WEIGHT_LIKE: float = 5.0
+    TRENDING_WEIGHT_COMMENT: float = 10.0
+
+    # ----- Related videos -----
+    RELATED_INTERVAL_SECONDS: float = 60.0
+    RELATED_BATCH_EVENTS: int = 5_000  # like and watch-later changes folded in per transaction
+    RELATED_TOP_K: int = 20  # neighbours kept per video
+    RELATED_USER_WINDOW: int = 50  # a user's most recent engagements each new one is paired with
+    RELATED_WEIGHT_LIKE: float = 1.0
+    RELATED_WEIGHT_WATCH_LATER: float = 0.5
+
+    # ----- Tags and categories -----
+    TAGS_PER_VIDEO_MAX: int = 10
+    TAG_MAX_LENGTH: int = 32  # also the longest category
+    FACET_VALUES_LIMIT: int = 20  # most frequent categories and tags listed in the facets
+    FACET_SCAN_LIMIT: int = 5_000  # matches counted for facets the counters can't answer
+
+    # ----- Media storage and uploads -----
+    MEDIA_ROOT: str = "media"  # local directory holding uploaded files
+    MEDIA_PUBLIC_URL: str = "http://localhost:8000"  # base of the video_url given to uploaded videos
+    UPLOAD_MAX_BYTES: int = 10 * 1024 ** 3
+    UPLOAD_MAX_CHUNK_BYTES: int = 64 * 1024 ** 2  # per PATCH request
+    UPLOAD_HASHERS_MAX: int = 1000  # in-progress uploads whose running SHA-256 is kept in memory
+    MEDIA_READ_CHUNK_BYTES: int = 256 * 1024  # per read when streaming without zero-copy
+
+    # ----- Live comment stream -----
+    COMMENT_STREAM_QUEUE_SIZE: int = 256  # messages buffered per WebSocket; a subscriber that falls further behind is disconnected
+    COMMENT_STREAM_SEND_TIMEOUT_SECONDS: float = 10.0  # a send stuck this long disconnects the subscriber too
+    COMMENT_STREAM_REPLAY_SIZE: int = 256  # recent messages kept per video for reconnects; a longer gap asks the client to resync
+    COMMENT_STREAM_REPLAY_VIDEOS: int = 1000  # most recently active videos whose messages are kept
+
+    # ----- Account deletion -----
+    ACCOUNT_PURGE_THRESHOLD: int = 10_000  # above this many owned rows, accounts are purged in the background
+    ACCOUNT_PURGE_BATCH_ROWS: int = 500  # rows deleted per purge transaction
+    ACCOUNT_PURGE_PAUSE_SECONDS: float = 0.05  # between purge transactions, so request writes get the writer
+    ACCOUNT_PURGE_INTERVAL_SECONDS: float = 60.0
+
+    # ----- Metrics -----
+    METRICS_ENABLED: bool = True  # request timing, per-request SQL accounting and /metrics
+    METRICS_SLOW_REQUEST_MS: float = 500.0  # slower requests log their slowest statements
+    METRICS_SLOW_STATEMENTS: int = 5
+    METRICS_N_PLUS_ONE_THRESHOLD: int = 10  # flag a request running one statement shape more often than this
+
+
+settings = Settings()
@@ -1,24 +1,87 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime,timedelta
 from jose import jwt,JWTError
 from passlib.context import CryptContext
 from typing import Optional
+from app.core.config import settings
+from app.models.user import RoleEnum
 
-SECRET_KEY = "supersecretkey"  # Change in production
-ALGORITHM = "HS256"
-ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24  # 1 day
+SECRET_KEY = settings.SECRET_KEY
+ALGORITHM = settings.ALGORITHM
+ACCESS_TOKEN_EXPIRE_MINUTES = settings.ACCESS_TOKEN_EXPIRE_MINUTES
 
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS)
 
 
 def hash_password(password:str)->str:
-    return pwd_context(password)
+    return pwd_context.hash(password)
 
 def verify_password(plain_password:str,hashed_password:str)->bool:
     return pwd_context.verify(plain_password,hashed_password)
 
+
+# ----- Async hashing -----
+# bcrypt takes tens of milliseconds per call. Running it on the event loop
+# stalls every other request on the worker, so it runs in a small dedicated
+# pool. Callers beyond the pool size plus HASH_MAX_QUEUE are rejected
+# instead of queueing without bound.
+
+class HashingOverloaded(Exception):
+    pass
+
+
+class PasswordHasher:
+    def __init__(self, workers:int, max_queue:int):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt") if workers else None
+        self.in_flight = 0
+        self.rejected = 0
+        self.completed = 0
+
+    async def _run(self, fn, *args):
+        if self._executor is None:
+            return fn(*args)
+        if self.in_flight >= self.workers + self.max_queue:
+            self.rejected += 1
+            raise HashingOverloaded()
+        self.in_flight += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        finally:
+            self.in_flight -= 1
+            self.completed += 1
+
+    async def hash(self, password:str)->str:
+        return await self._run(hash_password, password)
+
+    async def verify(self, plain_password:str, hashed_password:str)->bool:
+        return await self._run(verify_password, plain_password, hashed_password)
+
+    def stats(self)->dict:
+        return {
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "in_flight": self.in_flight,
+            "queued": max(0, self.in_flight - self.workers),
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
+
+
+password_hasher = PasswordHasher(settings.HASH_WORKERS, settings.HASH_MAX_QUEUE)
+
+
 def create_access_token(data:dict,expires_delta:Optional[timedelta] =None):
     to_encode =data.copy()
-    expire = datetime.utcnow()+(expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
-    to_encode.update({"exp":expire})
+    now = datetime.utcnow()
+    expire = now+(expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
+    to_encode.update({"exp":expire,"iat":now})
     return jwt.encode(to_encode,SECRET_KEY,algorithm=ALGORITHM)
+
+def create_user_token(user)->str:
+    # uid makes the principal check a primary-key probe; the role claim is for
+    # clients, authorization goes by the users row
+    return create_access_token({"sub":user.email,"uid":user.id,"role":RoleEnum(user.role).value})
@@ -1,13 +1,165 @@
 # app/database.py
+import os
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
+from app.core.config import settings
+from app.utils.metrics import instrument_engine
 
-DATABASE_URL = "sqlite+aiosqlite:///./youtube.db"
+DATABASE_URL = settings.DATABASE_URL
+
+
+def _is_sqlite(url) -> bool:
+    return url.get_backend_name() == "sqlite"
+
+
+def _is_sqlite_memory(url) -> bool:
+    return _is_sqlite(url) and url.database in (None, "", ":memory:")
+
+
+def _read_only_url(url):
+    # SQLite has one writer; readers get their own read-only connections so
+    # they never queue behind it (WAL lets them read while it writes)
+    return url.set(database=f"file:{url.database}", query={**url.query, "mode": "ro", "uri": "true"})
+
+
+def _set_sqlite_pragmas(read_only: bool):
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        if not read_only:
+            cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={settings.SQLITE_BUSY_TIMEOUT_MS}")
+        cursor.execute(f"PRAGMA mmap_size={settings.SQLITE_MMAP_SIZE}")
+        cursor.execute(f"PRAGMA cache_size=-{settings.SQLITE_CACHE_SIZE_KIB}")
+        # Off by default in SQLite; the ON DELETE CASCADE clauses rely on it
+        cursor.execute("PRAGMA foreign_keys=ON")
+        if read_only:
+            cursor.execute("PRAGMA query_only=ON")
+        cursor.close()
+    return on_connect
+
+
+def build_engine(url, read_only: bool = False):
+    url = make_url(url)
+    kwargs = {
+        "echo": settings.DB_ECHO,
+        "future": True,
+        "query_cache_size": settings.DB_COMPILED_CACHE_SIZE,
+    }
+    if not _is_sqlite_memory(url):
+        kwargs.update(
+            pool_size=settings.DB_READ_POOL_SIZE if read_only else settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+            pool_pre_ping=settings.DB_POOL_PRE_PING,
+        )
+    if _is_sqlite(url):
+        kwargs["connect_args"] = {"cached_statements": settings.DB_STATEMENT_CACHE_SIZE}
+    elif url.get_backend_name() == "postgresql" and url.get_driver_name() == "asyncpg":
+        kwargs["connect_args"] = {"prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE}
+
+    new_engine = create_async_engine(url, **kwargs)
+    if _is_sqlite(url):
+        event.listen(new_engine.sync_engine, "connect", _set_sqlite_pragmas(read_only))
+    if settings.METRICS_ENABLED:
+        instrument_engine(new_engine)
+    return new_engine
+
+
+def _build_read_engine():
+    if settings.DATABASE_READ_URL:
+        return build_engine(settings.DATABASE_READ_URL, read_only=True)
+    url = make_url(DATABASE_URL)
+    if _is_sqlite(url) and not _is_sqlite_memory(url):
+        return build_engine(_read_only_url(url), read_only=True)
+    # Other backends read through the main pool unless a replica URL is set
+    return engine
+
+
+engine = build_engine(DATABASE_URL)
+read_engine = _build_read_engine()
 
-engine = create_async_engine(DATABASE_URL, echo=True, future=True)
 AsyncSessionLocal = sessionmaker(bind=engine, expire_on_commit=False, class_=AsyncSession)
+ReadSessionLocal = sessionmaker(bind=read_engine, expire_on_commit=False, class_=AsyncSession)
 Base = declarative_base()
 
-async def init_db():
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+# ----- Schema -----
+# The schema is owned by the Alembic migrations in migrations/. Workers only
+# check the revision at startup; `alembic upgrade head` (or migrate()) applies
+# changes.
+
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "alembic.ini")
+
+
+class SchemaOutOfDate(RuntimeError):
+    pass
+
+
+def _alembic_config(connection=None):
+    from alembic.config import Config
+
+    config = Config(ALEMBIC_INI)
+    config.attributes["configure_logger"] = False
+    config.attributes["connection"] = connection
+    return config
+
+
+def _current_revision(connection):
+    from alembic.runtime.migration import MigrationContext
+
+    return MigrationContext.configure(connection).get_current_revision()
+
+
+def _head_revision():
+    from alembic.script import ScriptDirectory
+
+    return ScriptDirectory.from_config(_alembic_config()).get_current_head()
+
+
+async def migrate(revision: str = "head"):
+    """Upgrade the database to `revision` through the Alembic migrations."""
+    from alembic import command
+
+    # The migrations run with SQLite's foreign keys off (see migrations/env.py),
+    # on a connection of their own that is thrown away afterwards rather than
+    # returned to the app's pool
+    url = make_url(DATABASE_URL)
+    migration_engine = engine if _is_sqlite_memory(url) else build_engine(url)
+    try:
+        async with migration_engine.begin() as conn:
+            await conn.run_sync(lambda sync_conn: command.upgrade(_alembic_config(sync_conn), revision))
+        if migration_engine is engine and _is_sqlite(url):
+            # One shared in-memory connection: switch enforcement back on
+            async with engine.connect() as conn:
+                await conn.exec_driver_sql("PRAGMA foreign_keys=ON")
+    finally:
+        if migration_engine is not engine:
+            await migration_engine.dispose()
+
+
+async def check_schema():
+    """Fail fast if the database isn't at the latest migration.
+
+    One read of alembic_version; with DB_MIGRATE_ON_STARTUP the migrations
+    are applied instead (single-process dev setups only).
+    """
+    async with engine.connect() as conn:
+        current = await conn.run_sync(_current_revision)
+    head = _head_revision()
+    if current == head:
+        return
+    if settings.DB_MIGRATE_ON_STARTUP:
+        await migrate()
+        return
+    raise SchemaOutOfDate(
+        f"Database schema is at revision {current or '<empty>'}, expected {head}; run `alembic upgrade head`"
+    )
+
+
+async def dispose_engines():
+    await engine.dispose()
+    if read_engine is not engine:
+        await read_engine.dispose()
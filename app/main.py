@@ -1,16 +1,75 @@
 # app/main.py
 from fastapi import FastAPI
-from app.database import init_db
-from app.routes import auth, users, videos, comments
+from fastapi.responses import ORJSONResponse
+from app.core.config import settings
+from app.core.principals import principal_cache
+from app.core.security import password_hasher
+from app.database import check_schema, dispose_engines
+from app.routes import auth, users, videos, comments, live, uploads, media, internal, bulk, metrics as metrics_routes
+from app.services.feed import feed_trimmer
+from app.services.trending import trending_updater
+from app.services.related import related_updater
+from app.services import loaders, uploads as upload_service
+from app.services.purge import account_purger
+from app.services.comment_stream import comment_hub
+from app.services.view_counter import view_counter
+from app.utils import admission
+from app.utils.admission import AdmissionMiddleware
+from app.utils.metrics import MetricsMiddleware, metrics
+from app.utils.response_cache import response_cache
 
-app = FastAPI(title="YouTube MVP", version="1.0")
+app = FastAPI(title="YouTube MVP", version="1.0", default_response_class=ORJSONResponse)
+
+# Added first so it runs inside the metrics middleware, which then sees shed requests
+if settings.ADMISSION_ENABLED:
+    app.add_middleware(AdmissionMiddleware)
+
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+    metrics.register_collector("streambase_views", view_counter.stats)
+    metrics.register_collector("streambase_hashing", password_hasher.stats)
+    metrics.register_collector("streambase_principals", principal_cache.stats)
+    metrics.register_collector("streambase_response_cache", response_cache.stats)
+    metrics.register_collector("streambase_feed", feed_trimmer.stats)
+    metrics.register_collector("streambase_trending", trending_updater.stats)
+    metrics.register_collector("streambase_related", related_updater.stats)
+    metrics.register_collector("streambase_purge", account_purger.stats)
+    metrics.register_collector("streambase_uploads", upload_service.hashers.stats)
+    metrics.register_collector("streambase_comment_stream", comment_hub.stats)
+    for name, loader in loaders.loaders.items():
+        metrics.register_collector(f"streambase_loader_{name}", loader.stats)
+    for name, limiter in admission.limiters.items():
+        metrics.register_collector(f"streambase_admission_{name}", limiter.stats)
+    for name, buckets in admission.rate_limits.items():
+        metrics.register_collector(f"streambase_rate_limit_{name}", buckets.stats)
 
 @app.on_event("startup")
 async def startup():
-    await init_db()
+    await check_schema()
+    view_counter.start()
+    feed_trimmer.start()
+    trending_updater.start()
+    related_updater.start()
+    account_purger.start()
+
+@app.on_event("shutdown")
+async def shutdown():
+    # Final flush so buffered views aren't lost on restart
+    await view_counter.stop()
+    await feed_trimmer.stop()
+    await trending_updater.stop()
+    await related_updater.stop()
+    await account_purger.stop()
+    await dispose_engines()
 
 # Register routes
 app.include_router(auth.router)
 app.include_router(users.router)
 app.include_router(videos.router)
 app.include_router(comments.router)
+app.include_router(live.router)
+app.include_router(uploads.router)
+app.include_router(media.router)
+app.include_router(internal.router)
+app.include_router(bulk.router)
+app.include_router(metrics_routes.router)
@@ -1,3 +1,15 @@
 from .user import User, RoleEnum
 from .video import Video
 from .comment import Comment
+from .feed import feed_entries_table
+from .upload import Upload
+from .tag import tags_table, video_tags_table, facet_counts_table
+from .trending import engagement_events_table, trending_scores_table, trending_top_table, trending_state_table
+from .related import (
+    related_events_table,
+    related_windows_table,
+    related_pairs_table,
+    related_norms_table,
+    related_top_table,
+    related_state_table,
+)
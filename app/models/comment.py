@@ -1,17 +1,37 @@
-from sqlalchemy import Column, Integer, Text, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.database import Base
 
 class Comment(Base):
     __tablename__ ="comments"
+    __table_args__ = (
+        # Keyset pagination: per-video and per-user comment pages are index range scans
+        Index("ix_comments_video_created", "video_id", "created_at", "id"),
+        Index("ix_comments_user_created", "user_id", "created_at", "id"),
+        # Top-level comments of a video (depth 0) and the replies under one parent
+        Index("ix_comments_video_depth_created", "video_id", "depth", "created_at", "id"),
+        Index("ix_comments_parent_created", "parent_id", "created_at", "id"),
+        # Reconnecting live-stream clients: the video's comments after the last id they saw
+        Index("ix_comments_video_resume", "video_id", "id"),
+        # A subtree is one range scan over its root's path prefix
+        Index("ix_comments_path", "path", unique=True),
+    )
 
-    id = Column(Integer,primary_key =True,index=True)
+    id = Column(Integer,primary_key =True)
     content=Column(Text,nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)  # ✅
 
     user_id =Column(Integer,ForeignKey("users.id",ondelete="CASCADE"))
     video_id =Column(Integer,ForeignKey("videos.id",ondelete="CASCADE"))
 
-    user = relationship("User",back_populates="comment")
-    video =relationship("Video",back_populates="comments")
\ No newline at end of file
+    # Reply threads as materialized paths: the ids from the root down to this
+    # comment, fixed-width so string order is thread order (see
+    # app/services/threads.py). Set right after insert, once the id is known.
+    parent_id = Column(Integer, ForeignKey("comments.id", ondelete="CASCADE"), nullable=True)
+    path = Column(String, nullable=True)
+    depth = Column(Integer, nullable=False, default=0, server_default="0")
+    reply_count = Column(Integer, nullable=False, default=0, server_default="0")  # direct replies
+
+    user = relationship("User",back_populates="comments")
+    video =relationship("Video",back_populates="comments")
@@ -0,0 +1,17 @@
+# app/models/feed.py
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, Table
+from app.database import Base
+
+# Precomputed home feed: one row per (subscriber, video) for uploads pushed
+# at write time (see app/services/feed.py)
+feed_entries_table = Table(
+    "feed_entries",
+    Base.metadata,
+    Column("user_id", ForeignKey("users.id", ondelete="CASCADE"), primary_key=True),
+    Column("video_id", ForeignKey("videos.id", ondelete="CASCADE"), primary_key=True),
+    # Copied from the video so a feed page is one index range scan
+    Column("upload_time", DateTime, nullable=False),
+    Column("uploader_id", Integer, nullable=False),
+    Index("ix_feed_entries_user_time", "user_id", "upload_time", "video_id"),
+    Index("ix_feed_entries_video", "video_id"),
+)
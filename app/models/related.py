@@ -0,0 +1,70 @@
+from sqlalchemy import Column, DateTime, Float, ForeignKey, Index, Integer, Table
+from app.database import Base
+
+# Append-only log of like and watch-later changes (weight < 0 for removals);
+# the related-videos job consumes it by id and deletes what it processed
+# (see app/services/related.py). No foreign keys: changes to deleted videos
+# are skipped. AUTOINCREMENT for the same reason as engagement_events.
+related_events_table = Table(
+    "related_events",
+    Base.metadata,
+    Column("id", Integer, primary_key=True, autoincrement=True),
+    Column("user_id", Integer, nullable=False),
+    Column("video_id", Integer, nullable=False),
+    Column("weight", Float, nullable=False),
+    Column("created_at", DateTime, nullable=False),
+    sqlite_autoincrement=True,
+)
+
+# Per user, the engagements the co-occurrence counts include: the most
+# recent RELATED_USER_WINDOW, each with its weight and the event that added it
+related_windows_table = Table(
+    "related_windows",
+    Base.metadata,
+    Column("user_id", Integer, primary_key=True),
+    Column("video_id", ForeignKey("videos.id", ondelete="CASCADE"), primary_key=True),
+    Column("weight", Float, nullable=False),
+    Column("seq", Integer, nullable=False),
+    Index("ix_related_windows_video", "video_id"),
+)
+
+# Co-occurrence: for each pair of videos, the sum over users' windows of
+# the product of their weights. Stored in both directions, so a video's
+# neighbours are one index range.
+related_pairs_table = Table(
+    "related_pairs",
+    Base.metadata,
+    Column("video_id", ForeignKey("videos.id", ondelete="CASCADE"), primary_key=True),
+    Column("other_id", ForeignKey("videos.id", ondelete="CASCADE"), primary_key=True),
+    Column("weight", Float, nullable=False),
+    Index("ix_related_pairs_other", "other_id"),
+)
+
+# Sum over users' windows of the squared weight: the cosine's denominator
+related_norms_table = Table(
+    "related_norms",
+    Base.metadata,
+    Column("video_id", ForeignKey("videos.id", ondelete="CASCADE"), primary_key=True),
+    Column("weight", Float, nullable=False),
+)
+
+# The precomputed top K neighbours of each video by cosine similarity.
+# Read in score order; scores are rescaled in place when a norm changes.
+related_top_table = Table(
+    "related_top",
+    Base.metadata,
+    Column("video_id", ForeignKey("videos.id", ondelete="CASCADE"), primary_key=True),
+    Column("other_id", ForeignKey("videos.id", ondelete="CASCADE"), primary_key=True),
+    Column("score", Float, nullable=False),
+    Index("ix_related_top_video_score", "video_id", "score"),
+    Index("ix_related_top_other", "other_id"),
+)
+
+# Single row: the last related event folded into the index
+related_state_table = Table(
+    "related_state",
+    Base.metadata,
+    Column("id", Integer, primary_key=True),
+    Column("last_event_id", Integer, nullable=False),
+    Column("updated_at", DateTime, nullable=True),
+)
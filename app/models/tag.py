@@ -0,0 +1,33 @@
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, String, Table
+from app.database import Base
+
+# One row per distinct tag; videos refer to tags by id
+tags_table = Table(
+    "tags",
+    Base.metadata,
+    Column("id", Integer, primary_key=True, autoincrement=True),
+    Column("name", String, nullable=False, unique=True),
+)
+
+# The posting lists: for each tag, its videos newest first. upload_time is
+# copied from the video so a filtered page walks one index range.
+video_tags_table = Table(
+    "video_tags",
+    Base.metadata,
+    Column("video_id", ForeignKey("videos.id", ondelete="CASCADE"), primary_key=True),
+    Column("tag_id", ForeignKey("tags.id", ondelete="CASCADE"), primary_key=True),
+    Column("upload_time", DateTime, nullable=False),
+    Index("ix_video_tags_tag_time", "tag_id", "upload_time", "video_id"),
+)
+
+# Facet counters, maintained with every tag and category change (see
+# app/services/facets.py): videos per (category, tag). Category "" counts
+# every category and tag_id 0 every video, so ("", 0) is the catalog size.
+facet_counts_table = Table(
+    "facet_counts",
+    Base.metadata,
+    Column("tag_id", Integer, primary_key=True),
+    Column("category", String, primary_key=True),
+    Column("count", Integer, nullable=False),
+    Index("ix_facet_counts_category_count", "category", "count"),
+)
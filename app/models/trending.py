@@ -0,0 +1,53 @@
+from sqlalchemy import Column, DateTime, Float, ForeignKey, Index, Integer, String, Table
+from app.database import Base
+
+# Append-only engagement log written next to each like, comment and view
+# flush; the trending job consumes it by id and deletes what it processed
+# (see app/services/trending.py). No foreign key: events for deleted
+# videos are simply skipped. AUTOINCREMENT on SQLite: the job empties the
+# table, and plain rowids would then restart below its checkpoint.
+engagement_events_table = Table(
+    "engagement_events",
+    Base.metadata,
+    Column("id", Integer, primary_key=True, autoincrement=True),
+    Column("video_id", Integer, nullable=False),
+    Column("kind", String, nullable=False),
+    Column("weight", Float, nullable=False),
+    Column("created_at", DateTime, nullable=False),
+    sqlite_autoincrement=True,
+)
+
+# Decayed score per (period, video). Scores are stored as logarithms
+# relative to a fixed epoch, so they never need rewriting as time passes.
+trending_scores_table = Table(
+    "trending_scores",
+    Base.metadata,
+    Column("period", String, primary_key=True),
+    Column("video_id", ForeignKey("videos.id", ondelete="CASCADE"), primary_key=True),
+    Column("uploader_id", Integer, nullable=False),
+    Column("log_score", Float, nullable=False),
+    Index("ix_trending_scores_period_score", "period", "log_score"),
+    Index("ix_trending_scores_period_uploader_score", "period", "uploader_id", "log_score"),
+    Index("ix_trending_scores_video", "video_id"),  # the job's read-modify-write and video deletes
+)
+
+# The precomputed top K per period, overall (uploader_id 0) and per uploader
+trending_top_table = Table(
+    "trending_top",
+    Base.metadata,
+    Column("period", String, primary_key=True),
+    Column("uploader_id", Integer, primary_key=True),
+    Column("rank", Integer, primary_key=True),
+    Column("video_id", ForeignKey("videos.id", ondelete="CASCADE"), nullable=False),
+    Column("log_score", Float, nullable=False),
+    Index("ix_trending_top_video", "video_id"),
+)
+
+# Single row: the last engagement event folded into the scores
+trending_state_table = Table(
+    "trending_state",
+    Base.metadata,
+    Column("id", Integer, primary_key=True),
+    Column("last_event_id", Integer, nullable=False),
+    Column("updated_at", DateTime, nullable=True),
+)
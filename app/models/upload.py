@@ -0,0 +1,28 @@
+# app/models/upload.py
+from sqlalchemy import BigInteger, Column, DateTime, ForeignKey, Index, Integer, String
+from datetime import datetime
+from app.database import Base
+
+
+class Upload(Base):
+    """A resumable upload of one media file (see app/services/uploads.py).
+
+    Chunks are written straight into place in the upload's file, so
+    `offset` is both the number of bytes received and where the next chunk
+    starts. It only moves after the chunk is on disk.
+    """
+    __tablename__ = "uploads"
+    __table_args__ = (
+        Index("ix_uploads_user_created", "user_id", "created_at"),
+    )
+
+    id = Column(String(32), primary_key=True)  # random hex; also the file name
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    filename = Column(String, nullable=False)
+    content_type = Column(String, nullable=False)
+    size = Column(BigInteger, nullable=False)
+    offset = Column(BigInteger, nullable=False, default=0, server_default="0")
+    expected_sha256 = Column(String(64), nullable=True)  # checked on completion when the client sent one
+    sha256 = Column(String(64), nullable=True)  # set on completion
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    completed_at = Column(DateTime, nullable=True)
@@ -1,5 +1,5 @@
 # app/models/user.py
-from sqlalchemy import Column, Integer, String, Enum, ForeignKey, Table
+from sqlalchemy import Column, DateTime, Integer, String, Enum, ForeignKey, Table, Index, text
 from sqlalchemy.orm import relationship
 from app.database import Base
 import enum
@@ -17,44 +17,73 @@ class RoleEnum(str, enum.Enum):
 likes_table = Table(
     "likes",
     Base.metadata,
-    Column("user_id", ForeignKey("users.id"), primary_key=True),
-    Column("video_id", ForeignKey("videos.id"), primary_key=True),
+    Column("user_id", ForeignKey("users.id", ondelete="CASCADE"), primary_key=True),
+    Column("video_id", ForeignKey("videos.id", ondelete="CASCADE"), primary_key=True),
+    # Reverse side of the PK: "who liked video X", paged by user id
+    Index("ix_likes_video_user", "video_id", "user_id"),
 )
 
 # User <-> Video (Watch Later)
 watch_later_table = Table(
     "watch_later",
     Base.metadata,
-    Column("user_id", ForeignKey("users.id"), primary_key=True),
-    Column("video_id", ForeignKey("videos.id"), primary_key=True),
+    Column("user_id", ForeignKey("users.id", ondelete="CASCADE"), primary_key=True),
+    Column("video_id", ForeignKey("videos.id", ondelete="CASCADE"), primary_key=True),
+    Index("ix_watch_later_video_user", "video_id", "user_id"),
 )
 
 # Subscriptions: user can subscribe to other users
 subscriptions_table = Table(
     "subscriptions",
     Base.metadata,
-    Column("subscriber_id", ForeignKey("users.id"), primary_key=True),
-    Column("subscribed_to_id", ForeignKey("users.id"), primary_key=True),
+    Column("subscriber_id", ForeignKey("users.id", ondelete="CASCADE"), primary_key=True),
+    Column("subscribed_to_id", ForeignKey("users.id", ondelete="CASCADE"), primary_key=True),
+    # Reverse side of the PK: "who subscribes to X", paged by subscriber id
+    Index("ix_subscriptions_subscribed_to", "subscribed_to_id", "subscriber_id"),
 )
 
 
 # ----- User model -----
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        # Accounts waiting for the purge job; partial, so it stays tiny
+        Index(
+            "ix_users_deleted_at", "deleted_at",
+            sqlite_where=text("deleted_at IS NOT NULL"),
+            postgresql_where=text("deleted_at IS NOT NULL"),
+        ),
+    )
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     username = Column(String, unique=True, nullable=False)
     email = Column(String, unique=True, nullable=False, index=True)
     password_hash = Column(String, nullable=False)
     role = Column(Enum(RoleEnum), default=RoleEnum.viewer)
 
-    # Relationships
-    videos = relationship("Video", back_populates="uploader", cascade="all, delete-orphan")
-    comments = relationship("Comment", back_populates="user", cascade="all, delete-orphan")
+    # Denormalized counter, maintained by subscribe/unsubscribe; indexed for
+    # the home feed's pull-side creator lookup
+    subscriber_count = Column(Integer, nullable=False, default=0, server_default="0", index=True)
+
+    # Set when a large account is deleted: from then on it can't sign in and
+    # reads as missing, while app/services/purge.py removes what it owns in
+    # the background
+    deleted_at = Column(DateTime, nullable=True)
+
+    # Tokens issued before this are revoked (role changes); checked whenever
+    # a token's principal isn't cached, see app/utils/dependencies.py
+    credentials_changed_at = Column(DateTime, nullable=True)
+
+    # Relationships. Deletes cascade in the database (ON DELETE CASCADE);
+    # passive_deletes keeps the ORM from loading children to delete them itself
+    videos = relationship("Video", back_populates="uploader", cascade="all, delete-orphan", passive_deletes=True)
+    comments = relationship("Comment", back_populates="user", cascade="all, delete-orphan", passive_deletes=True)
 
     # Many-to-many relationships
-    liked_videos = relationship("Video", secondary=likes_table, back_populates="liked_by")
-    watch_later_videos = relationship("Video", secondary=watch_later_table, back_populates="watch_later_by")
+    liked_videos = relationship("Video", secondary=likes_table, back_populates="liked_by", passive_deletes=True)
+    watch_later_videos = relationship(
+        "Video", secondary=watch_later_table, back_populates="watch_later_by", passive_deletes=True
+    )
 
     # Subscribers / Subscribed To (self-referential many-to-many)
     subscribers = relationship(
@@ -63,6 +92,7 @@ class User(Base):
         primaryjoin=id == subscriptions_table.c.subscribed_to_id,
         secondaryjoin=id == subscriptions_table.c.subscriber_id,
         back_populates="subscriptions",
+        passive_deletes=True,
     )
 
     subscriptions = relationship(
@@ -71,4 +101,5 @@ class User(Base):
         primaryjoin=id == subscriptions_table.c.subscriber_id,
         secondaryjoin=id == subscriptions_table.c.subscribed_to_id,
         back_populates="subscribers",
+        passive_deletes=True,
     )
@@ -1,5 +1,5 @@
 # app/models/video.py
-from sqlalchemy import Column, Integer, String, ForeignKey, Text, DateTime
+from sqlalchemy import Boolean, Column, Integer, String, ForeignKey, Text, DateTime, Index, text
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.database import Base
@@ -7,19 +7,48 @@ from app.models.user import likes_table, watch_later_table
 
 class Video(Base):
     __tablename__ = "videos"
+    __table_args__ = (
+        # Keyset pagination: global feed and per-uploader listings seek on (upload_time, id)
+        Index("ix_videos_upload_time", "upload_time", "id"),
+        Index("ix_videos_uploader_upload_time", "uploader_id", "upload_time", "id"),
+        Index("ix_videos_category_upload_time", "category", "upload_time", "id"),
+        # Uploads the home feed pulls at read time; partial, so it stays small
+        Index(
+            "ix_videos_feed_pulled", "uploader_id", "upload_time", "id",
+            sqlite_where=text("feed_pulled = 1"),
+            postgresql_where=text("feed_pulled"),
+        ),
+    )
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     title = Column(String, nullable=False)
     description = Column(Text, nullable=True)
     video_url = Column(String, nullable=False)
     thumbnail_url = Column(String, nullable=True)
-    upload_time = Column(DateTime, default=datetime.utcnow)
+    upload_time = Column(DateTime, default=datetime.utcnow, nullable=False)
     uploader_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"))
+    category = Column(String, nullable=True)  # tags live in video_tags (app/models/tag.py)
+
+    # Denormalized engagement counters, maintained by the write routes
+    # (see app/services/counters.py for the repair job)
+    like_count = Column(Integer, nullable=False, default=0, server_default="0")
+    comment_count = Column(Integer, nullable=False, default=0, server_default="0")
+    watch_later_count = Column(Integer, nullable=False, default=0, server_default="0")
+    last_comment_at = Column(DateTime, nullable=True)
+
+    # Incremented in batches by the view counter (app/services/view_counter.py)
+    views = Column(Integer, nullable=False, default=0, server_default="0")
+
+    # How the home feed delivers this upload, fixed at upload time
+    # (see app/services/feed.py)
+    feed_pulled = Column(Boolean, nullable=False, default=False, server_default="0")
 
     # Relationships
     uploader = relationship("User", back_populates="videos")
-    comments = relationship("Comment", back_populates="video", cascade="all, delete-orphan")
+    comments = relationship("Comment", back_populates="video", cascade="all, delete-orphan", passive_deletes=True)
 
     # Many-to-many
-    liked_by = relationship("User", secondary=likes_table, back_populates="liked_videos")
-    watch_later_by = relationship("User", secondary=watch_later_table, back_populates="watch_later_videos")
+    liked_by = relationship("User", secondary=likes_table, back_populates="liked_videos", passive_deletes=True)
+    watch_later_by = relationship(
+        "User", secondary=watch_later_table, back_populates="watch_later_videos", passive_deletes=True
+    )
@@ -6,11 +6,17 @@ from app.database import AsyncSessionLocal
 from app.schemas.auth_schema import LoginRequest, TokenData
 from app.schemas.user_schema import UserCreate, UserRead
 from app.models.user import User, RoleEnum
-from app.core.security import hash_password, verify_password, create_access_token
+from app.core.security import password_hasher, HashingOverloaded, create_user_token
 from app.utils.dependencies import get_db
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
+overloaded_exception = HTTPException(
+    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+    detail="Too many authentication requests, try again shortly",
+    headers={"Retry-After": "1"},
+)
+
 
 @router.post("/register", response_model=UserRead)
 async def register_user(payload: UserCreate, db: AsyncSession = Depends(get_db)):
@@ -18,10 +24,15 @@ async def register_user(payload: UserCreate, db: AsyncSession = Depends(get_db))
     if existing_user.scalar_one_or_none():
         raise HTTPException(status_code=400, detail="Email already registered")
 
+    try:
+        password_hash = await password_hasher.hash(payload.password)
+    except HashingOverloaded:
+        raise overloaded_exception
+
     new_user = User(
         username=payload.username,
         email=payload.email,
-        password_hash=hash_password(payload.password),
+        password_hash=password_hash,
         role=payload.role or RoleEnum.viewer
     )
     db.add(new_user)
@@ -32,11 +43,15 @@ async def register_user(payload: UserCreate, db: AsyncSession = Depends(get_db))
 
 @router.post("/login", response_model=TokenData)
 async def login_user(payload: LoginRequest, db: AsyncSession = Depends(get_db)):
-    result = await db.execute(select(User).where(User.email == payload.email))
+    result = await db.execute(select(User).where(User.email == payload.email, User.deleted_at.is_(None)))
     user = result.scalar_one_or_none()
 
-    if not user or not verify_password(payload.password, user.password_hash):
+    try:
+        valid = user is not None and await password_hasher.verify(payload.password, user.password_hash)
+    except HashingOverloaded:
+        raise overloaded_exception
+    if not valid:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
 
-    token = create_access_token({"sub": user.email})
+    token = create_user_token(user)
     return TokenData(access_token=token)
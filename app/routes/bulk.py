@@ -0,0 +1,31 @@
+# app/routes/bulk.py
+from typing import List
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import StreamingResponse
+from app.utils.dependencies import require_admin
+from app.schemas.bulk_schema import BulkEntity, ImportReport
+from app.services import bulk
+
+router = APIRouter(prefix="/bulk", tags=["Bulk"], dependencies=[Depends(require_admin)])
+
+
+@router.get("/imports", response_model=List[ImportReport])
+async def list_imports():
+    # Running imports report progress here while their request is in flight
+    return bulk.import_registry.reports()
+
+
+@router.get("/{entity}/export")
+async def export_entity(entity: BulkEntity):
+    return StreamingResponse(
+        bulk.export_rows(bulk.ENTITIES[entity]),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{entity.value}.ndjson"'},
+    )
+
+
+@router.post("/{entity}/import", response_model=ImportReport)
+async def import_entity(entity: BulkEntity, request: Request):
+    # One JSON object per line; the body is consumed as it arrives
+    job = await bulk.import_rows(entity, request.stream())
+    return job.report()
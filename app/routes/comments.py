@@ -1,62 +1,121 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import func
+from sqlalchemy import update
+from datetime import datetime
 
 from app.models.comment import Comment
 from app.models.video import Video
-from app.models.user import User, RoleEnum
-from app.schemas.comment_schema import CommentCreate, CommentRead
-from app.utils.dependencies import get_db, get_current_user
+from app.models.user import RoleEnum
+from app.core.principals import Principal
+from app.schemas.comment_schema import CommentCreate, CommentRead, CommentThread
+from app.schemas.page_schema import Page
+from app.utils.pagination import PageParams, page_params
+from app.utils.projection import json_page, row_page
+from app.services import collections, comment_stream, threads, trending
+from app.services.counters import latest_comment_time
+from app.utils.dependencies import get_db, get_read_db, get_current_principal
+from app.utils.admission import rate_limit
+from app.utils.response_cache import cached_json, response_cache
 
 router = APIRouter(prefix="/comments", tags=["Comments"])
 
 
-@router.post("/", response_model=CommentRead, status_code=status.HTTP_201_CREATED)
+@router.post("/", response_model=CommentRead, status_code=status.HTTP_201_CREATED, dependencies=[Depends(rate_limit("comments"))])
 async def add_comment(
     payload: CommentCreate,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
-    # Ensure the video exists
-    result = await db.execute(select(Video).where(Video.id == payload.video_id))
-    video = result.scalar_one_or_none()
-    if not video:
+    # Bump the video's counters; matching no row means the video doesn't exist
+    now = datetime.utcnow()
+    result = await db.execute(
+        update(Video)
+        .where(Video.id == payload.video_id)
+        .values(comment_count=Video.comment_count + 1, last_comment_at=now)
+    )
+    if result.rowcount == 0:
         raise HTTPException(status_code=404, detail="Video not found")
 
     comment = Comment(
-        text=payload.text,
+        content=payload.content,
         video_id=payload.video_id,
-        user_id=current_user.id
+        user_id=current_user.id,
+        created_at=now,
     )
-    db.add(comment)
+    await threads.add_comment(db, comment, parent_id=payload.parent_id)
+    await trending.record(db, "comment", [payload.video_id])
     await db.commit()
+    response_cache.invalidate(f"video:{payload.video_id}")
     await db.refresh(comment)
+    comment_stream.comment_created(comment)
     return comment
 
 
 
-@router.get("/video/{video_id}", response_model=list[CommentRead])
-async def get_comments_for_video(video_id: int, db: AsyncSession = Depends(get_db)):
-    result = await db.execute(
-        select(Comment).where(Comment.video_id == video_id).order_by(Comment.created_at.desc())
-    )
-    return result.scalars().all()
+@router.get("/video/{video_id}", response_model=Page[CommentRead])
+async def get_comments_for_video(
+    video_id: int,
+    page: PageParams = Depends(page_params),
+    db: AsyncSession = Depends(get_read_db)
+):
+    result = await db.execute(collections.video_comments(video_id, page))
+    return json_page(result.all(), page, key=collections.comment_key)
 
 
-@router.get("/user/{user_id}", response_model=list[CommentRead])
-async def get_comments_by_user(user_id: int, db: AsyncSession = Depends(get_db)):
-    result = await db.execute(
-        select(Comment).where(Comment.user_id == user_id).order_by(Comment.created_at.desc())
-    )
-    return result.scalars().all()
+@router.get("/video/{video_id}/threads", response_model=Page[CommentThread])
+async def get_comment_threads(
+    video_id: int,
+    page: PageParams = Depends(page_params),
+    db: AsyncSession = Depends(get_read_db)
+):
+    # Top-level comments, newest first, each with its first replies
+    return ORJSONResponse(await threads.read_threads(db, video_id, page))
+
+
+@router.get("/{comment_id}/replies", response_model=Page[CommentRead])
+async def get_replies(
+    comment_id: int,
+    page: PageParams = Depends(page_params),
+    db: AsyncSession = Depends(get_read_db)
+):
+    result = await db.execute(threads.replies(comment_id, page))
+    return json_page(result.all(), page, key=threads.reply_key)
+
+
+@router.get("/{comment_id}/thread", response_model=Page[CommentRead])
+async def get_thread(
+    comment_id: int,
+    page: PageParams = Depends(page_params),
+    db: AsyncSession = Depends(get_read_db)
+):
+    # The comment and its whole subtree, depth-first
+    result = await db.execute(threads.subtree(comment_id, page))
+    rows = result.all()
+    if not rows and not page.cursor:
+        raise HTTPException(status_code=404, detail="Comment not found")
+    data = row_page(rows, page, key=threads.path_key)
+    for item in data["items"]:
+        del item["path"]  # selected for the cursor only
+    return ORJSONResponse(data)
+
+
+@router.get("/user/{user_id}", response_model=Page[CommentRead])
+async def get_comments_by_user(
+    user_id: int,
+    page: PageParams = Depends(page_params),
+    db: AsyncSession = Depends(get_read_db)
+):
+    result = await db.execute(collections.user_comments(user_id, page))
+    return json_page(result.all(), page, key=collections.comment_key)
 
 
 @router.delete("/{comment_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_comment(
     comment_id: int,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     result = await db.execute(select(Comment).where(Comment.id == comment_id))
     comment = result.scalar_one_or_none()
@@ -66,15 +125,23 @@ async def delete_comment(
     if current_user.role != RoleEnum.admin and comment.user_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized to delete this comment")
 
-    await db.delete(comment)
+    # Replies go with it, in one range delete
+    deleted = await threads.delete_subtree(db, comment)
+    await db.execute(
+        update(Video)
+        .where(Video.id == comment.video_id)
+        .values(comment_count=Video.comment_count - deleted, last_comment_at=latest_comment_time(comment.video_id))
+    )
     await db.commit()
+    response_cache.invalidate(f"video:{comment.video_id}")
+    comment_stream.comment_deleted(comment, deleted)
 
-@router.put("/{comment_id}", response_model=CommentRead)
+@router.put("/{comment_id}", response_model=CommentRead, dependencies=[Depends(rate_limit("comments"))])
 async def edit_comment(
     comment_id: int,
     payload: CommentCreate,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     result = await db.execute(select(Comment).where(Comment.id == comment_id))
     comment = result.scalar_one_or_none()
@@ -84,27 +151,49 @@ async def edit_comment(
     if comment.user_id != current_user.id:
         raise HTTPException(status_code=403, detail="You can only edit your own comments")
 
-    comment.text = payload.text
+    comment.content = payload.content
     await db.commit()
+    response_cache.invalidate(f"video:{comment.video_id}")
     await db.refresh(comment)
+    comment_stream.comment_updated(comment)
     return comment
 
 
 @router.get("/video/{video_id}/stats", response_model=dict)
-async def get_comment_stats(video_id: int, db: AsyncSession = Depends(get_db)):
-    total_comments_query = await db.execute(
-        select(func.count(Comment.id)).where(Comment.video_id == video_id)
+async def get_comment_stats(request: Request, video_id: int, db: AsyncSession = Depends(get_read_db)):
+    return await cached_json(
+        request, ("comment_stats", video_id), dict, lambda: _comment_stats(video_id, db),
+        tags=lambda _: [f"video:{video_id}"],
     )
-    total_comments = total_comments_query.scalar()
 
-    latest_comment_query = await db.execute(
-        select(Comment).where(Comment.video_id == video_id).order_by(Comment.created_at.desc()).limit(1)
+
+async def _comment_stats(video_id: int, db: AsyncSession):
+    latest_text = (
+        select(Comment.content)
+        .where(Comment.video_id == Video.id)
+        .order_by(Comment.created_at.desc(), Comment.id.desc())
+        .limit(1)
+        .scalar_subquery()
     )
-    latest_comment = latest_comment_query.scalar_one_or_none()
+    result = await db.execute(
+        select(
+            Video.comment_count,
+            Video.last_comment_at,
+            Video.like_count,
+            Video.watch_later_count,
+            latest_text,
+        ).where(Video.id == video_id)
+    )
+    row = result.one_or_none()
+    if row is None:
+        raise HTTPException(status_code=404, detail="Video not found")
+    comment_count, last_comment_at, like_count, watch_later_count, latest_comment = row
 
     return {
         "video_id": video_id,
-        "total_comments": total_comments,
-        "latest_comment": latest_comment.text if latest_comment else None,
-        "latest_comment_time": latest_comment.created_at if latest_comment else None
+        "total_comments": comment_count,
+        "latest_comment": latest_comment,
+        "latest_comment_time": last_comment_at,
+        "like_count": like_count,
+        "watch_later_count": watch_later_count,
     }
@@ -0,0 +1,69 @@
+# app/routes/internal.py
+from fastapi import APIRouter
+from app.core.security import password_hasher
+from app.services.comment_stream import comment_hub
+from app.services.feed import feed_trimmer
+from app.services import loaders, uploads
+from app.services.purge import account_purger
+from app.services.related import related_updater
+from app.services.trending import trending_updater
+from app.services.view_counter import view_counter
+from app.utils import admission
+from app.utils.response_cache import response_cache
+
+router = APIRouter(prefix="/internal", tags=["Internal"])
+
+
+@router.get("/views", response_model=dict)
+async def view_counter_stats():
+    return view_counter.stats()
+
+
+@router.get("/hashing", response_model=dict)
+async def password_hasher_stats():
+    return password_hasher.stats()
+
+
+@router.get("/cache", response_model=dict)
+async def response_cache_stats():
+    return response_cache.stats()
+
+
+@router.get("/feed", response_model=dict)
+async def feed_trimmer_stats():
+    return feed_trimmer.stats()
+
+
+@router.get("/trending", response_model=dict)
+async def trending_updater_stats():
+    return trending_updater.stats()
+
+
+@router.get("/related", response_model=dict)
+async def related_updater_stats():
+    return related_updater.stats()
+
+
+@router.get("/loaders", response_model=dict)
+async def loader_stats():
+    return loaders.stats()
+
+
+@router.get("/purge", response_model=dict)
+async def account_purger_stats():
+    return account_purger.stats()
+
+
+@router.get("/admission", response_model=dict)
+async def admission_stats():
+    return admission.stats()
+
+
+@router.get("/uploads", response_model=dict)
+async def upload_stats():
+    return uploads.hashers.stats()
+
+
+@router.get("/comment-stream", response_model=dict)
+async def comment_stream_stats():
+    return comment_hub.stats()
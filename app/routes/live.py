@@ -0,0 +1,79 @@
+# app/routes/live.py
+import asyncio
+from typing import Optional
+from fastapi import APIRouter, Query, WebSocket, WebSocketDisconnect, status
+from app.core.config import settings
+from app.services import loaders
+from app.services.comment_stream import comment_hub
+
+router = APIRouter(prefix="/ws", tags=["Live"])
+
+# Close codes: "try again later" for slow subscribers, so clients reconnect and resume
+WS_TOO_SLOW = status.WS_1013_TRY_AGAIN_LATER
+_TOO_SLOW_REASON = "Too far behind; reconnect with after=<last seq>"
+
+
+@router.websocket("/videos/{video_id}/comments")
+async def comment_stream_socket(
+    websocket: WebSocket,
+    video_id: int,
+    after: Optional[int] = Query(None, ge=0, description="`seq` of the last message seen; replays what came after it first"),
+):
+    """New, edited and deleted comments of one video as JSON text messages:
+    `{"type": "comment.created" | "comment.updated", "seq": ..., "comment": {...}}`,
+    `{"type": "comment.deleted", "seq": ..., "id": ..., "deleted": ...}`.
+
+    A client that reconnects with `after=<last seq>` first gets every change
+    it missed, edits and deletes included, from the server's recent history.
+    When that no longer covers the gap (it was too long, or the server
+    restarted or is another worker) it gets `{"type": "resync", "seq": ...}`
+    instead and should reload the first page over HTTP.
+    """
+    # Through the loader: a premiere's watchers connecting at once share the lookup
+    if await loaders.video_loader.load(video_id) is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Video not found")
+        return
+    await websocket.accept()
+
+    subscription, missed = comment_hub.subscribe(video_id, after)
+    try:
+        for data in missed:
+            await websocket.send_text(data)
+        await _relay(websocket, subscription)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        comment_hub.unsubscribe(subscription)
+
+
+async def _relay(websocket: WebSocket, subscription):
+    """Forward queued messages until either side goes away."""
+    async def send():
+        while True:
+            data = await subscription.queue.get()
+            if data is None:
+                await websocket.close(code=WS_TOO_SLOW, reason=_TOO_SLOW_REASON)
+                return
+            try:
+                await asyncio.wait_for(websocket.send_text(data), settings.COMMENT_STREAM_SEND_TIMEOUT_SECONDS)
+            except asyncio.TimeoutError:
+                comment_hub.dropped_subscribers += 1
+                await websocket.close(code=WS_TOO_SLOW, reason=_TOO_SLOW_REASON)
+                return
+
+    async def receive():
+        # Clients don't send anything; reading notices when they leave
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                return
+
+    tasks = [asyncio.create_task(send()), asyncio.create_task(receive())]
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            task.result()  # re-raise what ended it
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
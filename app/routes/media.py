@@ -0,0 +1,88 @@
+# app/routes/media.py
+# Serves completed uploads. Range requests get 206 with Content-Range,
+# unsatisfiable ranges 416 and a stale If-Range the whole file (Starlette's
+# FileResponse); bodies go out through the server's zero-copy extension
+# when it offers one. Responses are nosniff, and a stored type outside the
+# upload allowlist (uploads made before it existed) is sent as an
+# attachment so the browser never renders it on this origin.
+import os
+
+import anyio
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.responses import FileResponse
+from starlette.types import Send
+
+from app.core.config import settings
+from app.schemas.upload_schema import is_allowed_content_type
+from app.services import uploads
+from app.utils.dependencies import get_read_db
+
+router = APIRouter(prefix="/media", tags=["Media"])
+
+_ZEROCOPY = "http.response.zerocopysend"
+
+
+class MediaFileResponse(FileResponse):
+    """A FileResponse that hands the kernel the file instead of copying it.
+
+    ASGI apps can't call sendfile(2) on the client socket themselves; servers
+    that can advertise `http.response.zerocopysend` (file descriptor, offset,
+    count) or `http.response.pathsend`. Without either, the body is read in
+    MEDIA_READ_CHUNK_BYTES pieces, so a request holds at most one piece in
+    memory whatever the file size.
+    """
+
+    chunk_size = settings.MEDIA_READ_CHUNK_BYTES
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._zerocopy = False
+
+    async def __call__(self, scope, receive, send):
+        self._zerocopy = _ZEROCOPY in scope.get("extensions", {})
+        await super().__call__(scope, receive, send)
+
+    async def _send_zerocopy(self, send: Send, offset: int, count: int):
+        file = await anyio.to_thread.run_sync(open, self.path, "rb")
+        try:
+            await send({"type": _ZEROCOPY, "file": file.fileno(), "offset": offset, "count": count, "more_body": False})
+        finally:
+            await anyio.to_thread.run_sync(file.close)
+
+    async def _handle_simple(self, send: Send, send_header_only: bool, send_pathsend: bool) -> None:
+        if not self._zerocopy or send_header_only or send_pathsend:
+            return await super()._handle_simple(send, send_header_only, send_pathsend)
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        await self._send_zerocopy(send, 0, int(self.headers["content-length"]))
+
+    async def _handle_single_range(self, send: Send, start: int, end: int, file_size: int, send_header_only: bool) -> None:
+        if not self._zerocopy or send_header_only:
+            return await super()._handle_single_range(send, start, end, file_size, send_header_only)
+        self.headers["content-range"] = f"bytes {start}-{end - 1}/{file_size}"
+        self.headers["content-length"] = str(end - start)
+        await send({"type": "http.response.start", "status": 206, "headers": self.raw_headers})
+        await self._send_zerocopy(send, start, end - start)
+
+
+# FileResponse has no default status code for the OpenAPI schema to read.
+# One route per method, so each gets its own operation id.
+@router.get("/{upload_id}", response_class=MediaFileResponse, status_code=200)
+@router.head("/{upload_id}", response_class=MediaFileResponse, status_code=200)
+async def get_media(upload_id: str, db: AsyncSession = Depends(get_read_db)):
+    found = await uploads.completed(db, upload_id)
+    if found is None:
+        raise HTTPException(status_code=404, detail="Media not found")
+    content_type, sha256 = found
+    path = uploads.media_path(upload_id)
+    if not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail="Media not found")
+    # Completed uploads never change, so the digest is a strong validator
+    headers = {
+        "ETag": f'"{sha256}"',
+        "Cache-Control": "public, max-age=31536000, immutable",
+        "X-Content-Type-Options": "nosniff",
+    }
+    if not is_allowed_content_type(content_type):
+        headers["Content-Disposition"] = "attachment"
+    return MediaFileResponse(path, media_type=content_type, headers=headers)
@@ -0,0 +1,83 @@
+# app/routes/uploads.py
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.utils.dependencies import get_db, get_current_principal
+from app.core.principals import Principal
+from app.models.upload import Upload
+from app.models.user import RoleEnum
+from app.schemas.upload_schema import UploadCreate, UploadRead
+from app.services import uploads
+
+router = APIRouter(prefix="/uploads", tags=["Uploads"])
+
+
+async def _get_upload(db: AsyncSession, upload_id: str, current_user: Principal) -> Upload:
+    upload = await db.get(Upload, upload_id)
+    if upload is None or (upload.user_id != current_user.id and current_user.role != RoleEnum.admin):
+        raise HTTPException(status_code=404, detail="Upload not found")
+    return upload
+
+
+@router.post("/", response_model=UploadRead, status_code=status.HTTP_201_CREATED)
+async def create_upload(
+    payload: UploadCreate,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal),
+):
+    if current_user.role not in [RoleEnum.creator, RoleEnum.admin]:
+        raise HTTPException(status_code=403, detail="Only creators or admins can upload videos")
+    upload = await uploads.create(db, current_user.id, payload)
+    response.headers["Location"] = f"/uploads/{upload.id}"
+    response.headers["Upload-Offset"] = "0"
+    return uploads.view(upload)
+
+
+@router.get("/{upload_id}", response_model=UploadRead)
+async def get_upload(
+    upload_id: str,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal),
+):
+    # Where to resume after a dropped connection; read from the writer so it's current
+    upload = await _get_upload(db, upload_id, current_user)
+    response.headers["Upload-Offset"] = str(upload.offset)
+    return uploads.view(upload)
+
+
+@router.patch("/{upload_id}", response_model=UploadRead)
+async def upload_chunk(
+    upload_id: str,
+    request: Request,
+    response: Response,
+    upload_offset: int = Header(..., alias="Upload-Offset", ge=0),
+    content_length: Optional[int] = Header(None, ge=0),
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal),
+):
+    """Write the raw request body at `Upload-Offset`.
+
+    The offset must equal the upload's current offset; a 409 carries the
+    right one. Chunks are at most UPLOAD_MAX_CHUNK_BYTES. The chunk that
+    reaches the declared size completes the upload.
+    """
+    upload = await _get_upload(db, upload_id, current_user)
+    if upload.user_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Only the uploader can add chunks")
+    upload = await uploads.write_chunk(db, upload_id, upload_offset, request.stream(), content_length)
+    response.headers["Upload-Offset"] = str(upload.offset)
+    return uploads.view(upload)
+
+
+@router.delete("/{upload_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def cancel_upload(
+    upload_id: str,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal),
+):
+    upload = await _get_upload(db, upload_id, current_user)
+    if upload.completed_at is not None:
+        raise HTTPException(status_code=409, detail="Completed uploads can't be cancelled")
+    await uploads.discard(db, upload)
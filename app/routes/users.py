@@ -1,91 +1,356 @@
 # app/routes/users.py
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import ORJSONResponse
+from datetime import datetime
+from typing import List
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from app.utils.dependencies import get_db, get_current_user
-from app.models.user import User
+from sqlalchemy import func
+from sqlalchemy.orm import raiseload
+from app.core.config import settings
+from app.utils.dependencies import get_db, get_read_db, get_current_principal, require_admin, credentials_exception
+from app.core.principals import Principal, principal_cache
+from app.models.user import User, RoleEnum, likes_table, watch_later_table, subscriptions_table
 from app.models.video import Video
-from app.schemas.user_schema import UserRead, UserDetail
+from app.schemas.user_schema import UserRead, UserDetail, RoleUpdate
+from app.schemas.video_schema import VideoRead
+from app.schemas.engagement_schema import BatchAction, EngagementBatch, EngagementBatchResult, EngagementState
+from app.schemas.page_schema import Batch, Page
+from app.utils.pagination import PageParams, page_params
+from app.utils.batch_loader import batch_ids, batch_result
+from app.utils.projection import json_page, row_page
+from app.services import collections
+from app.services import engagement, feed, loaders, purge, related
+from app.utils.admission import rate_limit
+from app.utils.response_cache import response_cache
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
 
 
+def _count(table, column, user_id):
+    return select(func.count()).select_from(table).where(column == user_id).scalar_subquery()
+
+
 @router.get("/me",response_model=UserDetail)
-async def get_my_profile(current_user:User=Depends(get_current_user),db:AsyncSession=Depends(get_db)):
-    await db.refresh(current_user)
-    return current_user
+async def get_my_profile(current_user:Principal=Depends(get_current_principal),db:AsyncSession=Depends(get_read_db)):
+    # The user row and every collection total in one statement
+    result = await db.execute(
+        select(
+            User,
+            select(func.count(Video.id)).where(Video.uploader_id == User.id).scalar_subquery(),
+            _count(likes_table, likes_table.c.user_id, User.id),
+            _count(watch_later_table, watch_later_table.c.user_id, User.id),
+            _count(subscriptions_table, subscriptions_table.c.subscriber_id, User.id),
+        )
+        .options(raiseload("*"))
+        .where(User.id == current_user.id)
+    )
+    row = result.one_or_none()
+    if row is None:
+        raise credentials_exception
+    user, video_total, liked_total, watch_later_total, subscription_total = row
+
+    # One bounded query per nested list
+    first = PageParams(cursor=None, limit=settings.DETAIL_COLLECTION_LIMIT)
+    uploaded = await db.execute(collections.user_videos(user.id, first))
+    liked = await db.execute(collections.user_liked_videos(user.id, first))
+    watch_later = await db.execute(collections.user_watch_later_videos(user.id, first))
+    subscribers = await db.execute(collections.user_subscribers(user.id, first))
+    subscriptions = await db.execute(collections.user_subscriptions(user.id, first))
+
+    return {
+        **UserRead.model_validate(user).model_dump(),
+        "uploaded_videos": {
+            **row_page(uploaded.all(), first, key=collections.video_key),
+            "total": video_total,
+        },
+        "liked_videos": {
+            **row_page(liked.all(), first, key=collections.id_key),
+            "total": liked_total,
+        },
+        "watch_later_videos": {
+            **row_page(watch_later.all(), first, key=collections.id_key),
+            "total": watch_later_total,
+        },
+        "subscribers": {
+            **row_page(subscribers.all(), first, key=collections.id_key),
+            "total": user.subscriber_count,
+        },
+        "subscriptions": {
+            **row_page(subscriptions.all(), first, key=collections.id_key),
+            "total": subscription_total,
+        },
+    }
+
+
+@router.get("/me/feed", response_model=Page[VideoRead])
+async def get_my_feed(
+    page: PageParams = Depends(page_params),
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_read_db)
+):
+    # Uploads from subscribed creators, newest first
+    return ORJSONResponse(await feed.read_feed(db, current_user.id, page))
+
+
+@router.get("/me/liked", response_model=Page[VideoRead])
+async def get_my_liked_videos(
+    page: PageParams = Depends(page_params),
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_read_db)
+):
+    result = await db.execute(collections.user_liked_videos(current_user.id, page))
+    return json_page(result.all(), page, key=collections.id_key)
+
+
+@router.get("/me/watch-later", response_model=Page[VideoRead])
+async def get_my_watch_later_videos(
+    page: PageParams = Depends(page_params),
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_read_db)
+):
+    result = await db.execute(collections.user_watch_later_videos(current_user.id, page))
+    return json_page(result.all(), page, key=collections.id_key)
+
+@router.get("/batch", response_model=Batch[UserRead])
+async def get_users_batch(ids: List[int] = Depends(batch_ids)):
+    users = await loaders.user_loader.load_many(ids)
+    return ORJSONResponse(batch_result(ids, users))
+
+
+@router.get("/{user_id}", response_model=UserRead)
+async def get_user(user_id: int):
+    user = await loaders.user_loader.load(user_id)
+    if user is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    return ORJSONResponse(user)
 
-@router.post("/{user_id}/subscribe",response_model="UserRead")
+@router.post("/{user_id}/subscribe",response_model=UserRead, dependencies=[Depends(rate_limit("engagement"))])
 async def subscribe_to_user(
     user_id:int,
-    current_user:User = Depends(get_current_user),
+    current_user:Principal = Depends(get_current_principal),
     db:AsyncSession=Depends(get_db)
 ):
     if current_user.id  == user_id:
         raise HTTPException(status_code=400, detail="You cannot subscribe to yourself")
-    result = await db.execute(select(User)).where(User.id==user_id)
+    result = await db.execute(select(User).where(User.id==user_id, User.deleted_at.is_(None)))
     target_user = result.scalar_one_or_none()
     if not target_user:
         raise HTTPException(status_code=404, detail="User not found")
-    
-    if target_user in current_user.subscriptions:
+
+    if not await engagement.add(db, engagement.SUBSCRIPTIONS, current_user.id, user_id):
         raise HTTPException(status_code=400, detail="Already subscribed")
-    current_user.subscriptions.append(target_user)
+    await feed.subscribe(db, current_user.id, [user_id])
     await db.commit()
+    response_cache.invalidate(f"user:{user_id}")
+    await db.refresh(target_user)
     return target_user
 
-@router.delete("/{user_id}/unsubscribe",status_code=status.HTTP_204_NO_CONTENT)
+@router.delete("/{user_id}/unsubscribe",status_code=status.HTTP_204_NO_CONTENT, dependencies=[Depends(rate_limit("engagement"))])
 async def unsubscribe_from_user(
     user_id:int,
-    current_user:User = Depends(get_current_user),
+    current_user:Principal = Depends(get_current_principal),
     db:AsyncSession= Depends(get_db)
 ):
-    result = await db.execute(select(User)).where(User.id == user_id)
-    target_user= result.scalar_one_or_none
-    if not target_user:
-        raise HTTPException(status_code=404,detail="user not found")
-    if target_user not in current_user.subscriptions:
+    if not await engagement.remove(db, engagement.SUBSCRIPTIONS, current_user.id, user_id):
+        result = await db.execute(select(User.id).where(User.id == user_id))
+        if result.scalar_one_or_none() is None:
+            raise HTTPException(status_code=404,detail="user not found")
         raise HTTPException(status_code=400, detail="You are not subscribed")
+    await feed.unsubscribe(db, current_user.id, [user_id])
+    await db.commit()
+    response_cache.invalidate(f"user:{user_id}")
+
+
+@router.put("/{user_id}/subscription", response_model=EngagementState, dependencies=[Depends(rate_limit("engagement"))])
+async def ensure_subscribed(
+    user_id: int,
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_db)
+):
+    if current_user.id == user_id:
+        raise HTTPException(status_code=400, detail="You cannot subscribe to yourself")
+    # Accounts waiting for the purge still have a row, but can't gain subscribers
+    result = await db.execute(select(User.id).where(User.id == user_id, User.deleted_at.is_(None)))
+    if result.scalar_one_or_none() is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    try:
+        changed = await engagement.add(db, engagement.SUBSCRIPTIONS, current_user.id, user_id)
+    except engagement.TargetNotFound:
+        raise HTTPException(status_code=404, detail="User not found")
+    if changed:
+        await feed.subscribe(db, current_user.id, [user_id])
+    await db.commit()
+    if changed:
+        response_cache.invalidate(f"user:{user_id}")
+    return {"id": user_id, "active": True, "changed": changed}
 
-    current_user.subscriptions.remove(target_user)
+
+@router.delete("/{user_id}/subscription", response_model=EngagementState, dependencies=[Depends(rate_limit("engagement"))])
+async def ensure_unsubscribed(
+    user_id: int,
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_db)
+):
+    changed = await engagement.remove(db, engagement.SUBSCRIPTIONS, current_user.id, user_id)
+    if changed:
+        await feed.unsubscribe(db, current_user.id, [user_id])
     await db.commit()
+    if changed:
+        response_cache.invalidate(f"user:{user_id}")
+    return {"id": user_id, "active": False, "changed": changed}
 
 
-@router.get("/{user_id}/subscribers", response_model=list[UserRead])
-async def get_user_subscribers(user_id: int, db: AsyncSession = Depends(get_db)):
-    result = await db.execute(select(User).where(User.id == user_id))
-    user = result.scalar_one_or_none()
-    if not user:
+@router.post("/subscriptions/batch", response_model=EngagementBatchResult, dependencies=[Depends(rate_limit("engagement"))])
+async def batch_subscribe(
+    payload: EngagementBatch,
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_db)
+):
+    if payload.action == BatchAction.add:
+        if current_user.id in payload.ids:
+            raise HTTPException(status_code=400, detail="You cannot subscribe to yourself")
+        result = await db.execute(select(User.id).where(User.id.in_(payload.ids), User.deleted_at.is_(None)))
+        live = set(result.scalars().all())
+        outcome = await engagement.add_many(db, engagement.SUBSCRIPTIONS, current_user.id, live)
+        # Soft-deleted accounts are reported like missing ones
+        outcome["missing"] = sorted(set(payload.ids) - live)
+        await feed.subscribe(db, current_user.id, outcome["changed"])
+    else:
+        outcome = await engagement.remove_many(db, engagement.SUBSCRIPTIONS, current_user.id, payload.ids)
+        await feed.unsubscribe(db, current_user.id, outcome["changed"])
+    await db.commit()
+    response_cache.invalidate(*(f"user:{u}" for u in outcome["changed"]))
+    return outcome
+
+
+@router.get("/{user_id}/subscribers", response_model=Page[UserRead])
+async def get_user_subscribers(
+    user_id: int,
+    page: PageParams = Depends(page_params),
+    db: AsyncSession = Depends(get_read_db)
+):
+    result = await db.execute(select(User.id).where(User.id == user_id, User.deleted_at.is_(None)))
+    if result.scalar_one_or_none() is None:
         raise HTTPException(status_code=404, detail="User not found")
-    await db.refresh(user)
-    return user.subscribers
-
-@router.get("/{user_id}/subscribers", response_model=list[UserRead])
-async def get_user_subscribers(user_id: int, db: AsyncSession = Depends(get_db)):
-    result = await db.execute(select(User).where(User.id == user_id))
-    user = result.scalar_one_or_none()
-    if not user:
+
+    # Subscriptions carry no timestamp, so subscribers are paged by their user id
+    result = await db.execute(collections.user_subscribers(user_id, page))
+    return json_page(result.all(), page, key=collections.id_key)
+
+
+@router.get("/{user_id}/subscriptions", response_model=Page[UserRead])
+async def get_user_subscriptions(
+    user_id: int,
+    page: PageParams = Depends(page_params),
+    db: AsyncSession = Depends(get_read_db)
+):
+    result = await db.execute(select(User.id).where(User.id == user_id, User.deleted_at.is_(None)))
+    if result.scalar_one_or_none() is None:
         raise HTTPException(status_code=404, detail="User not found")
-    await db.refresh(user)
-    return user.subscribers
+
+    result = await db.execute(collections.user_subscriptions(user_id, page))
+    return json_page(result.all(), page, key=collections.id_key)
+
+
+@router.post("/watchlater/batch", response_model=EngagementBatchResult, dependencies=[Depends(rate_limit("engagement"))])
+async def batch_watch_later(
+    payload: EngagementBatch,
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_db)
+):
+    if payload.action == BatchAction.add:
+        outcome = await engagement.add_many(db, engagement.WATCH_LATER, current_user.id, payload.ids)
+        await related.record(db, "watch_later", current_user.id, outcome["changed"])
+    else:
+        outcome = await engagement.remove_many(db, engagement.WATCH_LATER, current_user.id, payload.ids)
+        await related.record(db, "watch_later", current_user.id, outcome["changed"], added=False)
+    await db.commit()
+    response_cache.invalidate(*(f"video:{v}" for v in outcome["changed"]))
+    return outcome
 
 
-@router.post("/watchlater/{video_id}",response_model=dict)
+@router.post("/watchlater/{video_id}",response_model=dict, dependencies=[Depends(rate_limit("engagement"))])
 async def toggle_watch_later(
     video_id:int,
-    current_user:User =Depends(get_current_user),
+    current_user:Principal =Depends(get_current_principal),
     db:AsyncSession =Depends(get_db)
 ):
-    result = await db.execute(select(Video)).where(Video.id==video_id)
-    video = result.scalar_one_or_none
-    if not video:
+    try:
+        added = await engagement.toggle(db, engagement.WATCH_LATER, current_user.id, video_id)
+    except engagement.TargetNotFound:
         raise HTTPException(status_code=404, detail="Video not found")
-    if video in current_user.watch_later_videos:
-        current_user.watch_later_videos.remove(video)
-        action ="removed"
-    else:
-        current_user.watch_later_videos.append(video)
-        action ="added"
+    action = "added" if added else "removed"
+    await related.record(db, "watch_later", current_user.id, [video_id], added=added)
     await db.commit()
+    response_cache.invalidate(f"video:{video_id}")
     return {"message" :f"Video {action} to wathc later list"}
+
+
+@router.put("/watchlater/{video_id}", response_model=EngagementState, dependencies=[Depends(rate_limit("engagement"))])
+async def add_to_watch_later(
+    video_id: int,
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_db)
+):
+    try:
+        changed = await engagement.add(db, engagement.WATCH_LATER, current_user.id, video_id)
+    except engagement.TargetNotFound:
+        raise HTTPException(status_code=404, detail="Video not found")
+    if changed:
+        await related.record(db, "watch_later", current_user.id, [video_id])
+    await db.commit()
+    if changed:
+        response_cache.invalidate(f"video:{video_id}")
+    return {"id": video_id, "active": True, "changed": changed}
+
+
+@router.delete("/watchlater/{video_id}", response_model=EngagementState, dependencies=[Depends(rate_limit("engagement"))])
+async def remove_from_watch_later(
+    video_id: int,
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_db)
+):
+    changed = await engagement.remove(db, engagement.WATCH_LATER, current_user.id, video_id)
+    if changed:
+        await related.record(db, "watch_later", current_user.id, [video_id], added=False)
+    await db.commit()
+    if changed:
+        response_cache.invalidate(f"video:{video_id}")
+    return {"id": video_id, "active": False, "changed": changed}
+
+
+@router.put("/{user_id}/role", response_model=UserRead)
+async def change_user_role(
+    user_id: int,
+    payload: RoleUpdate,
+    _: Principal = Depends(require_admin),
+    db: AsyncSession = Depends(get_db)
+):
+    user = await db.get(User, user_id)
+    if not user or user.deleted_at is not None:
+        raise HTTPException(status_code=404, detail="User not found")
+    user.role = RoleEnum(payload.role.value)
+    # Revokes the user's tokens on every worker: they carry the old role claim
+    user.credentials_changed_at = datetime.utcnow()
+    await db.commit()
+    principal_cache.invalidate_user(user_id)
+    response_cache.invalidate(f"user:{user_id}")
+    return user
+
+
+@router.delete("/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_user(
+    user_id: int,
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_db)
+):
+    if current_user.role != RoleEnum.admin and current_user.id != user_id:
+        raise HTTPException(status_code=403, detail="You cannot delete this user")
+    user = await db.get(User, user_id)
+    if not user or user.deleted_at is not None:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    # Large accounts are soft-deleted here and purged in the background
+    await purge.delete_account(db, user)
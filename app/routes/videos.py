@@ -1,11 +1,30 @@
 # app/routes/videos.py
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import ORJSONResponse
+from typing import List, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from app.utils.dependencies import get_db, get_current_user
+from sqlalchemy import delete
+from app.core.config import settings
+from app.utils.dependencies import get_db, get_read_db, get_current_principal
+from app.core.principals import Principal
 from app.models.video import Video
-from app.models.user import User, RoleEnum
-from app.schemas.video_schema import VideoCreate, VideoRead, VideoDetail
+from app.models.upload import Upload
+from app.models.user import RoleEnum
+from app.schemas.video_schema import (
+    FacetedPage, RelatedVideo, TrendingPeriod, TrendingVideo, VideoCreate, VideoDetail, VideoLabels, VideoRead,
+    VideoSearchHit, normalize_label, normalize_tags,
+)
+from app.schemas.user_schema import UserRead
+from app.schemas.engagement_schema import BatchAction, EngagementBatch, EngagementBatchResult, EngagementState
+from app.schemas.page_schema import Batch, Page
+from app.utils.pagination import PageParams, page_params, keyset, build_page
+from app.utils.projection import json_page, row_page
+from app.services import collections, engagement, facets, feed, loaders, related, search, trending, uploads
+from app.utils.batch_loader import batch_ids, batch_result
+from app.services.view_counter import view_counter
+from app.utils.admission import rate_limit
+from app.utils.response_cache import cached_json, response_cache
 
 router = APIRouter(prefix="/videos", tags=["Videos"])
 
@@ -15,82 +34,262 @@ router = APIRouter(prefix="/videos", tags=["Videos"])
 async def upload_video(
     payload:VideoCreate,
     db:AsyncSession=Depends(get_db),
-    current_user:User =Depends(get_current_user)
+    current_user:Principal =Depends(get_current_principal)
 
 ):
     if current_user.role not in [RoleEnum.creator,RoleEnum.admin]:
         raise HTTPException(status_code=403, detail="Only creators or admins can upload videos")
+    if payload.upload_id is not None:
+        upload = await db.get(Upload, payload.upload_id)
+        if upload is None or upload.user_id != current_user.id:
+            raise HTTPException(status_code=404, detail="Upload not found")
+        if upload.completed_at is None:
+            raise HTTPException(status_code=409, detail="Upload is not complete")
+        video_url = uploads.media_url(upload.id)
+    else:
+        video_url = str(payload.video_url)
     new_video = Video(
         title=payload.title,
         description=payload.description,
-        video_url=str(payload.video_url),
-        thumbnail_url=str(payload.thumbnail_url),
+        video_url=video_url,
+        thumbnail_url=str(payload.thumbnail_url) if payload.thumbnail_url else None,
         uploader_id=current_user.id,
+        category=payload.category,
     )
     db.add(new_video)
+    await db.flush()
+    await facets.label(db, new_video, payload.tags)
+    await feed.fan_out(db, new_video)
     await db.commit()
+    response_cache.invalidate(f"uploader:{current_user.id}")
     await db.refresh(new_video)
     return new_video
 
 
-@router.get("/",response_model=list[VideoRead])
-async def get_all_videos(db:AsyncSession=Depends(get_db)):
-    result = await db.execute(select(Video))
-    videos = result.scalars().all()
-    return videos
+@router.get("/",response_model=FacetedPage)
+async def get_all_videos(
+    page:PageParams=Depends(page_params),
+    tags: Optional[str] = Query(None, description="Comma-separated; videos carrying all of them"),
+    category: Optional[str] = None,
+    db:AsyncSession=Depends(get_read_db)
+):
+    try:
+        names = normalize_tags([t for t in tags.split(",") if t.strip()]) if tags else []
+        category = normalize_label(category) if category is not None else None
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+
+    flt = await facets.resolve(db, names, category)
+    if flt.empty:
+        rows = []
+    else:
+        stmt, sort_col, id_col = facets.matching(flt, *collections.VIDEO_COLUMNS)
+        result = await db.execute(keyset(stmt, sort_col, id_col, page))
+        rows = result.all()
+    data = row_page(rows, page, key=collections.video_key)
+    # Facets don't change from page to page, so only the first page has them
+    data["facets"] = None if page.cursor else await facets.facets(db, flt)
+    return ORJSONResponse(data)
 
-@router.get("/uploader/{user_id}",response_model=list[VideoRead])
-async def get_videos_by_user(user_id: int, db: AsyncSession = Depends(get_db)):
-    result = await db.execute(select(Video)).where(Video.uploader_id == user_id)
-    videos = result.scalars().all()
-    return videos
+@router.get("/uploader/{user_id}",response_model=Page[VideoRead])
+async def get_videos_by_user(request: Request, user_id: int, page: PageParams = Depends(page_params), db: AsyncSession = Depends(get_read_db)):
+    async def produce():
+        result = await db.execute(collections.user_videos(user_id, page))
+        return row_page(result.all(), page, key=collections.video_key)
 
-@router.post("/{video_id}/like", response_model=dict)
+    return await cached_json(
+        request,
+        ("uploader_videos", user_id, page.cursor, page.limit),
+        Page[VideoRead],
+        produce,
+        tags=lambda p: [f"uploader:{user_id}", *(f"video:{v.id}" for v in p.items)],
+    )
+
+@router.get("/search", response_model=Page[VideoSearchHit])
+async def search_videos(
+    q: str = Query(..., min_length=1, max_length=200),
+    page: PageParams = Depends(page_params),
+    db: AsyncSession = Depends(get_read_db)
+):
+    if not search.is_supported(db.get_bind().dialect.name):
+        raise HTTPException(status_code=501, detail="Search is not available on this database")
+    match = search.to_match_expression(q)
+    if match is None:
+        return ORJSONResponse({"items": [], "next_cursor": None})
+
+    result = await db.execute(search.search_videos(match, page))
+    hits = [search.hit(row) for row in result.all()]
+    return ORJSONResponse(build_page(hits, page, key=search.hit_key))
+
+@router.get("/trending", response_model=List[TrendingVideo])
+async def trending_videos(
+    period: TrendingPeriod = TrendingPeriod.day,
+    uploader_id: Optional[int] = None,
+    limit: int = Query(settings.DEFAULT_PAGE_SIZE, ge=1, le=settings.TRENDING_TOP_K),
+    db: AsyncSession = Depends(get_read_db)
+):
+    # Served from the precomputed top list, refreshed by the trending job
+    return ORJSONResponse(await trending.read_top(db, period.value, uploader_id, limit))
+
+@router.get("/{video_id}/related", response_model=List[RelatedVideo])
+async def related_videos(
+    video_id: int,
+    limit: int = Query(settings.DEFAULT_PAGE_SIZE, ge=1, le=settings.RELATED_TOP_K),
+    db: AsyncSession = Depends(get_read_db)
+):
+    # "Viewers also liked": the precomputed neighbours, refreshed by the related videos job
+    return ORJSONResponse(await related.read_related(db, video_id, limit))
+
+@router.get("/batch", response_model=Batch[VideoRead])
+async def get_videos_batch(ids: List[int] = Depends(batch_ids)):
+    # One IN query, shared with concurrent lookups of the same ids
+    videos = await loaders.video_loader.load_many(ids)
+    return ORJSONResponse(batch_result(ids, videos))
+
+@router.post("/likes/batch", response_model=EngagementBatchResult, dependencies=[Depends(rate_limit("engagement"))])
+async def batch_like_videos(
+    payload: EngagementBatch,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal)
+):
+    if payload.action == BatchAction.add:
+        outcome = await engagement.add_many(db, engagement.LIKES, current_user.id, payload.ids)
+        await trending.record(db, "like", outcome["changed"])
+        await related.record(db, "like", current_user.id, outcome["changed"])
+    else:
+        outcome = await engagement.remove_many(db, engagement.LIKES, current_user.id, payload.ids)
+        await related.record(db, "like", current_user.id, outcome["changed"], added=False)
+    await db.commit()
+    response_cache.invalidate(*(f"video:{v}" for v in outcome["changed"]))
+    return outcome
+
+@router.post("/{video_id}/like", response_model=dict, dependencies=[Depends(rate_limit("engagement"))])
 async def like_unlike_video(
     video_id: int,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
-    result = await db.execute(select(Video).where(Video.id == video_id))
-    video = result.scalar_one_or_none()
-    if not video:
+    try:
+        liked = await engagement.toggle(db, engagement.LIKES, current_user.id, video_id)
+    except engagement.TargetNotFound:
         raise HTTPException(status_code=404, detail="Video not found")
-
-    if video in current_user.liked_videos:
-        current_user.liked_videos.remove(video)
-        action = "unliked"
-    else:
-        current_user.liked_videos.append(video)
-        action = "liked"
+    action = "liked" if liked else "unliked"
+    if liked:
+        await trending.record(db, "like", [video_id])
+    await related.record(db, "like", current_user.id, [video_id], added=liked)
 
     await db.commit()
+    response_cache.invalidate(f"video:{video_id}")
     return {"message": f"Video {action} successfully"}
 
+@router.put("/{video_id}/like", response_model=EngagementState, dependencies=[Depends(rate_limit("engagement"))])
+async def like_video(
+    video_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal)
+):
+    try:
+        changed = await engagement.add(db, engagement.LIKES, current_user.id, video_id)
+    except engagement.TargetNotFound:
+        raise HTTPException(status_code=404, detail="Video not found")
+    if changed:
+        await trending.record(db, "like", [video_id])
+        await related.record(db, "like", current_user.id, [video_id])
+    await db.commit()
+    if changed:
+        response_cache.invalidate(f"video:{video_id}")
+    return {"id": video_id, "active": True, "changed": changed}
+
+@router.delete("/{video_id}/like", response_model=EngagementState, dependencies=[Depends(rate_limit("engagement"))])
+async def unlike_video(
+    video_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal)
+):
+    changed = await engagement.remove(db, engagement.LIKES, current_user.id, video_id)
+    if changed:
+        await related.record(db, "like", current_user.id, [video_id], added=False)
+    await db.commit()
+    if changed:
+        response_cache.invalidate(f"video:{video_id}")
+    return {"id": video_id, "active": False, "changed": changed}
+
+@router.post("/{video_id}/view", status_code=status.HTTP_202_ACCEPTED, response_model=dict)
+async def record_view(video_id: int):
+    # Buffered in memory and written in batches; views for unknown ids match no row on flush
+    if not view_counter.record(video_id):
+        raise HTTPException(status_code=503, detail="View buffer is full, try again later")
+    return {"message": "View recorded"}
+
+@router.put("/{video_id}/tags", response_model=VideoLabels)
+async def set_video_tags(
+    video_id: int,
+    payload: VideoLabels,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal)
+):
+    result = await db.execute(select(Video.uploader_id, Video.upload_time, Video.category).where(Video.id == video_id))
+    row = result.one_or_none()
+    if row is None:
+        raise HTTPException(status_code=404, detail="Video not found")
+    if current_user.role != RoleEnum.admin and row.uploader_id != current_user.id:
+        raise HTTPException(status_code=403, detail="You cannot edit this video")
+
+    await facets.relabel(db, video_id, row.upload_time, row.category, payload.category, payload.tags)
+    await db.commit()
+    response_cache.invalidate(f"video:{video_id}", f"uploader:{row.uploader_id}")
+    return payload
+
 @router.delete("/{video_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_video(
     video_id: int,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
-    result = await db.execute(select(Video).where(Video.id == video_id))
-    video = result.scalar_one_or_none()
-    if not video:
+    result = await db.execute(select(Video.uploader_id).where(Video.id == video_id))
+    row = result.one_or_none()
+    if row is None:
         raise HTTPException(status_code=404, detail="Video not found")
+    uploader_id = row.uploader_id
 
     # Permission check
-    if current_user.role != RoleEnum.admin and video.uploader_id != current_user.id:
+    if current_user.role != RoleEnum.admin and uploader_id != current_user.id:
         raise HTTPException(status_code=403, detail="You cannot delete this video")
 
-    await db.delete(video)
+    # Comments, likes, tags, feed entries and trending rows go with it (ON DELETE CASCADE)
+    await facets.count_out(db, [video_id])
+    await db.execute(delete(Video).where(Video.id == video_id))
     await db.commit()
+    response_cache.invalidate(f"video:{video_id}", f"uploader:{uploader_id}")
+
+
+@router.get("/{video_id}/liked-by", response_model=Page[UserRead])
+async def get_video_likers(video_id: int, page: PageParams = Depends(page_params), db: AsyncSession = Depends(get_read_db)):
+    result = await db.execute(collections.video_liked_by(video_id, page))
+    return json_page(result.all(), page, key=collections.id_key)
+
+
+@router.get("/{video_id}/watch-later-by", response_model=Page[UserRead])
+async def get_video_watch_later_users(video_id: int, page: PageParams = Depends(page_params), db: AsyncSession = Depends(get_read_db)):
+    result = await db.execute(collections.video_watch_later_by(video_id, page))
+    return json_page(result.all(), page, key=collections.id_key)
 
 
 @router.get("/{video_id}", response_model=VideoDetail)
-async def get_video_details(video_id: int, db: AsyncSession = Depends(get_db)):
-    result = await db.execute(select(Video).where(Video.id == video_id))
-    video = result.scalar_one_or_none()
-    if not video:
-        raise HTTPException(status_code=404, detail="Video not found")
+async def get_video_details(request: Request, video_id: int):
+    return await cached_json(request, ("video_detail", video_id), VideoDetail, lambda: _video_details(video_id), tags=_detail_tags)
+
 
-    await db.refresh(video)
-    return video
+def _detail_tags(detail: VideoDetail):
+    yield f"video:{detail.id}"
+    yield f"user:{detail.uploader_id}"
+    for user in (*detail.liked_by.items, *detail.watch_later_by.items):
+        yield f"user:{user.id}"
+
+
+async def _video_details(video_id: int):
+    # Cache misses for the same video share one render (single-flight)
+    detail = await loaders.video_detail_loader.load(video_id)
+    if detail is None:
+        raise HTTPException(status_code=404, detail="Video not found")
+    return detail
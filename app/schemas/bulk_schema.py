@@ -0,0 +1,72 @@
+from pydantic import BaseModel, Field, HttpUrl, field_serializer, field_validator, model_validator
+from datetime import datetime
+from typing import List, Optional
+from enum import Enum
+from app.schemas.video_schema import normalize_label
+
+class BulkEntity(str, Enum):
+    videos = "videos"
+    comments = "comments"
+    likes = "likes"
+    watch_later = "watch_later"
+    subscriptions = "subscriptions"
+
+# ---------- Import rows (one NDJSON line each) ----------
+# Unknown fields are ignored, so an export can be imported as-is; the
+# denormalized counters it carries are recomputed instead.
+class VideoRow(BaseModel):
+    id: Optional[int] = None
+    title: str
+    description: Optional[str] = None
+    video_url: HttpUrl
+    thumbnail_url: Optional[HttpUrl] = None
+    upload_time: datetime = Field(default_factory=datetime.utcnow)
+    uploader_id: int
+    category: Optional[str] = None
+
+    @field_serializer("video_url", "thumbnail_url")
+    def _url(self, url):
+        return str(url) if url is not None else None
+
+    @field_validator("category")
+    @classmethod
+    def _category(cls, value):
+        return normalize_label(value) if value is not None else None
+
+class CommentRow(BaseModel):
+    id: Optional[int] = None
+    content: str
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    user_id: int
+    video_id: int
+    parent_id: Optional[int] = None
+
+class LikeRow(BaseModel):
+    user_id: int
+    video_id: int
+
+class SubscriptionRow(BaseModel):
+    subscriber_id: int
+    subscribed_to_id: int
+
+    @model_validator(mode="after")
+    def _not_self(self):
+        if self.subscriber_id == self.subscribed_to_id:
+            raise ValueError("a user cannot subscribe to themselves")
+        return self
+
+# ---------- Import report ----------
+class RowError(BaseModel):
+    line: int
+    error: str
+
+class ImportReport(BaseModel):
+    id: int
+    entity: BulkEntity
+    started_at: datetime
+    finished_at: Optional[datetime] = None
+    lines: int = 0
+    inserted: int = 0
+    failed: int = 0
+    batches: int = 0
+    errors: List[RowError] = []  # first BULK_IMPORT_MAX_ERRORS only; `failed` counts all
@@ -1,6 +1,6 @@
 from pydantic import BaseModel
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 
 # ---------- Base ----------
 class CommentBase(BaseModel):
@@ -9,6 +9,7 @@ class CommentBase(BaseModel):
 # ---------- Create ----------
 class CommentCreate(CommentBase):
     video_id: int
+    parent_id: Optional[int] = None  # reply to this comment
 
 # ---------- Read ----------
 class CommentRead(CommentBase):
@@ -16,6 +17,13 @@ class CommentRead(CommentBase):
     created_at: datetime
     user_id: int
     video_id: int
+    parent_id: Optional[int] = None
+    depth: int = 0
+    reply_count: int = 0
 
     class Config:
         from_attributes = True
+
+# ---------- Thread ----------
+class CommentThread(CommentRead):
+    replies: List[CommentRead] = []  # the first COMMENT_THREAD_REPLIES, oldest first
@@ -0,0 +1,25 @@
+from pydantic import BaseModel, Field
+from typing import List
+from enum import Enum
+from app.core.config import settings
+
+class BatchAction(str, Enum):
+    add = "add"
+    remove = "remove"
+
+# ---------- Batch request ----------
+class EngagementBatch(BaseModel):
+    ids: List[int] = Field(..., min_length=1, max_length=settings.MAX_BATCH_IDS)
+    action: BatchAction = BatchAction.add
+
+# ---------- Batch result ----------
+class EngagementBatchResult(BaseModel):
+    changed: List[int] = []    # rows inserted or deleted by this request
+    unchanged: List[int] = []  # already in the requested state
+    missing: List[int] = []    # ids that don't exist (add only)
+
+# ---------- Single result ----------
+class EngagementState(BaseModel):
+    id: int
+    active: bool
+    changed: bool
@@ -0,0 +1,21 @@
+from pydantic import BaseModel
+from typing import Generic, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+# ---------- Cursor page ----------
+class Page(BaseModel, Generic[T]):
+    items: List[T]
+    next_cursor: Optional[str] = None
+
+# ---------- Multi-get ----------
+# Found rows in request order; ids that don't exist are listed in `missing`
+class Batch(BaseModel, Generic[T]):
+    items: List[T]
+    missing: List[int] = []
+
+# ---------- Bounded nested collection ----------
+# First page of a relation embedded in a detail response; `next_cursor`
+# continues on the relation's own list endpoint.
+class Collection(Page[T], Generic[T]):
+    total: int = 0
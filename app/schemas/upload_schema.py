@@ -0,0 +1,48 @@
+import re
+from pydantic import BaseModel, Field, field_validator
+from datetime import datetime
+from typing import Optional
+from app.core.config import settings
+
+# ---------- Content types ----------
+# Media is served from the API's own origin, so only types a browser plays
+# or shows without running anything are accepted: audio, video and raster
+# images (SVG can carry script). Parameters aren't accepted either.
+_MEDIA_TYPE = re.compile(r"[a-z0-9][a-z0-9!#$&^_.+-]*/[a-z0-9][a-z0-9!#$&^_.+-]*")
+IMAGE_TYPES = frozenset({"image/avif", "image/gif", "image/jpeg", "image/png", "image/webp"})
+
+def is_allowed_content_type(content_type: str) -> bool:
+    if not _MEDIA_TYPE.fullmatch(content_type):
+        return False
+    return content_type.startswith(("video/", "audio/")) or content_type in IMAGE_TYPES
+
+# ---------- Create ----------
+class UploadCreate(BaseModel):
+    filename: str = Field(..., min_length=1, max_length=255)
+    size: int = Field(..., gt=0, le=settings.UPLOAD_MAX_BYTES)
+    content_type: str = Field(..., max_length=127)  # e.g. video/mp4
+    sha256: Optional[str] = Field(None, pattern="^[0-9a-fA-F]{64}$")  # verified once the last chunk arrives
+
+    @field_validator("content_type")
+    @classmethod
+    def _content_type(cls, value):
+        value = value.strip().lower()
+        if not is_allowed_content_type(value):
+            raise ValueError("content_type must be an audio/*, video/* or " + ", ".join(sorted(IMAGE_TYPES)) + " type")
+        return value
+
+# ---------- Read ----------
+# `offset` is where the next chunk starts; resume from there after a dropped connection
+class UploadRead(BaseModel):
+    id: str
+    filename: str
+    content_type: str
+    size: int
+    offset: int
+    created_at: datetime
+    completed_at: Optional[datetime] = None
+    sha256: Optional[str] = None
+    media_url: Optional[str] = None  # once complete
+
+    class Config:
+        from_attributes = True
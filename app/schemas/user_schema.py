@@ -1,6 +1,7 @@
 from pydantic import BaseModel, EmailStr
 from typing import Optional, List
 from enum import Enum
+from app.schemas.page_schema import Collection
 
 class RoleEnum(str, Enum):
     admin = "admin"
@@ -21,17 +22,22 @@ class UserCreate(UserBase):
 class UserRead(UserBase):
     id: int
     role: RoleEnum
+    subscriber_count: int = 0
 
     class Config:
         from_attributes = True
 
+# ---------- Update ----------
+class RoleUpdate(BaseModel):
+    role: RoleEnum
+
 # ---------- With Relations ----------
 class UserDetail(UserRead):
-    uploaded_videos: Optional[List["VideoRead"]] = []
-    liked_videos: Optional[List["VideoRead"]] = []
-    watch_later_videos: Optional[List["VideoRead"]] = []
-    subscribers: Optional[List["UserRead"]] = []
-    subscriptions: Optional[List["UserRead"]] = []
+    uploaded_videos: "Collection[VideoRead]"
+    liked_videos: "Collection[VideoRead]"
+    watch_later_videos: "Collection[VideoRead]"
+    subscribers: Collection[UserRead]
+    subscriptions: Collection[UserRead]
 
 # ---------- Resolve Forward References ----------
 from app.schemas.video_schema import VideoRead  # imported here to avoid circular import
@@ -1,6 +1,40 @@
-from pydantic import BaseModel, HttpUrl
+from pydantic import BaseModel, HttpUrl, field_validator, model_validator
 from typing import Optional, List
 from datetime import datetime
+from enum import Enum
+from app.core.config import settings
+from app.schemas.page_schema import Collection, Page
+
+# ---------- Tags and category ----------
+# Compared case-insensitively with runs of whitespace collapsed, so
+# "Live  Music" and "live music" are one tag
+def normalize_label(value: str) -> str:
+    label = " ".join(value.split()).lower()
+    if not label or len(label) > settings.TAG_MAX_LENGTH:
+        raise ValueError(f"Tags and categories are 1 to {settings.TAG_MAX_LENGTH} characters")
+    if "," in label:
+        raise ValueError("Tags and categories can't contain commas")
+    return label
+
+def normalize_tags(values: List[str]) -> List[str]:
+    tags = list(dict.fromkeys(normalize_label(value) for value in values))
+    if len(tags) > settings.TAGS_PER_VIDEO_MAX:
+        raise ValueError(f"At most {settings.TAGS_PER_VIDEO_MAX} tags")
+    return tags
+
+class VideoLabels(BaseModel):
+    tags: List[str] = []
+    category: Optional[str] = None
+
+    @field_validator("tags")
+    @classmethod
+    def _tags(cls, value):
+        return normalize_tags(value)
+
+    @field_validator("category")
+    @classmethod
+    def _category(cls, value):
+        return normalize_label(value) if value is not None else None
 
 # ---------- Base ----------
 class VideoBase(BaseModel):
@@ -10,24 +44,82 @@ class VideoBase(BaseModel):
     thumbnail_url: Optional[HttpUrl] = None
 
 # ---------- Create ----------
-class VideoCreate(VideoBase):
-    pass
+# Either an external video_url or the id of a completed upload, served from /media
+class VideoCreate(VideoLabels, VideoBase):
+    video_url: Optional[HttpUrl] = None
+    upload_id: Optional[str] = None
+
+    @model_validator(mode="after")
+    def _one_source(self):
+        if (self.video_url is None) == (self.upload_id is None):
+            raise ValueError("Give exactly one of video_url and upload_id")
+        return self
 
 # ---------- Read ----------
 class VideoRead(VideoBase):
     id: int
     upload_time: datetime
     uploader_id: int
+    category: Optional[str] = None
+    like_count: int = 0
+    comment_count: int = 0
+    watch_later_count: int = 0
+    last_comment_at: Optional[datetime] = None
+    views: int = 0
 
     class Config:
         from_attributes = True
 
+# ---------- Search ----------
+# Snippets are HTML: the text escaped, matched terms in <mark>...</mark>;
+# lower rank is a better match
+class VideoSearchHit(VideoRead):
+    rank: float
+    title_snippet: str
+    description_snippet: Optional[str] = None
+
+# ---------- Filtered listing ----------
+class FacetCount(BaseModel):
+    value: str
+    count: int
+
+# Counts for the page's filter: `categories` ignores the category filter (how
+# many matches each category would give), `tags` lists the most frequent
+# other tags among the matches. `exact` is false when the matches were too
+# many to count and the counts cover only the newest FACET_SCAN_LIMIT.
+class Facets(BaseModel):
+    total: int
+    exact: bool = True
+    categories: List[FacetCount]
+    tags: List[FacetCount]
+
+# Facets come with the first page only; later pages repeat the same filter
+class FacetedPage(Page[VideoRead]):
+    facets: Optional[Facets] = None
+
+# ---------- Trending ----------
+class TrendingPeriod(str, Enum):
+    hour = "hour"
+    day = "day"
+    week = "week"
+
+# score: decayed engagement now, each event's weight halving every period
+class TrendingVideo(VideoRead):
+    rank: int
+    score: float
+
+# Cosine similarity of the two videos' likes and watch-later entries
+class RelatedVideo(VideoRead):
+    rank: int
+    score: float
+
 # ---------- With Relations ----------
 class VideoDetail(VideoRead):
+    tags: List[str] = []
     uploader: Optional["UserRead"]
-    comments: Optional[List["CommentRead"]] = []
-    liked_by: Optional[List["UserRead"]] = []
-    watch_later_by: Optional[List["UserRead"]] = []
+    comments: "Collection[CommentRead]"
+    liked_by: "Collection[UserRead]"
+    watch_later_by: "Collection[UserRead]"
 
 # ---------- Resolve Forward References ----------
 from app.schemas.user_schema import UserRead
@@ -0,0 +1,317 @@
+# app/services/bulk.py
+# NDJSON export and import of whole tables.
+#
+# Export streams rows off a server-side cursor, a chunk at a time, so memory
+# stays flat whatever the table size. Import reads the request body as it
+# arrives, validates each line on its own and inserts in batched executemany
+# transactions; a bad line is recorded in the report and skipped, never
+# aborting the rest of the stream.
+import itertools
+import json
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import AsyncIterator, Callable, Optional
+
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import Table, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.database import AsyncSessionLocal, read_engine
+from app.models.comment import Comment
+from app.models.user import User, likes_table, watch_later_table, subscriptions_table
+from app.models.video import Video
+from app.schemas.bulk_schema import BulkEntity, CommentRow, ImportReport, LikeRow, RowError, SubscriptionRow, VideoRow
+from app.services import facets, feed, related, threads
+from app.services.counters import recompute_counters
+from app.services.engagement import insert_ignoring
+from app.utils.response_cache import response_cache
+
+logger = logging.getLogger(__name__)
+
+users = User.__table__
+videos = Video.__table__
+comments = Comment.__table__
+
+
+# ----- Follow-ups -----
+# Run in the batch's transaction after its rows are inserted; `inserted` is
+# the list of inserted row dicts.
+
+async def _after_videos(db: AsyncSession, inserted: list):
+    await facets.count_in(db, [row.get("category") for row in inserted])
+    await feed.fan_out_many(db, [row["id"] for row in inserted])
+
+
+async def _after_video_rows(db: AsyncSession, inserted: list):
+    await recompute_counters(db, video_ids={row["video_id"] for row in inserted}, user_ids=[])
+
+
+def _after_engagement_rows(signal: str):
+    async def after(db: AsyncSession, inserted: list):
+        by_user: dict[int, list] = {}
+        for row in inserted:
+            by_user.setdefault(row["user_id"], []).append(row["video_id"])
+        for user_id, video_ids in by_user.items():
+            await related.record(db, signal, user_id, video_ids)
+        await _after_video_rows(db, inserted)
+    return after
+
+
+async def _after_comments(db: AsyncSession, inserted: list):
+    await threads.fill_paths(db)
+    await _after_video_rows(db, inserted)
+
+
+async def _after_subscriptions(db: AsyncSession, inserted: list):
+    by_subscriber: dict[int, list] = {}
+    for row in inserted:
+        by_subscriber.setdefault(row["subscriber_id"], []).append(row["subscribed_to_id"])
+    for subscriber_id, creator_ids in by_subscriber.items():
+        await feed.subscribe(db, subscriber_id, creator_ids)
+    await recompute_counters(db, video_ids=[], user_ids={row["subscribed_to_id"] for row in inserted})
+
+
+@dataclass(frozen=True)
+class Entity:
+    table: Table
+    row_model: type[BaseModel]
+    references: dict  # column name -> table its ids must exist in
+    after_insert: Callable
+
+    @property
+    def key(self):
+        return list(self.table.primary_key.columns)
+
+
+ENTITIES = {
+    BulkEntity.videos: Entity(videos, VideoRow, {"uploader_id": users}, _after_videos),
+    BulkEntity.comments: Entity(
+        comments, CommentRow, {"user_id": users, "video_id": videos, "parent_id": comments}, _after_comments
+    ),
+    BulkEntity.likes: Entity(likes_table, LikeRow, {"user_id": users, "video_id": videos}, _after_engagement_rows("like")),
+    BulkEntity.watch_later: Entity(
+        watch_later_table, LikeRow, {"user_id": users, "video_id": videos}, _after_engagement_rows("watch_later")
+    ),
+    BulkEntity.subscriptions: Entity(
+        subscriptions_table, SubscriptionRow, {"subscriber_id": users, "subscribed_to_id": users}, _after_subscriptions
+    ),
+}
+
+
+# ----- Export -----
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+async def export_rows(entity: Entity) -> AsyncIterator[bytes]:
+    stmt = (
+        select(entity.table)
+        .order_by(*entity.key)
+        .execution_options(yield_per=settings.BULK_EXPORT_CHUNK_ROWS)
+    )
+    # The connection lives in the generator: it must outlast the request
+    # handler and is released when the client finishes or disconnects
+    async with read_engine.connect() as conn:
+        result = await conn.stream(stmt)
+        async for rows in result.partitions():
+            yield b"".join(
+                json.dumps(dict(row._mapping), default=_json_default, separators=(",", ":")).encode() + b"\n"
+                for row in rows
+            )
+
+
+# ----- Import -----
+
+@dataclass
+class ImportJob:
+    id: int
+    entity: BulkEntity
+    started_at: datetime = field(default_factory=datetime.utcnow)
+    finished_at: Optional[datetime] = None
+    lines: int = 0
+    inserted: int = 0
+    failed: int = 0
+    batches: int = 0
+    errors: list = field(default_factory=list)
+
+    def error(self, line: int, message: str):
+        self.failed += 1
+        if len(self.errors) < settings.BULK_IMPORT_MAX_ERRORS:
+            self.errors.append(RowError(line=line, error=message))
+
+    def report(self) -> ImportReport:
+        return ImportReport(**{name: getattr(self, name) for name in ImportReport.model_fields})
+
+
+class ImportRegistry:
+    """Running imports plus the last few finished ones, for progress polling."""
+
+    def __init__(self, history: int):
+        self.history = history
+        self._ids = itertools.count(1)
+        self._jobs: OrderedDict[int, ImportJob] = OrderedDict()
+
+    def start(self, entity: BulkEntity) -> ImportJob:
+        job = ImportJob(id=next(self._ids), entity=entity)
+        self._jobs[job.id] = job
+        finished = [j for j in self._jobs.values() if j.finished_at is not None]
+        for old in finished[: max(len(finished) - self.history, 0)]:
+            del self._jobs[old.id]
+        return job
+
+    def reports(self) -> list[ImportReport]:
+        return [job.report() for job in reversed(self._jobs.values())]
+
+
+import_registry = ImportRegistry(history=settings.BULK_IMPORT_HISTORY)
+
+
+async def _lines(chunks: AsyncIterator[bytes]):
+    """Yield (line_number, line) from a byte stream without buffering it whole.
+
+    Lines over BULK_IMPORT_MAX_LINE_BYTES are yielded as None.
+    """
+    buffer = b""
+    line_no = 0
+    oversized = False
+    async for chunk in chunks:
+        buffer += chunk
+        *complete, buffer = buffer.split(b"\n")
+        for line in complete:
+            line_no += 1
+            yield line_no, None if oversized or len(line) > settings.BULK_IMPORT_MAX_LINE_BYTES else line
+            oversized = False
+        if len(buffer) > settings.BULK_IMPORT_MAX_LINE_BYTES:
+            buffer, oversized = b"", True
+    if buffer or oversized:
+        yield line_no + 1, None if oversized else buffer
+
+
+def _validation_message(exc: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(p) for p in err['loc']) or 'line'}: {err['msg']}" for err in exc.errors()
+    )
+
+
+async def _missing_references(db: AsyncSession, entity: Entity, batch: list) -> dict:
+    """Map line number -> error for rows pointing at ids that don't exist."""
+    missing = {}
+    for column, target in entity.references.items():
+        wanted = {row[column] for _, row in batch if row.get(column) is not None}
+        result = await db.execute(select(target.c.id).where(target.c.id.in_(wanted)))
+        absent = wanted.difference(result.scalars().all())
+        if target is entity.table:
+            # A reply may point at a comment earlier in the same batch
+            absent.difference_update(row["id"] for _, row in batch if "id" in row)
+        for line, row in batch:
+            if row.get(column) in absent:
+                missing.setdefault(line, f"{column} {row[column]} does not exist")
+    return missing
+
+
+async def _insert_batch(entity: Entity, batch: list, job: ImportJob):
+    job.batches += 1
+    reported = set()
+
+    def reject(line: int, message: str):
+        reported.add(line)
+        job.error(line, message)
+
+    async with AsyncSessionLocal() as db:
+        try:
+            missing = await _missing_references(db, entity, batch)
+            for line, message in missing.items():
+                reject(line, message)
+            rows = [(line, row) for line, row in batch if line not in missing]
+
+            # executemany needs one parameter shape per statement, so rows
+            # with and without an explicit id go separately
+            inserted = []
+            key = [c.key for c in entity.key]
+            seen = {}
+            groups = [list(g) for _, g in itertools.groupby(sorted(rows, key=lambda r: sorted(r[1])), key=lambda r: sorted(r[1]))]
+            # Rows referencing their own table (replies) go after the rows
+            # they may point at; within a group lines keep file order
+            groups.sort(key=lambda g: any(
+                column in g[0][1] for column, target in entity.references.items() if target is entity.table
+            ))
+            for group in groups:
+                shape = sorted(group[0][1])
+                has_key = all(k in shape for k in key)
+                if has_key:
+                    unique = []
+                    for line, row in group:
+                        first = seen.setdefault(tuple(row[k] for k in key), line)
+                        if first != line:
+                            reject(line, f"duplicate of line {first}")
+                        else:
+                            unique.append((line, row))
+                    group = unique
+
+                stmt = (
+                    insert_ignoring(db, entity.table)
+                    .on_conflict_do_nothing()
+                    .returning(*entity.key, sort_by_parameter_order=not has_key)
+                )
+                result = await db.execute(stmt, [row for _, row in group])
+                if has_key:
+                    returned = {tuple(r) for r in result.all()}
+                    for line, row in group:
+                        if tuple(row[k] for k in key) in returned:
+                            inserted.append(row)
+                        else:
+                            reject(line, "row already exists")
+                else:
+                    # Generated ids come back in parameter order
+                    inserted.extend({**row, **r._mapping} for (_, row), r in zip(group, result.all()))
+
+            if inserted:
+                await entity.after_insert(db, inserted)
+            await db.commit()
+            job.inserted += len(inserted)
+        except SQLAlchemyError as exc:
+            await db.rollback()
+            logger.exception("Bulk %s batch %d failed", job.entity.value, job.batches)
+            # Lines already reported keep their own error
+            for line, _ in batch:
+                if line not in reported:
+                    job.error(line, f"batch failed: {exc.__class__.__name__}")
+
+
+async def import_rows(entity_name: BulkEntity, chunks: AsyncIterator[bytes]) -> ImportJob:
+    entity = ENTITIES[entity_name]
+    job = import_registry.start(entity_name)
+    batch = []
+    try:
+        async for line_no, line in _lines(chunks):
+            job.lines = line_no
+            if line is None:
+                job.error(line_no, f"line exceeds {settings.BULK_IMPORT_MAX_LINE_BYTES} bytes")
+                continue
+            if not line.strip():
+                continue
+            try:
+                row = entity.row_model.model_validate_json(line)
+            except ValidationError as exc:
+                job.error(line_no, _validation_message(exc))
+                continue
+            batch.append((line_no, row.model_dump(exclude_none=True)))
+            if len(batch) >= settings.BULK_IMPORT_BATCH_ROWS:
+                await _insert_batch(entity, batch, job)
+                batch = []
+                logger.info("Bulk %s import %d: %d lines, %d inserted, %d failed",
+                            entity_name.value, job.id, job.lines, job.inserted, job.failed)
+        if batch:
+            await _insert_batch(entity, batch, job)
+    finally:
+        job.finished_at = datetime.utcnow()
+        # Imported rows can touch any cached page
+        response_cache.clear()
+    return job
@@ -0,0 +1,105 @@
+# app/services/collections.py
+# Keyset-paged statements for every relation exposed by the detail endpoints.
+# The detail endpoints fetch the first page of each; the list endpoints
+# continue from the cursor, so both share one ordering per relation.
+# Statements select the response schema's columns, not entities (see
+# app.utils.projection).
+from sqlalchemy.future import select
+
+from app.models.comment import Comment
+from app.models.user import User, likes_table, watch_later_table, subscriptions_table
+from app.models.video import Video
+from app.schemas.comment_schema import CommentRead
+from app.schemas.user_schema import UserRead
+from app.schemas.video_schema import VideoRead
+from app.utils.pagination import PageParams, keyset, keyset_by_id
+from app.utils.projection import columns
+
+VIDEO_COLUMNS = columns(Video, VideoRead)
+COMMENT_COLUMNS = columns(Comment, CommentRead)
+USER_COLUMNS = columns(User, UserRead)
+
+
+def comment_key(c):
+    return (c.created_at, c.id)
+
+
+def video_key(v):
+    return (v.upload_time, v.id)
+
+
+def id_key(row):
+    return (None, row.id)
+
+
+# ----- Video relations -----
+
+def video_comments(video_id: int, page: PageParams):
+    stmt = select(*COMMENT_COLUMNS).where(Comment.video_id == video_id)
+    return keyset(stmt, Comment.created_at, Comment.id, page)
+
+
+def video_liked_by(video_id: int, page: PageParams):
+    stmt = (
+        select(*USER_COLUMNS)
+        .join(likes_table, likes_table.c.user_id == User.id)
+        .where(likes_table.c.video_id == video_id)
+    )
+    return keyset_by_id(stmt, likes_table.c.user_id, page)
+
+
+def video_watch_later_by(video_id: int, page: PageParams):
+    stmt = (
+        select(*USER_COLUMNS)
+        .join(watch_later_table, watch_later_table.c.user_id == User.id)
+        .where(watch_later_table.c.video_id == video_id)
+    )
+    return keyset_by_id(stmt, watch_later_table.c.user_id, page)
+
+
+# ----- User relations -----
+
+def user_comments(user_id: int, page: PageParams):
+    stmt = select(*COMMENT_COLUMNS).where(Comment.user_id == user_id)
+    return keyset(stmt, Comment.created_at, Comment.id, page)
+
+
+def user_videos(user_id: int, page: PageParams):
+    stmt = select(*VIDEO_COLUMNS).where(Video.uploader_id == user_id)
+    return keyset(stmt, Video.upload_time, Video.id, page)
+
+
+def user_liked_videos(user_id: int, page: PageParams):
+    stmt = (
+        select(*VIDEO_COLUMNS)
+        .join(likes_table, likes_table.c.video_id == Video.id)
+        .where(likes_table.c.user_id == user_id)
+    )
+    return keyset_by_id(stmt, likes_table.c.video_id, page)
+
+
+def user_watch_later_videos(user_id: int, page: PageParams):
+    stmt = (
+        select(*VIDEO_COLUMNS)
+        .join(watch_later_table, watch_later_table.c.video_id == Video.id)
+        .where(watch_later_table.c.user_id == user_id)
+    )
+    return keyset_by_id(stmt, watch_later_table.c.video_id, page)
+
+
+def user_subscribers(user_id: int, page: PageParams):
+    stmt = (
+        select(*USER_COLUMNS)
+        .join(subscriptions_table, subscriptions_table.c.subscriber_id == User.id)
+        .where(subscriptions_table.c.subscribed_to_id == user_id)
+    )
+    return keyset_by_id(stmt, subscriptions_table.c.subscriber_id, page)
+
+
+def user_subscriptions(user_id: int, page: PageParams):
+    stmt = (
+        select(*USER_COLUMNS)
+        .join(subscriptions_table, subscriptions_table.c.subscribed_to_id == User.id)
+        .where(subscriptions_table.c.subscriber_id == user_id)
+    )
+    return keyset_by_id(stmt, subscriptions_table.c.subscribed_to_id, page)
@@ -0,0 +1,191 @@
+# app/services/comment_stream.py
+# Live comment updates for WebSocket subscribers.
+#
+# The comment routes publish each committed change to the hub, which
+# encodes the message once and hands the same string to every subscriber
+# of that video. Nothing is read from the database per subscriber: ten
+# thousand watchers of one video cost one write per comment plus one
+# encode. Each subscriber gets a bounded queue; one that falls more than
+# COMMENT_STREAM_QUEUE_SIZE messages behind is disconnected instead of
+# buffered.
+#
+# Every message carries a sequence number, and the hub keeps each video's
+# last COMMENT_STREAM_REPLAY_SIZE encoded messages (for the
+# COMMENT_STREAM_REPLAY_VIDEOS most recently active videos). A client that
+# reconnects with the last number it saw gets what it missed, edits and
+# deletes included, from memory. When the gap isn't held any more, or the
+# number isn't this process's, it gets a resync message instead and
+# reloads over HTTP.
+#
+# The hub is in-process: with several workers, a subscriber sees the
+# changes made through its own worker, and a restart forgets the replay
+# buffers.
+import asyncio
+import time
+from collections import OrderedDict, deque
+from typing import Optional
+
+import orjson
+
+from app.core.config import settings
+from app.models.comment import Comment
+from app.schemas.comment_schema import CommentRead
+
+CREATED = "comment.created"
+UPDATED = "comment.updated"
+DELETED = "comment.deleted"
+RESYNC = "resync"
+
+
+class Subscription:
+    def __init__(self, video_id: int, max_queue: int):
+        self.video_id = video_id
+        # Items are encoded messages; None means "disconnect"
+        self.queue: asyncio.Queue = asyncio.Queue(max_queue + 1)  # + room for the None
+        self.max_queue = max_queue
+        self.dropped = False
+
+
+class _Recent:
+    """A video's last messages, and the newest sequence number no longer held."""
+
+    __slots__ = ("messages", "floor")
+
+    def __init__(self, size: int, floor: int):
+        self.messages: deque = deque(maxlen=size)  # (seq, encoded message)
+        self.floor = floor
+
+    def add(self, seq: int, data: str):
+        if len(self.messages) == self.messages.maxlen:
+            self.floor = self.messages[0][0]
+        self.messages.append((seq, data))
+
+
+class CommentHub:
+    """Per-video fan-out of encoded comment events to bounded queues."""
+
+    def __init__(self, max_queue: int, replay_size: int, replay_videos: int):
+        self.max_queue = max_queue
+        self.replay_size = replay_size
+        self.replay_videos = replay_videos
+        self._topics: dict[int, set[Subscription]] = {}
+        self._recent: OrderedDict[int, _Recent] = OrderedDict()
+        # Start from the clock in microseconds (well inside a JavaScript
+        # number), so a number from before a restart is below this
+        # process's range rather than inside it
+        self._seq = int(time.time() * 1_000_000)
+        # Messages up to here may have been forgotten: the start, then the
+        # newest message of the last video evicted from _recent
+        self._forgotten = self._seq
+
+        # Stats
+        self.published = 0
+        self.encoded = 0
+        self.delivered = 0
+        self.dropped_subscribers = 0
+        self.replayed = 0
+        self.resyncs = 0
+
+    def subscribe(self, video_id: int, after: Optional[int] = None) -> tuple[Subscription, list]:
+        """A subscription to the video, and the messages after sequence number
+        `after` to send before its queue: a resync message when they aren't
+        all held any more. Nothing is published in between, so none is lost
+        or sent twice."""
+        subscription = Subscription(video_id, self.max_queue)
+        self._topics.setdefault(video_id, set()).add(subscription)
+        if after is None:
+            return subscription, []
+        missed = self._missed(video_id, after)
+        if missed is None:
+            self.resyncs += 1
+            return subscription, [orjson.dumps({"type": RESYNC, "seq": self._seq}).decode()]
+        self.replayed += len(missed)
+        return subscription, missed
+
+    def _missed(self, video_id: int, after: int) -> Optional[list]:
+        if after > self._seq:
+            return None  # not one of ours
+        recent = self._recent.get(video_id)
+        floor = recent.floor if recent is not None else self._forgotten
+        if after < floor:
+            return None
+        if recent is None:
+            return []
+        return [data for seq, data in recent.messages if seq > after]
+
+    def unsubscribe(self, subscription: Subscription):
+        subscribers = self._topics.get(subscription.video_id)
+        if subscribers is not None:
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._topics[subscription.video_id]
+
+    def publish(self, video_id: int, event: str, message: dict):
+        self.published += 1
+        self._seq += 1
+        # Once per broadcast, whatever the number of subscribers; kept for
+        # replay even when nobody is watching right now
+        data = orjson.dumps({"type": event, "seq": self._seq, **message}).decode()
+        self.encoded += 1
+        self._remember(video_id, self._seq, data)
+        for subscription in list(self._topics.get(video_id, ())):
+            if subscription.queue.qsize() >= subscription.max_queue:
+                self._drop(subscription)
+                continue
+            subscription.queue.put_nowait(data)
+            self.delivered += 1
+
+    def _remember(self, video_id: int, seq: int, data: str):
+        recent = self._recent.get(video_id)
+        if recent is None:
+            recent = self._recent[video_id] = _Recent(self.replay_size, self._forgotten)
+        else:
+            self._recent.move_to_end(video_id)
+        recent.add(seq, data)
+        while len(self._recent) > self.replay_videos:
+            _, evicted = self._recent.popitem(last=False)
+            self._forgotten = max(self._forgotten, evicted.messages[-1][0])
+
+    def _drop(self, subscription: Subscription):
+        # Free what it was holding; the reserved slot takes the sentinel
+        self.unsubscribe(subscription)
+        subscription.dropped = True
+        self.dropped_subscribers += 1
+        while not subscription.queue.empty():
+            subscription.queue.get_nowait()
+        subscription.queue.put_nowait(None)
+
+    def stats(self) -> dict:
+        return {
+            "videos": len(self._topics),
+            "subscribers": sum(len(subscribers) for subscribers in self._topics.values()),
+            "published": self.published,
+            "encoded": self.encoded,
+            "delivered": self.delivered,
+            "dropped_subscribers": self.dropped_subscribers,
+            "max_queue": self.max_queue,
+            "replay_videos": len(self._recent),
+            "replayed": self.replayed,
+            "resyncs": self.resyncs,
+        }
+
+
+comment_hub = CommentHub(
+    max_queue=settings.COMMENT_STREAM_QUEUE_SIZE,
+    replay_size=settings.COMMENT_STREAM_REPLAY_SIZE,
+    replay_videos=settings.COMMENT_STREAM_REPLAY_VIDEOS,
+)
+
+
+def comment_created(comment: Comment):
+    comment_hub.publish(comment.video_id, CREATED, {"comment": CommentRead.model_validate(comment).model_dump()})
+
+
+def comment_updated(comment: Comment):
+    comment_hub.publish(comment.video_id, UPDATED, {"comment": CommentRead.model_validate(comment).model_dump()})
+
+
+def comment_deleted(comment: Comment, deleted: int):
+    # `deleted` counts the replies that went with it
+    comment_hub.publish(comment.video_id, DELETED, {"id": comment.id, "deleted": deleted})
+
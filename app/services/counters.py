@@ -0,0 +1,97 @@
+# app/services/counters.py
+import asyncio
+from typing import Iterable, Optional
+
+from sqlalchemy import delete, func, literal, select, union_all, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.comment import Comment
+from app.models.tag import facet_counts_table, video_tags_table
+from app.models.user import User, likes_table, watch_later_table, subscriptions_table
+from app.models.video import Video
+
+
+def latest_comment_time(video_id):
+    return (
+        select(func.max(Comment.created_at))
+        .where(Comment.video_id == video_id)
+        .scalar_subquery()
+    )
+
+
+# ----- Repair job -----
+
+async def recompute_counters(
+    db: AsyncSession,
+    video_ids: Optional[Iterable[int]] = None,
+    user_ids: Optional[Iterable[int]] = None,
+):
+    """Recompute counters from the association tables.
+
+    Without ids every row is repaired; with ids only those rows are.
+    The caller commits.
+    """
+    video_stmt = update(Video).values(
+        like_count=select(func.count()).select_from(likes_table)
+        .where(likes_table.c.video_id == Video.id).scalar_subquery(),
+        watch_later_count=select(func.count()).select_from(watch_later_table)
+        .where(watch_later_table.c.video_id == Video.id).scalar_subquery(),
+        comment_count=select(func.count(Comment.id))
+        .where(Comment.video_id == Video.id).scalar_subquery(),
+        last_comment_at=latest_comment_time(Video.id),
+    )
+    if video_ids is not None:
+        video_stmt = video_stmt.where(Video.id.in_(list(video_ids)))
+
+    replies = Comment.__table__.alias("replies")
+    reply_stmt = update(Comment).values(
+        reply_count=select(func.count()).select_from(replies)
+        .where(replies.c.parent_id == Comment.id).scalar_subquery(),
+    )
+    if video_ids is not None:
+        reply_stmt = reply_stmt.where(Comment.video_id.in_(list(video_ids)))
+
+    user_stmt = update(User).values(
+        subscriber_count=select(func.count()).select_from(subscriptions_table)
+        .where(subscriptions_table.c.subscribed_to_id == User.id).scalar_subquery(),
+    )
+    if user_ids is not None:
+        user_stmt = user_stmt.where(User.id.in_(list(user_ids)))
+
+    await db.execute(video_stmt, execution_options={"synchronize_session": False})
+    await db.execute(reply_stmt, execution_options={"synchronize_session": False})
+    await db.execute(user_stmt, execution_options={"synchronize_session": False})
+
+
+async def recompute_facet_counts(db: AsyncSession):
+    """Rebuild facet_counts from the videos and their tags (see app/services/facets.py)."""
+    tagged = (
+        select(video_tags_table.c.tag_id, Video.category)
+        .join(Video, Video.id == video_tags_table.c.video_id)
+        .subquery()
+    )
+    rows = union_all(
+        select(literal(0), literal(""), func.count()).select_from(Video),
+        select(literal(0), Video.category, func.count()).where(Video.category.isnot(None)).group_by(Video.category),
+        select(tagged.c.tag_id, literal(""), func.count()).group_by(tagged.c.tag_id),
+        select(tagged.c.tag_id, tagged.c.category, func.count())
+        .where(tagged.c.category.isnot(None))
+        .group_by(tagged.c.tag_id, tagged.c.category),
+    )
+    await db.execute(delete(facet_counts_table))
+    await db.execute(facet_counts_table.insert().from_select(["tag_id", "category", "count"], rows))
+    await db.commit()
+
+
+async def _main():
+    from app.database import AsyncSessionLocal, engine
+
+    async with AsyncSessionLocal() as db:
+        await recompute_counters(db)
+        await recompute_facet_counts(db)
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    # python -m app.services.counters
+    asyncio.run(_main())
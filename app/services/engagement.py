@@ -0,0 +1,154 @@
+# app/services/engagement.py
+# Likes, watch-later entries and subscriptions are rows in association
+# tables. Every operation here is a constant number of statements against
+# the (source, target) primary key -- the user's collections are never
+# loaded -- and counters move only when a row was really inserted or deleted.
+from dataclasses import dataclass
+from typing import Iterable
+
+from sqlalchemy import Column, Table, delete, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.models.user import User, likes_table, watch_later_table, subscriptions_table
+from app.models.video import Video
+
+
+class TargetNotFound(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class Relation:
+    table: Table
+    source: Column
+    target: Column
+    target_model: type
+    counter: str
+
+
+LIKES = Relation(likes_table, likes_table.c.user_id, likes_table.c.video_id, Video, "like_count")
+WATCH_LATER = Relation(watch_later_table, watch_later_table.c.user_id, watch_later_table.c.video_id, Video, "watch_later_count")
+SUBSCRIPTIONS = Relation(
+    subscriptions_table,
+    subscriptions_table.c.subscriber_id,
+    subscriptions_table.c.subscribed_to_id,
+    User,
+    "subscriber_count",
+)
+
+
+def insert_ignoring(db: AsyncSession, table: Table):
+    # ON CONFLICT DO NOTHING is dialect-specific; callers add it
+    if db.get_bind().dialect.name == "postgresql":
+        return postgresql.insert(table)
+    return sqlite.insert(table)
+
+
+async def _bump(db: AsyncSession, rel: Relation, target_ids, delta: int):
+    model = rel.target_model
+    counter = getattr(model, rel.counter)
+    ids = list(target_ids)
+    result = await db.execute(
+        update(model).where(model.id.in_(ids)).values({rel.counter: counter + delta}),
+        execution_options={"synchronize_session": False},
+    )
+    return result.rowcount
+
+
+# ----- Single row -----
+
+async def add(db: AsyncSession, rel: Relation, source_id: int, target_id: int) -> bool:
+    """Idempotent insert. Returns True if the row is new."""
+    stmt = (
+        insert_ignoring(db, rel.table)
+        .values({rel.source.key: source_id, rel.target.key: target_id})
+        .on_conflict_do_nothing()
+        .returning(rel.target)
+    )
+    try:
+        result = await db.execute(stmt)
+    except IntegrityError:
+        # Foreign key: the target doesn't exist
+        raise TargetNotFound()
+    if result.first() is None:
+        return False
+    # The counter update doubles as the target existence check
+    if not await _bump(db, rel, [target_id], 1):
+        raise TargetNotFound()
+    return True
+
+
+async def remove(db: AsyncSession, rel: Relation, source_id: int, target_id: int) -> bool:
+    """Idempotent delete. Returns True if a row was removed."""
+    stmt = (
+        delete(rel.table)
+        .where(rel.source == source_id, rel.target == target_id)
+        .returning(rel.target)
+    )
+    result = await db.execute(stmt)
+    if result.first() is None:
+        return False
+    await _bump(db, rel, [target_id], -1)
+    return True
+
+
+async def toggle(db: AsyncSession, rel: Relation, source_id: int, target_id: int) -> bool:
+    """Flip the row. Returns True if it now exists.
+
+    The DELETE ... RETURNING is the primary-key probe: if it removed
+    nothing, the row wasn't there and is inserted instead.
+    """
+    if await remove(db, rel, source_id, target_id):
+        return False
+    await add(db, rel, source_id, target_id)
+    return True
+
+
+# ----- Batches -----
+
+async def add_many(db: AsyncSession, rel: Relation, source_id: int, target_ids: Iterable[int]) -> dict:
+    ids = sorted(set(target_ids))
+    model = rel.target_model
+    result = await db.execute(select(model.id).where(model.id.in_(ids)))
+    valid = set(result.scalars().all())
+
+    added = []
+    if valid:
+        stmt = (
+            insert_ignoring(db, rel.table)
+            .values([{rel.source.key: source_id, rel.target.key: t} for t in sorted(valid)])
+            .on_conflict_do_nothing()
+            .returning(rel.target)
+        )
+        result = await db.execute(stmt)
+        added = sorted(result.scalars().all())
+        if added:
+            await _bump(db, rel, added, 1)
+
+    return {
+        "changed": added,
+        "unchanged": sorted(valid.difference(added)),
+        "missing": [t for t in ids if t not in valid],
+    }
+
+
+async def remove_many(db: AsyncSession, rel: Relation, source_id: int, target_ids: Iterable[int]) -> dict:
+    ids = sorted(set(target_ids))
+    stmt = (
+        delete(rel.table)
+        .where(rel.source == source_id, rel.target.in_(ids))
+        .returning(rel.target)
+    )
+    result = await db.execute(stmt)
+    removed = sorted(result.scalars().all())
+    if removed:
+        await _bump(db, rel, removed, -1)
+
+    return {
+        "changed": removed,
+        "unchanged": sorted(set(ids).difference(removed)),
+        "missing": [],
+    }
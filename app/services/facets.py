@@ -0,0 +1,283 @@
+# app/services/facets.py
+# Tags, categories and faceted filtering of the video listing.
+#
+# Each tag has a posting list: its rows in video_tags, indexed by
+# (tag_id, upload_time, video_id), so the list reads newest first like the
+# global feed. A category's posting list is the videos index on
+# (category, upload_time, id). A filtered page walks the shortest of the
+# lists involved, in cursor order, and probes each other tag by primary key
+# (video_id, tag_id) and the category on the joined video row. The walk
+# stops once a page is full, so a page costs about a page of rows when the
+# filter is common, and at most the shortest list when it is rare.
+#
+# List lengths and facet counts come from facet_counts: videos per
+# (category, tag), kept in step with every tag and category change in the
+# same transaction. They answer the facets of a filter with at most one
+# tag. A filter with more tags can't be answered from per-tag counters, so
+# its matches are counted by walking them, up to FACET_SCAN_LIMIT.
+from collections import Counter
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+from sqlalchemy import and_, delete, exists, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.tag import facet_counts_table as counts, tags_table as tags, video_tags_table as video_tags
+from app.models.video import Video
+from app.services.engagement import insert_ignoring
+
+ANY_CATEGORY = ""
+ANY_TAG = 0
+_CHUNK = 500  # keys per IN list
+
+
+def _chunks(items: list, size: int = _CHUNK):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+# ----- Counters -----
+
+def _keys(category: Optional[str], tag_ids: Iterable[int]) -> set:
+    """The facet_counts rows a video with this category and these tags counts in."""
+    categories = [ANY_CATEGORY] + ([category] if category else [])
+    return {(tag_id, c) for tag_id in (ANY_TAG, *tag_ids) for c in categories}
+
+
+async def _bump(db: AsyncSession, deltas: Counter):
+    rows = [{"tag_id": t, "category": c, "count": n} for (t, c), n in deltas.items() if n]
+    if not rows:
+        return
+    stmt = insert_ignoring(db, counts)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[counts.c.tag_id, counts.c.category],
+        set_={"count": counts.c.count + stmt.excluded["count"]},
+    )
+    await db.execute(stmt, rows)
+
+
+# ----- Writes -----
+
+async def _tag_ids(db: AsyncSession, names: list, create: bool = False) -> dict:
+    """{name: tag id} for the `names` that exist, or all of them with `create`."""
+    if not names:
+        return {}
+    if create:
+        await db.execute(insert_ignoring(db, tags).on_conflict_do_nothing(), [{"name": n} for n in names])
+    result = await db.execute(select(tags.c.name, tags.c.id).where(tags.c.name.in_(names)))
+    return dict(result.all())
+
+
+async def label(db: AsyncSession, video: Video, names: list):
+    """Tag a new video and count it in. `video` is flushed, with its category set."""
+    ids = await _tag_ids(db, names, create=True)
+    if ids:
+        await db.execute(
+            video_tags.insert(),
+            [{"video_id": video.id, "tag_id": tag_id, "upload_time": video.upload_time} for tag_id in ids.values()],
+        )
+    await _bump(db, Counter(dict.fromkeys(_keys(video.category, ids.values()), 1)))
+
+
+async def labels(db: AsyncSession, video_id: int) -> list[str]:
+    result = await db.execute(
+        select(tags.c.name)
+        .join(video_tags, video_tags.c.tag_id == tags.c.id)
+        .where(video_tags.c.video_id == video_id)
+        .order_by(tags.c.name)
+    )
+    return list(result.scalars().all())
+
+
+async def relabel(db: AsyncSession, video_id: int, upload_time, old_category: Optional[str], category: Optional[str], names: list):
+    """Replace a video's tags and category, moving it between counters."""
+    result = await db.execute(select(video_tags.c.tag_id).where(video_tags.c.video_id == video_id))
+    old = set(result.scalars().all())
+    new = set((await _tag_ids(db, names, create=True)).values())
+
+    if old - new:
+        await db.execute(
+            delete(video_tags).where(video_tags.c.video_id == video_id, video_tags.c.tag_id.in_(old - new))
+        )
+    if new - old:
+        await db.execute(
+            video_tags.insert(),
+            [{"video_id": video_id, "tag_id": tag_id, "upload_time": upload_time} for tag_id in new - old],
+        )
+    if category != old_category:
+        await db.execute(update(Video).where(Video.id == video_id).values(category=category))
+
+    before, after = _keys(old_category, old), _keys(category, new)
+    deltas = Counter(dict.fromkeys(after - before, 1))
+    deltas.update(dict.fromkeys(before - after, -1))
+    await _bump(db, deltas)
+
+
+async def count_in(db: AsyncSession, categories: Iterable[Optional[str]]):
+    """Count in new untagged videos (bulk imports), given their categories."""
+    deltas = Counter()
+    for category in categories:
+        deltas.update(_keys(category, ()))
+    await _bump(db, deltas)
+
+
+async def count_out(db: AsyncSession, video_ids: Iterable[int]):
+    """Take videos out of the counters. Call before deleting them: the
+    cascade removes their tags without going through here."""
+    ids = list(video_ids)
+    deltas = Counter()
+    for chunk in _chunks(ids):
+        result = await db.execute(select(Video.id, Video.category).where(Video.id.in_(chunk)))
+        categories = dict(result.all())
+        result = await db.execute(
+            select(video_tags.c.video_id, video_tags.c.tag_id).where(video_tags.c.video_id.in_(chunk))
+        )
+        tag_ids = {}
+        for video_id, tag_id in result.all():
+            tag_ids.setdefault(video_id, []).append(tag_id)
+        for video_id, category in categories.items():
+            deltas.update(dict.fromkeys(_keys(category, tag_ids.get(video_id, ())), -1))
+    await _bump(db, deltas)
+
+
+# ----- Reads -----
+
+@dataclass
+class Filter:
+    """A listing filter resolved against the counters."""
+    category: Optional[str]
+    tag_ids: list  # shortest posting list first
+    sizes: dict  # tag id -> videos carrying it
+    category_size: int  # videos in the category (every video without one)
+    empty: bool = False  # a tag no video has ever had
+
+
+async def resolve(db: AsyncSession, names: list, category: Optional[str]) -> Filter:
+    ids = list((await _tag_ids(db, names)).values())
+    if len(ids) < len(names):
+        return Filter(category, [], {}, 0, empty=True)
+    # Each tag's list overall, and the category's (the catalog without one)
+    wanted = and_(counts.c.tag_id == ANY_TAG, counts.c.category == (category or ANY_CATEGORY))
+    if ids:
+        wanted = or_(wanted, and_(counts.c.tag_id.in_(ids), counts.c.category == ANY_CATEGORY))
+    result = await db.execute(select(counts.c.tag_id, counts.c.category, counts.c.count).where(wanted))
+    found = {(tag_id, c): n for tag_id, c, n in result.all()}
+    sizes = {tag_id: found.get((tag_id, ANY_CATEGORY), 0) for tag_id in ids}
+    category_size = found.get((ANY_TAG, category or ANY_CATEGORY), 0)
+    return Filter(category, sorted(ids, key=sizes.get), sizes, category_size)
+
+
+def _has_tag(video_id, tag_id: int):
+    probe = video_tags.alias()
+    return exists().where(probe.c.video_id == video_id, probe.c.tag_id == tag_id)
+
+
+def matching(flt: Filter, *columns, category: bool = True):
+    """(statement, sort column, id column) selecting `columns` of the
+    videos matching `flt`, without its category with `category=False`.
+
+    Walks the shortest posting list; the sort key is (upload_time, id)
+    whichever list that is, so cursors carry over between pages even if
+    the counters change which list is shortest.
+    """
+    by_category = category and flt.category is not None
+    if flt.tag_ids and not (by_category and flt.category_size < flt.sizes[flt.tag_ids[0]]):
+        driver = video_tags.alias("driver")
+        stmt = (
+            select(*columns)
+            .select_from(driver)
+            .join(Video, Video.id == driver.c.video_id)
+            .where(driver.c.tag_id == flt.tag_ids[0])
+        )
+        sort_col, id_col, probed = driver.c.upload_time, driver.c.video_id, flt.tag_ids[1:]
+    else:
+        stmt = select(*columns)
+        sort_col, id_col, probed = Video.upload_time, Video.id, flt.tag_ids
+    for tag_id in probed:
+        stmt = stmt.where(_has_tag(Video.id, tag_id))
+    if by_category:
+        stmt = stmt.where(Video.category == flt.category)
+    return stmt, sort_col, id_col
+
+
+async def _names(db: AsyncSession, tag_ids: list) -> dict:
+    result = await db.execute(select(tags.c.id, tags.c.name).where(tags.c.id.in_(tag_ids)))
+    return dict(result.all())
+
+
+async def _counted(db: AsyncSession, flt: Filter) -> dict:
+    """Facets from the counters: every filter with at most one tag."""
+    tag_id = flt.tag_ids[0] if flt.tag_ids else ANY_TAG
+    limit = settings.FACET_VALUES_LIMIT
+    result = await db.execute(
+        select(counts.c.category, counts.c.count)
+        .where(counts.c.tag_id == tag_id, counts.c.category != ANY_CATEGORY, counts.c.count > 0)
+        .order_by(counts.c.count.desc(), counts.c.category)
+        .limit(limit)
+    )
+    categories = [{"value": c, "count": n} for c, n in result.all()]
+    result = await db.execute(
+        select(counts.c.count).where(counts.c.tag_id == tag_id, counts.c.category == (flt.category or ANY_CATEGORY))
+    )
+    facets = {"total": result.scalar() or 0, "exact": True, "categories": categories, "tags": []}
+    if not flt.tag_ids:
+        result = await db.execute(
+            select(counts.c.tag_id, counts.c.count)
+            .where(counts.c.category == (flt.category or ANY_CATEGORY), counts.c.tag_id != ANY_TAG, counts.c.count > 0)
+            .order_by(counts.c.count.desc())
+            .limit(limit)
+        )
+        top = result.all()
+        names = await _names(db, [t for t, _ in top])
+        facets["tags"] = [{"value": names[t], "count": n} for t, n in top if t in names]
+    return facets
+
+
+async def _scanned(db: AsyncSession, flt: Filter, counted: Optional[dict] = None) -> dict:
+    """Facets by counting the newest FACET_SCAN_LIMIT matches.
+
+    With `counted` (the counters' facets of a one-tag filter) only the tags
+    are counted; otherwise the matches are walked without the category, so
+    the other categories get their counts too.
+    """
+    limit = settings.FACET_SCAN_LIMIT
+    stmt, sort_col, id_col = matching(flt, Video.id, Video.category, category=counted is not None)
+    result = await db.execute(stmt.order_by(sort_col.desc(), id_col.desc()).limit(limit + 1))
+    rows = result.all()
+    exact = len(rows) <= limit
+    rows = rows[:limit]
+    in_scope = [video_id for video_id, c in rows if flt.category is None or c == flt.category]
+
+    tag_counts = Counter()
+    for chunk in _chunks(in_scope):
+        result = await db.execute(
+            select(video_tags.c.tag_id)
+            .where(video_tags.c.video_id.in_(chunk), video_tags.c.tag_id.notin_(flt.tag_ids))
+        )
+        tag_counts.update(result.scalars().all())
+    top = tag_counts.most_common(settings.FACET_VALUES_LIMIT)
+    names = await _names(db, [t for t, _ in top])
+
+    facets = counted or {
+        "total": len(in_scope),
+        "categories": [
+            {"value": c, "count": n}
+            for c, n in Counter(c for _, c in rows if c).most_common(settings.FACET_VALUES_LIMIT)
+        ],
+    }
+    facets.update(exact=exact, tags=[{"value": names[t], "count": n} for t, n in top if t in names])
+    return facets
+
+
+async def facets(db: AsyncSession, flt: Filter) -> dict:
+    """Counts for the filter's facets (see app.schemas.video_schema.Facets)."""
+    if flt.empty:
+        return {"total": 0, "exact": True, "categories": [], "tags": []}
+    if len(flt.tag_ids) > 1:
+        return await _scanned(db, flt)
+    counted = await _counted(db, flt)
+    if flt.tag_ids:
+        # Tags next to the chosen one: pairs of tags aren't counted
+        return await _scanned(db, flt, counted)
+    return counted
@@ -0,0 +1,333 @@
+# app/services/feed.py
+# Home feed: reverse-chronological uploads from the creators a user
+# subscribes to.
+#
+# Hybrid delivery. An upload from a creator below the fan-out threshold is
+# pushed into `feed_entries` for every subscriber (one INSERT ... SELECT).
+# Uploads from creators above it are pulled at read time: the reader's
+# subscriptions among those creators are looked up by primary key and their
+# newest videos k-way merged with the pushed entries. Either way a feed page
+# costs a fixed number of statements, whatever the subscription count.
+#
+# The mode is decided once per upload and kept in videos.feed_pulled, so a
+# creator crossing the threshold in either direction only changes how their
+# next uploads are delivered; earlier ones stay where they were.
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from typing import Iterable
+
+from sqlalchemy import DateTime, Integer, delete, func, literal, select, text, union_all, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.database import engine
+from app.models.feed import feed_entries_table as feed
+from app.models.user import User, subscriptions_table as subs
+from app.models.video import Video
+from app.services.collections import VIDEO_COLUMNS, video_key
+from app.services.engagement import insert_ignoring
+from app.utils.pagination import PageParams, keyset
+from app.utils.projection import row_page
+
+logger = logging.getLogger(__name__)
+
+_ENTRY_COLUMNS = ["user_id", "video_id", "upload_time", "uploader_id"]
+
+videos = Video.__table__
+
+
+def _pulled(uploader_id):
+    return (
+        select(User.subscriber_count).where(User.id == uploader_id).scalar_subquery()
+        >= settings.FEED_FANOUT_MAX_SUBSCRIBERS
+    )
+
+
+# ----- Write path -----
+
+async def fan_out(db: AsyncSession, video: Video) -> int:
+    """Push a new upload to its uploader's subscribers, or mark it pulled.
+
+    Returns the recipient count.
+    """
+    result = await db.execute(
+        update(videos)
+        .where(videos.c.id == video.id)
+        .values(feed_pulled=_pulled(videos.c.uploader_id))
+        .returning(videos.c.feed_pulled)
+    )
+    if result.scalar_one():
+        return 0
+    stmt = (
+        feed.insert()
+        .from_select(
+            _ENTRY_COLUMNS,
+            select(
+                subs.c.subscriber_id,
+                literal(video.id, Integer),
+                literal(video.upload_time, DateTime),
+                literal(video.uploader_id, Integer),
+            ).where(subs.c.subscribed_to_id == video.uploader_id),
+        )
+        .returning(feed.c.user_id)
+    )
+    result = await db.execute(stmt)
+    recipients = result.scalars().all()
+    feed_trimmer.mark(recipients)
+    return len(recipients)
+
+
+async def fan_out_many(db: AsyncSession, video_ids: Iterable[int]):
+    """Set-based `fan_out` for videos inserted in bulk."""
+    ids = list(video_ids)
+    if not ids:
+        return
+    await db.execute(
+        update(videos).where(videos.c.id.in_(ids)).values(feed_pulled=_pulled(videos.c.uploader_id))
+    )
+    stmt = (
+        insert_ignoring(db, feed)
+        .from_select(
+            _ENTRY_COLUMNS,
+            select(subs.c.subscriber_id, Video.id, Video.upload_time, Video.uploader_id)
+            .join(subs, subs.c.subscribed_to_id == Video.uploader_id)
+            .where(Video.id.in_(ids), ~Video.feed_pulled),
+        )
+        .on_conflict_do_nothing()
+        .returning(feed.c.user_id)
+    )
+    result = await db.execute(stmt)
+    feed_trimmer.mark(result.scalars().all())
+
+
+async def subscribe(db: AsyncSession, user_id: int, creator_ids: Iterable[int]):
+    """Backfill the newest pushed uploads of newly subscribed creators."""
+    ids = list(creator_ids)
+    if not ids:
+        return
+    ranked = (
+        select(
+            Video.id,
+            Video.upload_time,
+            Video.uploader_id,
+            func.row_number()
+            .over(partition_by=Video.uploader_id, order_by=(Video.upload_time.desc(), Video.id.desc()))
+            .label("position"),
+        )
+        .where(Video.uploader_id.in_(ids), ~Video.feed_pulled)
+        .subquery()
+    )
+    stmt = (
+        insert_ignoring(db, feed)
+        .from_select(
+            _ENTRY_COLUMNS,
+            select(literal(user_id, Integer), ranked.c.id, ranked.c.upload_time, ranked.c.uploader_id)
+            .where(ranked.c.position <= settings.FEED_MAX_ENTRIES),
+        )
+        .on_conflict_do_nothing()
+    )
+    await db.execute(stmt)
+    feed_trimmer.mark([user_id])
+
+
+async def unsubscribe(db: AsyncSession, user_id: int, creator_ids: Iterable[int]):
+    ids = list(creator_ids)
+    if ids:
+        await db.execute(delete(feed).where(feed.c.user_id == user_id, feed.c.uploader_id.in_(ids)))
+
+
+# ----- Read path -----
+
+class PullCreators:
+    """Ids of creators with pulled uploads, refreshed on a TTL.
+
+    Only creators who were above the fan-out threshold have any. There are
+    few of them, so the reader's subscriptions to them are found by
+    primary-key probes instead of scanning all of the reader's
+    subscriptions.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._ids: list[int] = []
+        self._expires_at = 0.0
+
+    async def get(self, db: AsyncSession) -> list[int]:
+        if time.monotonic() >= self._expires_at:
+            result = await db.execute(select(Video.uploader_id).where(Video.feed_pulled).distinct())
+            self._ids = result.scalars().all()
+            self._expires_at = time.monotonic() + self.ttl
+        return self._ids
+
+
+pull_creators = PullCreators(ttl=settings.FEED_PULL_CREATORS_TTL_SECONDS)
+
+
+async def read_feed(db: AsyncSession, user_id: int, page: PageParams) -> dict:
+    pushed_stmt = keyset(
+        select(*VIDEO_COLUMNS).join(feed, feed.c.video_id == Video.id).where(feed.c.user_id == user_id),
+        feed.c.upload_time,
+        feed.c.video_id,
+        page,
+    )
+    result = await db.execute(pushed_stmt)
+    streams = [result.all()]
+
+    creators = await pull_creators.get(db)
+    if creators:
+        # Past FEED_PULL_MAX_CREATORS, the creators who uploaded most recently
+        latest = (
+            select(Video.upload_time)
+            .where(Video.uploader_id == subs.c.subscribed_to_id, Video.feed_pulled)
+            .order_by(Video.upload_time.desc())
+            .limit(1)
+            .scalar_subquery()
+        )
+        limit = settings.FEED_PULL_MAX_CREATORS
+        result = await db.execute(
+            select(subs.c.subscribed_to_id)
+            .where(subs.c.subscriber_id == user_id, subs.c.subscribed_to_id.in_(creators))
+            .order_by(latest.desc())
+            .limit(limit + 1)
+        )
+        followed = result.scalars().all()
+        if len(followed) > limit:
+            logger.debug("Feed of user %s: pulling the %d most recent of its pulled creators", user_id, limit)
+            followed = followed[:limit]
+        if followed:
+            # One bounded seek per creator on ix_videos_feed_pulled
+            parts = [
+                select(keyset(
+                    select(*VIDEO_COLUMNS).where(Video.uploader_id == c, Video.feed_pulled),
+                    Video.upload_time, Video.id, page,
+                ).subquery())
+                for c in followed
+            ]
+            result = await db.execute(union_all(*parts))
+            by_creator: dict[int, list] = {}
+            for video in result.all():
+                by_creator.setdefault(video.uploader_id, []).append(video)
+            streams.extend(sorted(videos, key=video_key, reverse=True) for videos in by_creator.values())
+
+    # Each upload is either pushed or pulled, so the streams don't overlap
+    rows = list(itertools.islice(heapq.merge(*streams, key=video_key, reverse=True), page.limit + 1))
+    return row_page(rows, page, key=video_key)
+
+
+# ----- Trimming -----
+
+# Keep the newest FEED_MAX_ENTRIES rows: delete everything older than the
+# last one of them. Executed as executemany over the users to trim.
+_trim_stmt = text(
+    """
+    DELETE FROM feed_entries
+    WHERE user_id = :user_id
+      AND (upload_time, video_id) < (
+        SELECT upload_time, video_id FROM feed_entries
+        WHERE user_id = :user_id
+        ORDER BY upload_time DESC, video_id DESC
+        LIMIT 1 OFFSET :keep - 1
+      )
+    """
+)
+
+
+class FeedTrimmer:
+    """Bounds each user's pushed feed in the background.
+
+    Fan-out only inserts; users whose feed grew are remembered here and
+    trimmed in one batch per interval, so the write path never pays for it.
+    """
+
+    def __init__(self, interval: float, keep: int, batch_size: int = 500):
+        self.interval = interval
+        self.keep = keep
+        self.batch_size = batch_size
+        self._dirty: set[int] = set()
+        self._wakeup: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+        self._stopping = False
+
+        # Stats
+        self.trims = 0
+        self.trimmed_users = 0
+        self.deleted_entries = 0
+        self.failed_trims = 0
+
+    def mark(self, user_ids: Iterable[int]):
+        self._dirty.update(user_ids)
+
+    async def trim(self, user_ids: Iterable[int] | None = None) -> int:
+        if user_ids is None:
+            user_ids, self._dirty = self._dirty, set()
+        user_ids = sorted(user_ids)
+        deleted = 0
+        for start in range(0, len(user_ids), self.batch_size):
+            chunk = user_ids[start:start + self.batch_size]
+            try:
+                async with engine.begin() as conn:
+                    result = await conn.execute(
+                        _trim_stmt, [{"user_id": u, "keep": self.keep} for u in chunk]
+                    )
+                deleted += max(result.rowcount, 0)
+            except Exception:
+                self.failed_trims += 1
+                logger.exception("Feed trim failed; retrying %d users next round", len(chunk))
+                self._dirty.update(chunk)
+        self.trims += 1
+        self.trimmed_users += len(user_ids)
+        self.deleted_entries += deleted
+        return deleted
+
+    async def _run(self):
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            if self._dirty:
+                await self.trim()
+
+    def start(self):
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._stopping = True
+            self._wakeup.set()
+            await self._task
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "dirty_users": len(self._dirty),
+            "trims": self.trims,
+            "trimmed_users": self.trimmed_users,
+            "deleted_entries": self.deleted_entries,
+            "failed_trims": self.failed_trims,
+            "max_entries": self.keep,
+            "trim_interval_seconds": self.interval,
+        }
+
+
+feed_trimmer = FeedTrimmer(interval=settings.FEED_TRIM_INTERVAL_SECONDS, keep=settings.FEED_MAX_ENTRIES)
+
+
+async def _main():
+    # Trim every user's feed, e.g. after lowering FEED_MAX_ENTRIES
+    async with engine.connect() as conn:
+        result = await conn.execute(select(feed.c.user_id).distinct())
+        user_ids = result.scalars().all()
+    print(await feed_trimmer.trim(user_ids))
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    # python -m app.services.feed
+    asyncio.run(_main())
@@ -0,0 +1,110 @@
+# app/services/loaders.py
+# Process-wide batch loaders for single-row lookups (see
+# app/utils/batch_loader.py). The multi-get routes and the single-item
+# routes both load through them, so concurrent requests for the same video
+# share one query and requests for different videos within
+# LOADER_WINDOW_MS share one IN query.
+#
+# Loaders read on their own read-only sessions: a fetch serves many
+# requests, so it can't borrow any one request's session.
+from typing import Iterable
+
+from sqlalchemy.future import select
+
+from app.core.config import settings
+from app.database import ReadSessionLocal
+from app.models.user import User
+from app.models.video import Video
+from app.services import collections, facets
+from app.utils.batch_loader import BatchLoader
+from app.utils.pagination import PageParams
+from app.utils.projection import row_page
+from app.utils.response_cache import response_cache
+
+
+async def _fetch_videos(ids: list) -> dict:
+    async with ReadSessionLocal() as db:
+        result = await db.execute(select(*collections.VIDEO_COLUMNS).where(Video.id.in_(ids)))
+        return {row.id: row._asdict() for row in result.all()}
+
+
+async def _fetch_users(ids: list) -> dict:
+    async with ReadSessionLocal() as db:
+        result = await db.execute(
+            select(*collections.USER_COLUMNS).where(User.id.in_(ids), User.deleted_at.is_(None))
+        )
+        return {row.id: row._asdict() for row in result.all()}
+
+
+async def _fetch_video_details(ids: list) -> dict:
+    """Video detail payloads: the rows in one IN query, uploaders through the
+    user loader, then one bounded query per nested list and video."""
+    async with ReadSessionLocal() as db:
+        result = await db.execute(select(*collections.VIDEO_COLUMNS).where(Video.id.in_(ids)))
+        videos = [row._asdict() for row in result.all()]
+        uploaders = await user_loader.load_many([video["uploader_id"] for video in videos])
+
+        first = PageParams(cursor=None, limit=settings.DETAIL_COLLECTION_LIMIT)
+        details = {}
+        for video, uploader in zip(videos, uploaders):
+            video_id = video["id"]
+            comments = await db.execute(collections.video_comments(video_id, first))
+            liked_by = await db.execute(collections.video_liked_by(video_id, first))
+            watch_later_by = await db.execute(collections.video_watch_later_by(video_id, first))
+            # Totals come from the counters
+            details[video_id] = {
+                **video,
+                "tags": await facets.labels(db, video_id),
+                "uploader": uploader,
+                "comments": {
+                    **row_page(comments.all(), first, key=collections.comment_key),
+                    "total": video["comment_count"],
+                },
+                "liked_by": {
+                    **row_page(liked_by.all(), first, key=collections.id_key),
+                    "total": video["like_count"],
+                },
+                "watch_later_by": {
+                    **row_page(watch_later_by.all(), first, key=collections.id_key),
+                    "total": video["watch_later_count"],
+                },
+            }
+        return details
+
+
+def _loader(name: str, fetch) -> BatchLoader:
+    return BatchLoader(name, fetch, window=settings.LOADER_WINDOW_MS / 1000, max_batch=settings.LOADER_MAX_BATCH)
+
+
+video_loader = _loader("videos", _fetch_videos)
+user_loader = _loader("users", _fetch_users)
+# Detail payloads carry several queries per key, so they're batched in smaller groups
+video_detail_loader = BatchLoader(
+    "video_details", _fetch_video_details,
+    window=settings.LOADER_WINDOW_MS / 1000, max_batch=settings.DETAIL_LOADER_MAX_BATCH,
+)
+
+loaders = {loader.name: loader for loader in (video_loader, user_loader, video_detail_loader)}
+
+# Response cache tag prefix -> loaders keyed by that id
+_LOADERS_BY_TAG = {
+    "video": (video_loader, video_detail_loader),
+    "user": (user_loader,),
+}
+
+
+def _forget(tags: Iterable[str]):
+    # Writes invalidate the response cache with the tags of the rows they
+    # changed; the same tags detach those keys' in-flight fetches
+    for tag in tags:
+        kind, _, key = tag.partition(":")
+        if kind in _LOADERS_BY_TAG and key.isdigit():
+            for loader in _LOADERS_BY_TAG[kind]:
+                loader.forget(int(key))
+
+
+response_cache.add_listener(_forget)
+
+
+def stats() -> dict:
+    return {name: loader.stats() for name, loader in loaders.items()}
@@ -0,0 +1,367 @@
+# app/services/purge.py
+# Account deletion.
+#
+# Every table pointing at users or videos has ON DELETE CASCADE, so deleting
+# an account is one DELETE and the database removes the rest. For a typical
+# account that's a few hundred rows. For a large creator (millions of
+# comments, likes and feed entries under their videos) the same cascade
+# would hold SQLite's single writer for the whole deletion, so accounts
+# owning more than ACCOUNT_PURGE_THRESHOLD rows are soft-deleted instead:
+# users.deleted_at is set, the account can no longer sign in or
+# authenticate, and the AccountPurger removes what it owns in the
+# background, ACCOUNT_PURGE_BATCH_ROWS rows per transaction with a pause
+# between transactions so request writes get the writer in turn. Counters on
+# rows that outlive the account are adjusted in each batch's transaction.
+import asyncio
+import logging
+import time
+from collections import defaultdict
+from datetime import datetime
+
+from sqlalchemy import delete, func, select, tuple_, union, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.principals import principal_cache
+from app.database import AsyncSessionLocal
+from app.models.comment import Comment
+from app.models.feed import feed_entries_table as feed
+from app.models.upload import Upload
+from app.models.user import User, likes_table as likes, watch_later_table as watch_later, subscriptions_table as subs
+from app.models.video import Video
+from app.services import engagement, facets, related, threads, uploads
+from app.services.counters import latest_comment_time, recompute_counters
+from app.utils.response_cache import response_cache
+
+logger = logging.getLogger(__name__)
+
+
+def _capped_count(stmt, cap: int):
+    # Counting stops at `cap` rows: the size check must not cost what it guards
+    return select(func.count()).select_from(stmt.limit(cap).subquery()).scalar_subquery()
+
+
+async def account_size(db: AsyncSession, user_id: int, cap: int) -> int:
+    """Rows deleting the account would remove, counted up to about `cap`.
+
+    What hangs off the account's videos comes from their counters, and
+    feed entries are estimated as videos x subscribers.
+    """
+    uploads = select(
+        Video.id, (Video.like_count + Video.watch_later_count + Video.comment_count).label("rows")
+    ).where(Video.uploader_id == user_id).limit(cap).subquery()
+    result = await db.execute(
+        select(
+            select(func.count()).select_from(uploads).scalar_subquery(),
+            select(func.coalesce(func.sum(uploads.c.rows), 0)).scalar_subquery(),
+            select(User.subscriber_count).where(User.id == user_id).scalar_subquery(),
+            _capped_count(select(Comment.id).where(Comment.user_id == user_id), cap),
+            _capped_count(select(likes.c.video_id).where(likes.c.user_id == user_id), cap),
+            _capped_count(select(watch_later.c.video_id).where(watch_later.c.user_id == user_id), cap),
+            _capped_count(select(subs.c.subscribed_to_id).where(subs.c.subscriber_id == user_id), cap),
+            _capped_count(select(feed.c.video_id).where(feed.c.user_id == user_id), cap),
+        )
+    )
+    videos, under_videos, subscribers, *own = result.one()
+    return videos + under_videos + (subscribers or 0) * (1 + videos) + sum(own)
+
+
+async def delete_account(db: AsyncSession, user: User) -> bool:
+    """Delete `user` now, or soft-delete it and leave the rest to the purger.
+
+    Returns True if the account is gone. Either way it can't be used from
+    this call on.
+    """
+    threshold = settings.ACCOUNT_PURGE_THRESHOLD
+    if await account_size(db, user.id, threshold + 1) > threshold:
+        user.deleted_at = datetime.utcnow()
+        await db.commit()
+        principal_cache.invalidate_user(user.id)
+        response_cache.invalidate(f"user:{user.id}")
+        account_purger.wake()
+        return False
+
+    # Counters that include this user's likes, comments and subscriptions
+    result = await db.execute(
+        union(
+            select(likes.c.video_id).where(likes.c.user_id == user.id),
+            select(watch_later.c.video_id).where(watch_later.c.user_id == user.id),
+            select(Comment.video_id).where(Comment.user_id == user.id),
+        )
+    )
+    video_ids = result.scalars().all()
+    # The cascade below skips the routes, so the related videos index hears it here
+    for signal, table in (("like", likes), ("watch_later", watch_later)):
+        result = await db.execute(select(table.c.video_id).where(table.c.user_id == user.id))
+        await related.record(db, signal, user.id, result.scalars().all(), added=False)
+    result = await db.execute(select(subs.c.subscribed_to_id).where(subs.c.subscriber_id == user.id))
+    user_ids = result.scalars().all()
+    result = await db.execute(select(Upload.id).where(Upload.user_id == user.id))
+    upload_ids = result.scalars().all()
+    result = await db.execute(select(Video.id).where(Video.uploader_id == user.id))
+    await facets.count_out(db, result.scalars().all())
+
+    await db.execute(delete(User).where(User.id == user.id))
+    await db.commit()
+    uploads.remove_files(upload_ids)
+    principal_cache.invalidate_user(user.id)
+    await recompute_counters(db, video_ids=video_ids, user_ids=user_ids)
+    await db.commit()
+    response_cache.invalidate(
+        f"user:{user.id}",
+        f"uploader:{user.id}",
+        *(f"video:{v}" for v in video_ids),
+        *(f"user:{u}" for u in user_ids),
+    )
+    return True
+
+
+# ----- Purge steps -----
+# Each deletes at most about `limit` rows of one kind and returns
+# (rows deleted, cache tags to invalidate). Zero rows means the step is done.
+
+async def _delete_some(db: AsyncSession, table, key: tuple, condition, limit: int, order_by=()) -> int:
+    target = tuple_(*key) if len(key) > 1 else key[0]
+    batch = select(*key).where(condition).order_by(*order_by).limit(limit)
+    result = await db.execute(delete(table).where(target.in_(batch)), execution_options={"synchronize_session": False})
+    return max(result.rowcount, 0)
+
+
+async def _purge_videos(db: AsyncSession, user_id: int, limit: int):
+    """One of the user's videos: its comments, likes and feed entries, then the video."""
+    result = await db.execute(select(Video.id).where(Video.uploader_id == user_id).limit(1))
+    video_id = result.scalar_one_or_none()
+    if video_id is None:
+        return 0, ()
+    tags = (f"video:{video_id}", f"uploader:{user_id}")
+
+    # Newest first: replies go before the comments they answer
+    children = (
+        (Comment.__table__, (Comment.id,), Comment.video_id == video_id, (Comment.created_at.desc(),)),
+        (likes, (likes.c.video_id, likes.c.user_id), likes.c.video_id == video_id, ()),
+        (watch_later, (watch_later.c.video_id, watch_later.c.user_id), watch_later.c.video_id == video_id, ()),
+        (feed, (feed.c.user_id, feed.c.video_id), feed.c.video_id == video_id, ()),
+    )
+    for table, key, condition, order_by in children:
+        deleted = await _delete_some(db, table, key, condition, limit, order_by)
+        if deleted:
+            return deleted, tags
+    # What's left (tags, trending rows, the search index entry) is a handful of rows
+    await facets.count_out(db, [video_id])
+    await db.execute(delete(Video).where(Video.id == video_id))
+    return 1, tags
+
+
+async def _purge_comments(db: AsyncSession, user_id: int, limit: int):
+    """The user's comments on other videos, with the replies under them.
+
+    Replies go first, `limit` rows at most per batch, so a comment with a
+    huge thread under it is taken apart over several batches.
+    """
+    result = await db.execute(
+        select(Comment.id, Comment.parent_id, Comment.path, Comment.video_id)
+        .where(Comment.user_id == user_id)
+        .order_by(Comment.created_at.desc(), Comment.id.desc())
+        .limit(limit)
+    )
+    deleted = defaultdict(int)
+    budget = limit
+    for comment in result.all():
+        replies = await threads.delete_replies(db, comment, budget)
+        deleted[comment.video_id] += replies
+        budget -= replies
+        if budget <= 0:
+            break  # the comment itself goes in a later batch
+        # A comment inside a subtree deleted earlier in the batch is gone already
+        deleted[comment.video_id] += await threads.delete_subtree(db, comment)
+        budget -= 1
+        if budget <= 0:
+            break
+    for video_id, count in deleted.items():
+        await db.execute(
+            update(Video)
+            .where(Video.id == video_id)
+            .values(comment_count=Video.comment_count - count, last_comment_at=latest_comment_time(video_id))
+        )
+    return sum(deleted.values()), tuple(f"video:{v}" for v in deleted)
+
+
+async def _purge_uploads(db: AsyncSession, user_id: int, limit: int):
+    result = await db.execute(select(Upload.id).where(Upload.user_id == user_id).limit(limit))
+    upload_ids = result.scalars().all()
+    if not upload_ids:
+        return 0, ()
+    await db.execute(delete(Upload).where(Upload.id.in_(upload_ids)))
+    # Before the commit: a failed batch leaves rows whose files are gone, never the reverse
+    uploads.remove_files(upload_ids)
+    return len(upload_ids), ()
+
+
+def _purge_engagement(rel: engagement.Relation, tag: str, signal: str | None = None):
+    """The user's rows in `rel`, moving the targets' counters down and, with
+    a `signal`, taking them out of the related videos index."""
+    async def step(db: AsyncSession, user_id: int, limit: int):
+        result = await db.execute(select(rel.target).where(rel.source == user_id).limit(limit))
+        targets = result.scalars().all()
+        if not targets:
+            return 0, ()
+        outcome = await engagement.remove_many(db, rel, user_id, targets)
+        if signal:
+            await related.record(db, signal, user_id, outcome["changed"], added=False)
+        return len(outcome["changed"]), tuple(f"{tag}:{t}" for t in outcome["changed"])
+    return step
+
+
+async def _purge_subscribers(db: AsyncSession, user_id: int, limit: int):
+    # Only the user's own subscriber_count counted these
+    key = (subs.c.subscribed_to_id, subs.c.subscriber_id)
+    return await _delete_some(db, subs, key, subs.c.subscribed_to_id == user_id, limit), ()
+
+
+async def _purge_feed(db: AsyncSession, user_id: int, limit: int):
+    key = (feed.c.user_id, feed.c.video_id)
+    return await _delete_some(db, feed, key, feed.c.user_id == user_id, limit), ()
+
+
+# Uploads first: they're what other users still see until the account is gone
+PURGE_STEPS = (
+    _purge_videos,
+    _purge_uploads,
+    _purge_comments,
+    _purge_engagement(engagement.LIKES, "video", "like"),
+    _purge_engagement(engagement.WATCH_LATER, "video", "watch_later"),
+    _purge_engagement(engagement.SUBSCRIPTIONS, "user"),
+    _purge_subscribers,
+    _purge_feed,
+)
+
+
+class AccountPurger:
+    """Deletes soft-deleted accounts in the background, in bounded batches.
+
+    Every batch is its own short transaction and starts from the first step
+    with rows left, so a purge interrupted by a restart or an error resumes
+    where it stopped. Two workers purging the same account only delete
+    different rows; counters move by what each DELETE ... RETURNING removed.
+    """
+
+    def __init__(self, interval: float, batch_rows: int, pause: float):
+        self.interval = interval
+        self.batch_rows = batch_rows
+        self.pause = pause
+        self._wakeup: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+        self._stopping = False
+
+        # Stats
+        self.purged_accounts = 0
+        self.batches = 0
+        self.deleted_rows = 0
+        self.failed_runs = 0
+        self.last_batch_seconds = 0.0
+
+    async def _batch(self, user_id: int) -> bool:
+        """Delete one batch of the account. Returns True once the account is gone."""
+        async with AsyncSessionLocal() as db:
+            for step in PURGE_STEPS:
+                deleted, tags = await step(db, user_id, self.batch_rows)
+                if deleted:
+                    await db.commit()
+                    self.deleted_rows += deleted
+                    response_cache.invalidate(*tags)
+                    return False
+            # Nothing left under it: the cascade from here touches only stragglers
+            await db.execute(delete(User).where(User.id == user_id, User.deleted_at.isnot(None)))
+            await db.commit()
+        self.deleted_rows += 1
+        principal_cache.invalidate_user(user_id)
+        response_cache.invalidate(f"user:{user_id}", f"uploader:{user_id}")
+        return True
+
+    async def purge(self) -> int:
+        """Purge every soft-deleted account. Returns how many were finished."""
+        finished = 0
+        while not self._stopping:
+            async with AsyncSessionLocal() as db:
+                result = await db.execute(
+                    select(User.id).where(User.deleted_at.isnot(None)).order_by(User.deleted_at).limit(1)
+                )
+                user_id = result.scalar_one_or_none()
+            if user_id is None:
+                return finished
+
+            done = False
+            while not done and not self._stopping:
+                started = time.perf_counter()
+                try:
+                    done = await self._batch(user_id)
+                except Exception:
+                    self.failed_runs += 1
+                    logger.exception("Purging account %s failed; retrying next round", user_id)
+                    return finished
+                self.batches += 1
+                self.last_batch_seconds = time.perf_counter() - started
+                if not done:
+                    await asyncio.sleep(self.pause)
+            if done:
+                finished += 1
+                self.purged_accounts += 1
+                logger.info("Purged account %s", user_id)
+        return finished
+
+    def wake(self):
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _run(self):
+        while not self._stopping:
+            await self.purge()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    def start(self):
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._stopping = True
+            self._wakeup.set()
+            await self._task
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "purged_accounts": self.purged_accounts,
+            "batches": self.batches,
+            "deleted_rows": self.deleted_rows,
+            "failed_runs": self.failed_runs,
+            "last_batch_seconds": self.last_batch_seconds,
+            "batch_rows": self.batch_rows,
+            "pause_seconds": self.pause,
+            "interval_seconds": self.interval,
+        }
+
+
+account_purger = AccountPurger(
+    interval=settings.ACCOUNT_PURGE_INTERVAL_SECONDS,
+    batch_rows=settings.ACCOUNT_PURGE_BATCH_ROWS,
+    pause=settings.ACCOUNT_PURGE_PAUSE_SECONDS,
+)
+
+
+async def _main():
+    # python -m app.services.purge  -- finish every pending account deletion now
+    from app.database import dispose_engines
+
+    finished = await account_purger.purge()
+    print(f"Purged {finished} accounts")
+    await dispose_engines()
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
@@ -0,0 +1,550 @@
+# app/services/related.py
+# "Viewers also liked": item-to-item recommendations from likes and
+# watch-later entries.
+#
+# Model: each user is a sparse vector over videos, a like weighing
+# RELATED_WEIGHT_LIKE and a watch-later entry RELATED_WEIGHT_WATCH_LATER.
+# Two videos are related by the cosine of their columns,
+#     pairs[i, j] / sqrt(norms[i] * norms[j])
+# where pairs[i, j] sums weight_i * weight_j over users and norms[i] sums
+# weight_i^2. Only a user's most recent RELATED_USER_WINDOW engagements
+# count (their window), so one engagement costs at most that many pair
+# updates however much the user has liked.
+#
+# Write side: the like and watch-later routes append signed rows to
+# related_events in their own transaction. Nothing else happens on the
+# request path.
+#
+# Job: every RELATED_INTERVAL_SECONDS the updater folds the events after its
+# checkpoint into the windows, pairs and norms as deltas, then rebuilds the
+# top K lists whose membership those deltas can change. It never rescans
+# likes. The first run, or `python -m app.services.related --rebuild`,
+# builds everything from the likes and watch_later tables instead.
+#
+# Deltas are computed from the stored windows, not from the like tables, so
+# the pair counts always equal the sum over the stored windows: a removal
+# takes back exactly what its addition put in, even if the weights changed
+# in between or the engagement has since left the window.
+import argparse
+import asyncio
+import heapq
+import logging
+import math
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Iterable, Optional
+
+from sqlalchemy import and_, bindparam, delete, func, literal, or_, select, text, union_all, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.database import AsyncSessionLocal, ReadSessionLocal
+from app.models.related import (
+    related_events_table as events,
+    related_norms_table as norms,
+    related_pairs_table as pairs,
+    related_state_table as state,
+    related_top_table as top,
+    related_windows_table as windows,
+)
+from app.models.user import likes_table as likes, watch_later_table as watch_later
+from app.models.video import Video
+from app.services.collections import VIDEO_COLUMNS
+from app.services.engagement import insert_ignoring
+
+logger = logging.getLogger(__name__)
+
+EPSILON = 1e-9  # weights this close to zero are gone
+_CHUNK = 500  # keys per IN list and rows per executemany
+
+
+def _weights() -> dict:
+    return {"like": settings.RELATED_WEIGHT_LIKE, "watch_later": settings.RELATED_WEIGHT_WATCH_LATER}
+
+
+async def _snapshot(read: AsyncSession):
+    """Make the session's reads share one snapshot."""
+    if read.get_bind().dialect.name == "sqlite":
+        # pysqlite only opens a transaction before a write; without one each
+        # SELECT would see the database as of its own start
+        await read.execute(text("BEGIN"))
+    else:
+        await read.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+
+
+def _chunks(items: list, size: int = _CHUNK):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _matching(key: list, keys: list):
+    """WHERE clause for rows whose `key` columns equal one of `keys`.
+
+    Pairs are grouped by their first video: SQLite plans a row-value IN
+    list as a scan, but each `video_id = ? AND other_id IN (...)` branch
+    as a primary key search.
+    """
+    if len(key) == 1:
+        return key[0].in_([k[0] for k in keys])
+    grouped = defaultdict(list)
+    for first, second in keys:
+        grouped[first].append(second)
+    return or_(*(and_(key[0] == first, key[1].in_(seconds)) for first, seconds in grouped.items()))
+
+
+# ----- Write path -----
+
+async def record(db: AsyncSession, kind: str, user_id: int, video_ids: Iterable[int], added: bool = True):
+    """Log that `user_id` added (or removed) a `kind` on each video. The caller commits."""
+    weight = _weights()[kind]
+    if weight <= 0:
+        return
+    now = datetime.utcnow()
+    rows = [
+        {"user_id": user_id, "video_id": video_id, "weight": weight if added else -weight, "created_at": now}
+        for video_id in video_ids
+    ]
+    if rows:
+        await db.execute(events.insert(), rows)
+
+
+# ----- Reads -----
+
+async def read_related(db: AsyncSession, video_id: int, limit: int) -> list[dict]:
+    """The precomputed neighbours: an index range of at most `limit` rows."""
+    result = await db.execute(
+        select(*VIDEO_COLUMNS, top.c.score)
+        .join(top, top.c.other_id == Video.id)
+        .where(top.c.video_id == video_id)
+        .order_by(top.c.score.desc())
+        .limit(limit)
+    )
+    return [{**row._asdict(), "rank": rank} for rank, row in enumerate(result.all(), start=1)]
+
+
+# ----- Index maintenance -----
+
+def _add_pair(deltas: dict, i: int, j: int, amount: float):
+    deltas[i, j] += amount
+    deltas[j, i] += amount
+
+
+def apply_event(window: dict, video_id: int, weight: float, seq: int, size: int, pair_deltas: dict, norm_deltas: dict):
+    """Fold one engagement change into a user's window.
+
+    `window` maps video id -> [weight, seq] and is updated in place; the
+    resulting changes to pairs and norms are added to the delta dicts.
+    """
+    entry = window.get(video_id)
+    old = entry[0] if entry else 0.0
+    if entry is None and weight <= 0:
+        return  # removing something the window no longer holds
+    new = old + weight
+    if new <= EPSILON:
+        new = 0.0
+
+    change = new - old
+    for other_id, (other_weight, _) in window.items():
+        if other_id != video_id:
+            _add_pair(pair_deltas, video_id, other_id, change * other_weight)
+    norm_deltas[video_id] += new * new - old * old
+
+    if new == 0.0:
+        window.pop(video_id, None)
+    elif entry is None:
+        window[video_id] = [new, seq]
+    else:
+        entry[0] = new
+
+    if len(window) > size:
+        # The oldest engagement leaves the window and takes its pairs with it
+        oldest_id = min(window, key=lambda v: window[v][1])
+        oldest_weight = window.pop(oldest_id)[0]
+        for other_id, (other_weight, _) in window.items():
+            _add_pair(pair_deltas, oldest_id, other_id, -oldest_weight * other_weight)
+        norm_deltas[oldest_id] -= oldest_weight * oldest_weight
+
+
+def _upsert_stmt(db: AsyncSession, table, key: list):
+    stmt = insert_ignoring(db, table)
+    return stmt.on_conflict_do_update(index_elements=key, set_={"weight": stmt.excluded.weight})
+
+
+async def _neighbours(db: AsyncSession, video_id: int, norm: float, limit: int) -> list:
+    # For a fixed video, cosine order is pairs^2 / norms[other] order
+    result = await db.execute(
+        select(pairs.c.other_id, pairs.c.weight, norms.c.weight)
+        .join(norms, norms.c.video_id == pairs.c.other_id)
+        .where(pairs.c.video_id == video_id)
+        .order_by((pairs.c.weight * pairs.c.weight / norms.c.weight).desc())
+        .limit(limit)
+    )
+    return [(other_id, weight / math.sqrt(norm * other_norm)) for other_id, weight, other_norm in result.all()]
+
+
+async def _write_top(db: AsyncSession, video_id: int, neighbours: list):
+    await db.execute(delete(top).where(top.c.video_id == video_id))
+    if neighbours:
+        await db.execute(top.insert(), [
+            {"video_id": video_id, "other_id": other_id, "score": score} for other_id, score in neighbours
+        ])
+
+
+class RelatedUpdater:
+    """Folds new like and watch-later events into the co-occurrence index.
+
+    Progress is a checkpoint row (the last event id applied), advanced
+    with compare-and-set in the same transaction as the index, so a second
+    worker running the same job can't apply a batch twice.
+    """
+
+    def __init__(self, interval: float, batch_size: int, top_k: int, window: int):
+        self.interval = interval
+        self.batch_size = batch_size
+        self.top_k = top_k
+        self.window = window
+        self._wakeup: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+        self._stopping = False
+
+        # Stats
+        self.runs = 0
+        self.failed_runs = 0
+        self.applied_events = 0
+        self.updated_pairs = 0
+        self.rebuilt_lists = 0
+        self.full_builds = 0
+        self.last_run_seconds = 0.0
+        self.last_event_id = 0
+
+    async def update(self) -> int:
+        """Apply pending events, a batch at a time. Returns how many were applied."""
+        applied = 0
+        while True:
+            started = time.perf_counter()
+            try:
+                count, full = await self._apply_batch()
+            except Exception:
+                self.failed_runs += 1
+                logger.exception("Related videos update failed; retrying next round")
+                return applied
+            applied += count
+            self.runs += 1
+            self.last_run_seconds = time.perf_counter() - started
+            if not full:
+                return applied
+
+    async def _apply_batch(self) -> tuple[int, bool]:
+        async with AsyncSessionLocal() as db:
+            last = (await db.execute(select(state.c.last_event_id).where(state.c.id == 1))).scalar_one_or_none()
+        if last is None:
+            # Nothing built yet: start from the like tables as they are
+            await self.build()
+            return 0, True
+
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(events.c.id, events.c.user_id, events.c.video_id, events.c.weight)
+                .join(Video, Video.id == events.c.video_id)  # skips deleted videos
+                .where(events.c.id > last)
+                .order_by(events.c.id)
+                .limit(self.batch_size)
+            )
+            batch = result.all()
+            # Events the join skipped are consumed with the batch
+            newest = batch[-1].id if batch else (await db.execute(select(func.max(events.c.id)))).scalar()
+            if newest is None or newest <= last:
+                return 0, False
+
+            user_ids = sorted({row.user_id for row in batch})
+            user_windows: dict[int, dict] = {user_id: {} for user_id in user_ids}
+            for chunk in _chunks(user_ids):
+                result = await db.execute(
+                    select(windows.c.user_id, windows.c.video_id, windows.c.weight, windows.c.seq)
+                    .where(windows.c.user_id.in_(chunk))
+                )
+                for user_id, video_id, weight, seq in result.all():
+                    user_windows[user_id][video_id] = [weight, seq]
+
+            pair_deltas: dict[tuple, float] = defaultdict(float)
+            norm_deltas: dict[int, float] = defaultdict(float)
+            for row in batch:
+                apply_event(user_windows[row.user_id], row.video_id, row.weight, row.id, self.window, pair_deltas, norm_deltas)
+            pair_deltas = {key: delta for key, delta in pair_deltas.items() if abs(delta) > EPSILON}
+            videos = sorted({i for i, _ in pair_deltas} | set(norm_deltas))
+
+            # Windows: rewrite the batch's users
+            for chunk in _chunks(user_ids):
+                await db.execute(delete(windows).where(windows.c.user_id.in_(chunk)))
+            rows = [
+                {"user_id": user_id, "video_id": video_id, "weight": weight, "seq": seq}
+                for user_id, window in user_windows.items()
+                for video_id, (weight, seq) in window.items()
+            ]
+            for chunk in _chunks(rows):
+                await db.execute(windows.insert(), chunk)
+
+            # Norms and pairs: read, add the deltas, write back
+            norm_values = {}
+            for chunk in _chunks(videos):
+                result = await db.execute(select(norms.c.video_id, norms.c.weight).where(norms.c.video_id.in_(chunk)))
+                norm_values.update(result.all())
+            old_norms = dict(norm_values)
+            for video_id, delta in norm_deltas.items():
+                norm_values[video_id] = norm_values.get(video_id, 0.0) + delta
+            await self._write(db, norms, [norms.c.video_id], {(v,): w for v, w in norm_values.items()})
+            await self._rescale(db, old_norms, norm_values)
+
+            keys = sorted(pair_deltas)
+            pair_values = {}
+            for chunk in _chunks(keys):
+                result = await db.execute(
+                    select(pairs.c.video_id, pairs.c.other_id, pairs.c.weight)
+                    .where(_matching([pairs.c.video_id, pairs.c.other_id], chunk))
+                )
+                pair_values.update(((i, j), w) for i, j, w in result.all())
+            for key, delta in pair_deltas.items():
+                pair_values[key] = pair_values.get(key, 0.0) + delta
+            await self._write(db, pairs, [pairs.c.video_id, pairs.c.other_id], pair_values)
+            self.updated_pairs += len(pair_values)
+
+            await self._refresh_tops(db, pair_values, norm_values)
+
+            moved = await db.execute(
+                update(state)
+                .where(state.c.id == 1, state.c.last_event_id == last)
+                .values(last_event_id=newest, updated_at=datetime.utcnow())
+            )
+            if moved.rowcount != 1:
+                # Another worker applied this batch first
+                await db.rollback()
+                return 0, False
+            await db.execute(delete(events).where(events.c.id <= newest))
+            await db.commit()
+
+        self.applied_events += len(batch)
+        self.last_event_id = newest
+        return len(batch), len(batch) >= self.batch_size
+
+    async def _write(self, db: AsyncSession, table, key: list, values: dict):
+        """Upsert `values` ({key tuple: weight}), deleting the weights that reached zero."""
+        live = [
+            {**{column.key: part for column, part in zip(key, k)}, "weight": w}
+            for k, w in values.items() if w > EPSILON
+        ]
+        gone = [k for k, w in values.items() if w <= EPSILON]
+        for chunk in _chunks(live):
+            await db.execute(_upsert_stmt(db, table, [column.key for column in key]), chunk)
+        for chunk in _chunks(gone):
+            await db.execute(delete(table).where(_matching(key, chunk)))
+
+    async def _rescale(self, db: AsyncSession, old_norms: dict, new_norms: dict):
+        """Bring listed scores up to date with changed norms.
+
+        A score is pairs / sqrt(norms[i] * norms[j]), so a new norm scales
+        every listed score it appears in by the same factor: the video's
+        own list and its entries in other lists. A neighbour that a lower
+        norm would lift into a list it isn't in gets there the next time a
+        pair of that list changes.
+        """
+        factors = [
+            {"video": video_id, "factor": math.sqrt(old_norms[video_id] / norm)}
+            for video_id, norm in new_norms.items()
+            if norm > EPSILON and old_norms.get(video_id, 0.0) > EPSILON and abs(norm - old_norms[video_id]) > EPSILON
+        ]
+        if not factors:
+            return
+        for column in (top.c.video_id, top.c.other_id):
+            await db.execute(
+                update(top).where(column == bindparam("video")).values(score=top.c.score * bindparam("factor")),
+                factors,
+                execution_options={"synchronize_session": False},
+            )
+
+    async def _refresh_tops(self, db: AsyncSession, pair_values: dict, norm_values: dict):
+        """Rebuild the top lists a changed pair can enter, leave or reorder."""
+        changed = defaultdict(dict)  # video -> {neighbour: new cosine}
+        for (i, j), weight in pair_values.items():
+            norm_i, norm_j = norm_values.get(i, 0.0), norm_values.get(j, 0.0)
+            valid = weight > EPSILON and norm_i > EPSILON and norm_j > EPSILON
+            changed[i][j] = weight / math.sqrt(norm_i * norm_j) if valid else 0.0
+
+        current = defaultdict(dict)
+        sources = sorted(changed)
+        for chunk in _chunks(sources):
+            result = await db.execute(
+                select(top.c.video_id, top.c.other_id, top.c.score).where(top.c.video_id.in_(chunk))
+            )
+            for video_id, other_id, score in result.all():
+                current[video_id][other_id] = score
+
+        for video_id in sources:
+            listed = current[video_id]
+            floor = min(listed.values()) if len(listed) >= self.top_k else 0.0
+            if any(other in listed or score > floor for other, score in changed[video_id].items()):
+                norm = norm_values.get(video_id, 0.0)
+                neighbours = await _neighbours(db, video_id, norm, self.top_k) if norm > EPSILON else []
+                await _write_top(db, video_id, neighbours)
+                self.rebuilt_lists += 1
+
+    async def build(self, force: bool = False) -> int:
+        """Build the index from the like tables. Returns the number of pairs.
+
+        The tables and the event checkpoint are read in one transaction, so
+        events after it are exactly the changes the build didn't see.
+        """
+        started = time.perf_counter()
+        weights = _weights()
+        engaged = union_all(
+            select(likes.c.user_id, likes.c.video_id, literal(weights["like"]).label("weight")),
+            select(watch_later.c.user_id, watch_later.c.video_id, literal(weights["watch_later"]).label("weight")),
+        ).subquery()
+
+        window_rows, pair_sums, norm_sums = [], defaultdict(float), defaultdict(float)
+        async with ReadSessionLocal() as read:
+            await _snapshot(read)
+            checkpoint = (await read.execute(select(func.max(events.c.id)))).scalar() or 0
+            # Users' vectors one after another; without timestamps, newer videos stand in for recent
+            result = await read.stream(
+                select(engaged.c.user_id, engaged.c.video_id, func.sum(engaged.c.weight))
+                .where(engaged.c.weight > 0)
+                .group_by(engaged.c.user_id, engaged.c.video_id)
+                .order_by(engaged.c.user_id, engaged.c.video_id.desc())
+                .execution_options(yield_per=settings.BULK_EXPORT_CHUNK_ROWS)
+            )
+            user_id, vector = None, []
+            async for row_user, video_id, weight in result:
+                if row_user != user_id:
+                    self._accumulate(user_id, vector, window_rows, pair_sums, norm_sums)
+                    user_id, vector = row_user, []
+                if len(vector) < self.window:
+                    vector.append((video_id, weight))
+            self._accumulate(user_id, vector, window_rows, pair_sums, norm_sums)
+
+        # Top K per video from the in-memory adjacency
+        neighbours = defaultdict(list)
+        for (i, j), weight in pair_sums.items():
+            score = weight / math.sqrt(norm_sums[i] * norm_sums[j])
+            neighbours[i].append((score, j))
+            neighbours[j].append((score, i))
+
+        async with AsyncSessionLocal() as db:
+            claimed = await db.execute(
+                insert_ignoring(db, state)
+                .values(id=1, last_event_id=checkpoint, updated_at=datetime.utcnow())
+                .on_conflict_do_nothing()
+            )
+            if claimed.rowcount != 1:
+                if not force:
+                    await db.rollback()  # another worker built it first
+                    return 0
+                await db.execute(update(state).where(state.c.id == 1).values(
+                    last_event_id=checkpoint, updated_at=datetime.utcnow(),
+                ))
+            for table in (top, pairs, norms, windows):
+                await db.execute(delete(table))
+
+            for chunk in _chunks(window_rows):
+                await db.execute(windows.insert(), chunk)
+            norm_rows = [{"video_id": v, "weight": w} for v, w in norm_sums.items()]
+            for chunk in _chunks(norm_rows):
+                await db.execute(norms.insert(), chunk)
+            pair_rows = [
+                row
+                for (i, j), w in pair_sums.items()
+                for row in ({"video_id": i, "other_id": j, "weight": w}, {"video_id": j, "other_id": i, "weight": w})
+            ]
+            for chunk in _chunks(pair_rows):
+                await db.execute(pairs.insert(), chunk)
+            top_rows = [
+                {"video_id": video_id, "other_id": other_id, "score": score}
+                for video_id, scored in neighbours.items()
+                for score, other_id in heapq.nlargest(self.top_k, scored)
+            ]
+            for chunk in _chunks(top_rows):
+                await db.execute(top.insert(), chunk)
+
+            await db.execute(delete(events).where(events.c.id <= checkpoint))
+            await db.commit()
+
+        self.full_builds += 1
+        self.last_event_id = checkpoint
+        self.last_run_seconds = time.perf_counter() - started
+        logger.info("Built the related videos index: %d pairs in %.1fs", len(pair_sums), self.last_run_seconds)
+        return len(pair_sums)
+
+    @staticmethod
+    def _accumulate(user_id, vector: list, window_rows: list, pair_sums: dict, norm_sums: dict):
+        # One user's contribution to the sparse product X^T X: every pair in their window.
+        # `vector` is newest first; seq -index keeps that order for eviction, below
+        # the event ids that incremental updates use.
+        if user_id is None:
+            return
+        for index, (video_id, weight) in enumerate(vector):
+            window_rows.append({"user_id": user_id, "video_id": video_id, "weight": weight, "seq": -index})
+            norm_sums[video_id] += weight * weight
+            for other_id, other_weight in vector[index + 1:]:
+                key = (video_id, other_id) if video_id < other_id else (other_id, video_id)
+                pair_sums[key] += weight * other_weight
+
+    async def _run(self):
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.update()
+
+    def start(self):
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._stopping = True
+            self._wakeup.set()
+            await self._task
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "runs": self.runs,
+            "failed_runs": self.failed_runs,
+            "applied_events": self.applied_events,
+            "updated_pairs": self.updated_pairs,
+            "rebuilt_lists": self.rebuilt_lists,
+            "full_builds": self.full_builds,
+            "last_event_id": self.last_event_id,
+            "last_run_seconds": self.last_run_seconds,
+            "interval_seconds": self.interval,
+        }
+
+
+related_updater = RelatedUpdater(
+    interval=settings.RELATED_INTERVAL_SECONDS,
+    batch_size=settings.RELATED_BATCH_EVENTS,
+    top_k=settings.RELATED_TOP_K,
+    window=settings.RELATED_USER_WINDOW,
+)
+
+
+async def _main(argv: Optional[list] = None):
+    # python -m app.services.related [--rebuild]  -- apply pending events now
+    from app.database import dispose_engines
+
+    parser = argparse.ArgumentParser(description="Update the related videos index")
+    parser.add_argument("--rebuild", action="store_true", help="rebuild from the like tables, e.g. after changing the weights")
+    args = parser.parse_args(argv)
+    if args.rebuild:
+        built = await related_updater.build(force=True)
+        print(f"Built {built} pairs")
+    applied = await related_updater.update()
+    print(f"Applied {applied} events")
+    await dispose_engines()
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
@@ -0,0 +1,187 @@
+# app/services/search.py
+# Full-text search over video titles and descriptions, backed by an SQLite
+# FTS5 external-content table. The index stores only the inverted lists;
+# title/description are read back from `videos` by rowid. Triggers keep it in
+# sync on insert, delete and title/description updates -- counter and view
+# updates don't touch it.
+import asyncio
+import html
+import re
+import sys
+
+from sqlalchemy import Column, Float, Integer, MetaData, Table, Text, func, literal_column
+from sqlalchemy.future import select
+
+from app.database import engine
+from app.models.video import Video
+from app.services.collections import VIDEO_COLUMNS
+from app.utils.pagination import PageParams, keyset
+
+# Not part of Base.metadata: create_all must never build it as a plain table
+_fts_metadata = MetaData()
+videos_fts = Table(
+    "videos_fts",
+    _fts_metadata,
+    Column("rowid", Integer, primary_key=True),
+    Column("title", Text),
+    Column("description", Text),
+    Column("rank", Float),
+)
+
+# bm25 column weights: a title hit counts ten times a description hit
+TITLE_WEIGHT = 10.0
+DESCRIPTION_WEIGHT = 1.0
+
+_DDL = [
+    # Prefix indexes make the trailing `term*` of as-you-type queries a seek
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS videos_fts USING fts5(
+        title, description,
+        content='videos', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2',
+        prefix='3 4'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS videos_fts_ai AFTER INSERT ON videos BEGIN
+        INSERT INTO videos_fts(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS videos_fts_ad AFTER DELETE ON videos BEGIN
+        INSERT INTO videos_fts(videos_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS videos_fts_au AFTER UPDATE OF title, description ON videos BEGIN
+        INSERT INTO videos_fts(videos_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO videos_fts(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END
+    """,
+]
+
+
+def is_supported(dialect_name: str) -> bool:
+    return dialect_name == "sqlite"
+
+
+def _index_exists(conn) -> bool:
+    row = conn.exec_driver_sql(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'videos_fts'"
+    ).first()
+    return row is not None
+
+
+def _configure_rank(conn):
+    # Persisted in the index, so `ORDER BY rank` uses the weighted bm25
+    conn.exec_driver_sql(
+        f"INSERT INTO videos_fts(videos_fts, rank) VALUES ('rank', 'bm25({TITLE_WEIGHT}, {DESCRIPTION_WEIGHT})')"
+    )
+
+
+def ensure_index(conn):
+    """Create the index and its triggers if missing (sync, for `run_sync`).
+
+    A database that predates the index is backfilled once, when the table
+    is first created; after that the triggers keep it current.
+    """
+    if not is_supported(conn.dialect.name):
+        return
+    created = not _index_exists(conn)
+    for ddl in _DDL:
+        conn.exec_driver_sql(ddl)
+    if created:
+        _configure_rank(conn)
+        conn.exec_driver_sql("INSERT INTO videos_fts(videos_fts) VALUES ('rebuild')")
+
+
+def rebuild(conn):
+    """Re-read every video into the index."""
+    ensure_index(conn)
+    conn.exec_driver_sql("INSERT INTO videos_fts(videos_fts) VALUES ('rebuild')")
+
+
+def optimize(conn):
+    """Merge the index's b-tree segments into one (after bulk loads)."""
+    conn.exec_driver_sql("INSERT INTO videos_fts(videos_fts) VALUES ('optimize')")
+
+
+# ----- Query -----
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+# bm25 scores every matching row before the LIMIT applies, so a one- or
+# two-letter prefix (matching a large share of the table) is searched as
+# a whole word instead
+MIN_PREFIX_LENGTH = 3
+
+
+def to_match_expression(q: str):
+    """Turn free text into a safe FTS5 query.
+
+    Every word is quoted, so FTS5 operators and punctuation in user input
+    are matched literally instead of raising syntax errors. Words are
+    ANDed; the last one is a prefix so results follow typing.
+    """
+    terms = _TOKEN.findall(q)
+    if not terms:
+        return None
+    quoted = [f'"{term}"' for term in terms]
+    if len(terms[-1]) >= MIN_PREFIX_LENGTH:
+        quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+# snippet() copies the stored text as is, so it marks matches with control
+# characters that can't be confused with markup; `hit` escapes the text and
+# only then turns them into <mark> tags
+_MARK_START, _MARK_END = "\x02", "\x03"
+
+
+def highlight(snippet: str) -> str:
+    """An FTS5 snippet as HTML: the text escaped, the matches in <mark>."""
+    return html.escape(snippet).replace(_MARK_START, "<mark>").replace(_MARK_END, "</mark>")
+
+
+def search_videos(match: str, page: PageParams):
+    snippet_args = (_MARK_START, _MARK_END, "…", 12)
+    stmt = (
+        select(
+            *VIDEO_COLUMNS,
+            videos_fts.c.rank,
+            func.snippet(literal_column("videos_fts"), 0, *snippet_args).label("title_snippet"),
+            func.snippet(literal_column("videos_fts"), 1, *snippet_args).label("description_snippet"),
+        )
+        .join(videos_fts, videos_fts.c.rowid == Video.id)
+        .where(literal_column("videos_fts").match(match))
+    )
+    # bm25 is lower-is-better, so the best hits come first in ascending order
+    return keyset(stmt, videos_fts.c.rank, Video.id, page, descending=False)
+
+
+def hit(row) -> dict:
+    return {
+        **row._asdict(),
+        "title_snippet": highlight(row.title_snippet),
+        "description_snippet": highlight(row.description_snippet) if row.description_snippet else None,
+    }
+
+
+def hit_key(hit):
+    return (hit["rank"], hit["id"])
+
+
+async def _main(command: str):
+    action = {"rebuild": rebuild, "optimize": optimize}[command]
+    async with engine.begin() as conn:
+        await conn.run_sync(action)
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    # python -m app.services.search rebuild|optimize
+    asyncio.run(_main(sys.argv[1] if len(sys.argv) > 1 else "rebuild"))
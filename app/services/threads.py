@@ -0,0 +1,204 @@
+# app/services/threads.py
+# Comment reply threads as materialized paths.
+#
+# A comment's path is the fixed-width ids of its ancestors and itself, each
+# followed by "/": a root 12 is "0000000012/", a reply 15 to it is
+# "0000000012/0000000015/". Every descendant's path starts with its
+# ancestor's, so a subtree is the contiguous index range
+# [path, path + "~") and sorting by path lists it depth-first, replies in
+# id (posting) order.
+from collections import Counter
+from typing import Iterable
+
+from fastapi import HTTPException
+from sqlalchemy import bindparam, delete, func, select, union_all, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.comment import Comment
+from app.services.collections import COMMENT_COLUMNS
+from app.utils.pagination import PageParams, build_page, keyset
+from app.utils.projection import as_dicts
+
+SEGMENT_WIDTH = 10
+_END = "~"  # sorts after the digits and "/" that make up a path
+
+
+def child_path(parent_path: str, comment_id: int) -> str:
+    return f"{parent_path}{comment_id:0{SEGMENT_WIDTH}d}/"
+
+
+def path_key(c):
+    return (c.path, c.id)
+
+
+def reply_key(c):
+    return (c.created_at, c.id)
+
+
+def _in_subtree(root_path):
+    return (Comment.path >= root_path) & (Comment.path < root_path + _END)
+
+
+# ----- Writes -----
+
+async def add_comment(db: AsyncSession, comment: Comment, parent_id=None) -> Comment:
+    """Insert `comment`, as a reply to `parent_id` when given, and assign its path.
+
+    The caller commits.
+    """
+    parent_path = ""
+    if parent_id is not None:
+        result = await db.execute(
+            select(Comment.video_id, Comment.path, Comment.depth).where(Comment.id == parent_id)
+        )
+        parent = result.one_or_none()
+        if parent is None or parent.video_id != comment.video_id:
+            raise HTTPException(status_code=404, detail="Parent comment not found")
+        if parent.depth + 1 > settings.COMMENT_MAX_DEPTH:
+            raise HTTPException(status_code=400, detail="Reply thread is too deep")
+        parent_path = parent.path
+        comment.parent_id = parent_id
+        comment.depth = parent.depth + 1
+        await db.execute(update(Comment).where(Comment.id == parent_id).values(reply_count=Comment.reply_count + 1))
+
+    db.add(comment)
+    await db.flush()
+    comment.path = child_path(parent_path, comment.id)
+    return comment
+
+
+async def delete_subtree(db: AsyncSession, comment: Comment) -> int:
+    """Delete `comment` and every reply under it with one range DELETE.
+
+    Nothing in the subtree is loaded. Returns the number of rows deleted.
+    The caller commits.
+    """
+    # Counted up front: replies the parent_id cascade removes before the
+    # range scan reaches them don't show up in the DELETE's rowcount
+    result = await db.execute(select(func.count()).select_from(Comment).where(_in_subtree(comment.path)))
+    deleted = result.scalar_one()
+    await db.execute(
+        delete(Comment).where(_in_subtree(comment.path)),
+        execution_options={"synchronize_session": False},
+    )
+    if deleted and comment.parent_id is not None:
+        await db.execute(
+            update(Comment).where(Comment.id == comment.parent_id).values(reply_count=Comment.reply_count - 1)
+        )
+    return deleted
+
+
+async def delete_replies(db: AsyncSession, comment: Comment, limit: int) -> int:
+    """Delete up to `limit` of the replies under `comment`, leaving it in place.
+
+    Descending path order lists every reply after its own replies, so a
+    batch takes whole branches from the bottom up and the parent_id cascade
+    finds nothing left to remove. Returns the number of rows deleted; fewer
+    than `limit` means none are left. The caller commits.
+    """
+    result = await db.execute(
+        select(Comment.id, Comment.parent_id)
+        .where(Comment.path > comment.path, Comment.path < comment.path + _END)
+        .order_by(Comment.path.desc())
+        .limit(limit)
+    )
+    rows = result.all()
+    if not rows:
+        return 0
+    ids = {row.id for row in rows}
+    await db.execute(delete(Comment).where(Comment.id.in_(ids)), execution_options={"synchronize_session": False})
+    # Replies still standing lose the ones taken from under them
+    lost = Counter(row.parent_id for row in rows if row.parent_id not in ids)
+    comments = Comment.__table__
+    await db.execute(
+        update(comments)
+        .where(comments.c.id == bindparam("_id"))
+        .values(reply_count=comments.c.reply_count - bindparam("_lost")),
+        [{"_id": parent_id, "_lost": n} for parent_id, n in lost.items()],
+    )
+    return len(ids)
+
+
+async def fill_paths(db: AsyncSession):
+    """Assign paths to comments inserted without one (bulk imports).
+
+    Each round handles the comments whose parent already has a path, so a
+    thread imported in one go is filled in depth order.
+    """
+    parent = Comment.__table__.alias("parent")
+    while True:
+        result = await db.execute(
+            select(Comment.id, parent.c.path, parent.c.depth)
+            .outerjoin(parent, parent.c.id == Comment.parent_id)
+            .where(Comment.path.is_(None))
+            .where(Comment.parent_id.is_(None) | parent.c.path.isnot(None))
+        )
+        rows = [
+            {"_id": comment_id, "path": child_path(parent_path or "", comment_id),
+             "depth": 0 if parent_depth is None else parent_depth + 1}
+            for comment_id, parent_path, parent_depth in result.all()
+        ]
+        if not rows:
+            return
+        comments = Comment.__table__
+        await db.execute(update(comments).where(comments.c.id == bindparam("_id")), rows)
+
+
+# ----- Reads -----
+
+def top_level(video_id: int, page: PageParams):
+    """A page of a video's root comments, newest first."""
+    stmt = select(*COMMENT_COLUMNS).where(Comment.video_id == video_id, Comment.depth == 0)
+    return keyset(stmt, Comment.created_at, Comment.id, page)
+
+
+def first_replies(parent_ids: Iterable[int], limit: int):
+    """The oldest `limit` direct replies of each parent, in one statement.
+
+    One bounded seek per parent on ix_comments_parent_created; a parent
+    with thousands of replies still reads only `limit` rows.
+    """
+    parts = [
+        select(
+            select(*COMMENT_COLUMNS)
+            .where(Comment.parent_id == parent_id)
+            .order_by(Comment.created_at, Comment.id)
+            .limit(limit)
+            .subquery()
+        )
+        for parent_id in parent_ids
+    ]
+    return union_all(*parts)
+
+
+def replies(parent_id: int, page: PageParams):
+    """Direct replies of one comment, oldest first."""
+    stmt = select(*COMMENT_COLUMNS).where(Comment.parent_id == parent_id)
+    return keyset(stmt, Comment.created_at, Comment.id, page, descending=False)
+
+
+def subtree(comment_id: int, page: PageParams):
+    """A comment and everything under it, depth-first, as one range scan."""
+    root_path = select(Comment.path).where(Comment.id == comment_id).scalar_subquery()
+    stmt = select(*COMMENT_COLUMNS, Comment.path).where(_in_subtree(root_path))
+    return keyset(stmt, Comment.path, Comment.id, page, descending=False)
+
+
+async def read_threads(db: AsyncSession, video_id: int, page: PageParams) -> dict:
+    """Top-level comments with their first replies attached: two queries."""
+    result = await db.execute(top_level(video_id, page))
+    data = build_page(result.all(), page, key=reply_key)
+    roots = data["items"]
+
+    by_parent: dict[int, list] = {}
+    with_replies = [c.id for c in roots if c.reply_count]
+    if with_replies and settings.COMMENT_THREAD_REPLIES:
+        result = await db.execute(first_replies(with_replies, settings.COMMENT_THREAD_REPLIES))
+        for reply in result.all():
+            by_parent.setdefault(reply.parent_id, []).append(reply)
+
+    data["items"] = [
+        {**c._asdict(), "replies": as_dicts(sorted(by_parent.get(c.id, ()), key=reply_key))} for c in roots
+    ]
+    return data
@@ -0,0 +1,320 @@
+# app/services/trending.py
+# Trending videos from exponentially decayed engagement.
+#
+# Write side: likes, comments and view flushes append rows to
+# engagement_events in their own transaction. Nothing else happens on the
+# request path.
+#
+# Job: every TRENDING_INTERVAL_SECONDS the updater folds the events after
+# its checkpoint into trending_scores, then rebuilds the top K of the
+# periods and uploaders those events touched. It never rescans likes or
+# comments.
+#
+# Scores: an event of weight w at time t contributes w * 2^-((now - t) / h)
+# for half-life h. Every video's score shrinks by the same factor as time
+# passes, so ranking only needs w * 2^((t - epoch) / h). That quantity is
+# stored as a logarithm (it overflows a float otherwise) and never has to be
+# rewritten as time moves on.
+import asyncio
+import logging
+import math
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Iterable, Optional
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.database import AsyncSessionLocal
+from app.models.trending import (
+    engagement_events_table as events,
+    trending_scores_table as scores,
+    trending_state_table as state,
+    trending_top_table as top,
+)
+from app.models.video import Video
+from app.services.collections import VIDEO_COLUMNS
+from app.services.engagement import insert_ignoring
+
+logger = logging.getLogger(__name__)
+
+# Half-life of each period's score
+PERIODS = {"hour": 3600.0, "day": 24 * 3600.0, "week": 7 * 24 * 3600.0}
+EPOCH = datetime(2020, 1, 1)
+ALL_UPLOADERS = 0  # trending_top.uploader_id of the overall lists
+
+
+def _weights() -> dict:
+    return {
+        "view": settings.TRENDING_WEIGHT_VIEW,
+        "like": settings.TRENDING_WEIGHT_LIKE,
+        "comment": settings.TRENDING_WEIGHT_COMMENT,
+    }
+
+
+def _rate(period: str) -> float:
+    return math.log(2) / PERIODS[period]
+
+
+def _seconds(moment: datetime) -> float:
+    return (moment - EPOCH).total_seconds()
+
+
+def _logaddexp(a: Optional[float], b: float) -> float:
+    if a is None:
+        return b
+    high, low = (a, b) if a > b else (b, a)
+    return high + math.log1p(math.exp(low - high))
+
+
+def current_score(period: str, log_score: float, now: Optional[datetime] = None) -> float:
+    """The decayed score as of `now`: sum of weights halved every half-life."""
+    now = now or datetime.utcnow()
+    return math.exp(log_score - _rate(period) * _seconds(now))
+
+
+# ----- Write path -----
+
+def event_rows(kind: str, counts: dict, now: Optional[datetime] = None) -> list:
+    """Rows for engagement_events; `counts` maps video id -> number of events."""
+    now = now or datetime.utcnow()
+    weight = _weights()[kind]
+    if weight <= 0:
+        return []
+    return [
+        {"video_id": video_id, "kind": kind, "weight": weight * n, "created_at": now}
+        for video_id, n in counts.items()
+        if n > 0
+    ]
+
+
+async def record(db: AsyncSession, kind: str, video_ids: Iterable[int]):
+    """Log one `kind` event per video id. The caller commits."""
+    rows = event_rows(kind, {video_id: 1 for video_id in video_ids})
+    if rows:
+        await db.execute(events.insert(), rows)
+
+
+# ----- Reads -----
+
+async def read_top(db: AsyncSession, period: str, uploader_id: Optional[int], limit: int) -> list[dict]:
+    """The precomputed top list: an index range of at most `limit` rows.
+
+    Each video's fields plus its rank and current score, as plain dicts.
+    """
+    result = await db.execute(
+        select(*VIDEO_COLUMNS, top.c.log_score)
+        .join(top, top.c.video_id == Video.id)
+        .where(top.c.period == period, top.c.uploader_id == (uploader_id or ALL_UPLOADERS))
+        .order_by(top.c.rank)
+        .limit(limit)
+    )
+    now = datetime.utcnow()
+    hits = []
+    for rank, row in enumerate(result.all(), start=1):
+        hit = row._asdict()
+        hit.update(rank=rank, score=current_score(period, hit.pop("log_score"), now))
+        hits.append(hit)
+    return hits
+
+
+# ----- Job -----
+
+def _upsert_stmt(db: AsyncSession):
+    stmt = insert_ignoring(db, scores)
+    return stmt.on_conflict_do_update(
+        index_elements=[scores.c.period, scores.c.video_id],
+        set_={"log_score": stmt.excluded.log_score, "uploader_id": stmt.excluded.uploader_id},
+    )
+
+
+async def _rebuild_top(db: AsyncSession, period: str, uploader_id: int):
+    stmt = select(scores.c.video_id, scores.c.log_score).where(scores.c.period == period)
+    if uploader_id != ALL_UPLOADERS:
+        stmt = stmt.where(scores.c.uploader_id == uploader_id)
+    result = await db.execute(stmt.order_by(scores.c.log_score.desc()).limit(settings.TRENDING_TOP_K))
+    rows = [
+        {"period": period, "uploader_id": uploader_id, "rank": rank, "video_id": video_id, "log_score": log_score}
+        for rank, (video_id, log_score) in enumerate(result.all(), start=1)
+    ]
+    await db.execute(delete(top).where(top.c.period == period, top.c.uploader_id == uploader_id))
+    if rows:
+        await db.execute(top.insert(), rows)
+
+
+class TrendingUpdater:
+    """Folds new engagement events into the decayed scores in the background.
+
+    Progress is a checkpoint row (the last event id applied), advanced
+    with compare-and-set in the same transaction as the scores, so a
+    second worker running the same job can't apply a batch twice.
+    """
+
+    def __init__(self, interval: float, batch_size: int):
+        self.interval = interval
+        self.batch_size = batch_size
+        self._wakeup: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+        self._stopping = False
+
+        # Stats
+        self.runs = 0
+        self.failed_runs = 0
+        self.applied_events = 0
+        self.rebuilt_lists = 0
+        self.pruned_scores = 0
+        self.last_run_seconds = 0.0
+        self.last_event_id = 0
+
+    async def update(self) -> int:
+        """Apply pending events, a batch at a time. Returns how many were applied."""
+        applied = 0
+        while True:
+            started = time.perf_counter()
+            try:
+                count, full = await self._apply_batch()
+            except Exception:
+                self.failed_runs += 1
+                logger.exception("Trending update failed; retrying next round")
+                return applied
+            applied += count
+            self.runs += 1
+            self.last_run_seconds = time.perf_counter() - started
+            if not full:
+                return applied
+
+    async def _apply_batch(self) -> tuple[int, bool]:
+        async with AsyncSessionLocal() as db:
+            last = (await db.execute(select(state.c.last_event_id).where(state.c.id == 1))).scalar_one_or_none()
+            if last is None:
+                await db.execute(insert_ignoring(db, state).values(id=1, last_event_id=0).on_conflict_do_nothing())
+                last = 0
+
+            result = await db.execute(
+                select(events.c.id, events.c.video_id, events.c.weight, events.c.created_at, Video.uploader_id)
+                .outerjoin(Video, Video.id == events.c.video_id)
+                .where(events.c.id > last)
+                .order_by(events.c.id)
+                .limit(self.batch_size)
+            )
+            batch = result.all()
+            if not batch:
+                return 0, False
+            newest = batch[-1].id
+
+            # Log-sum of this batch per (period, video)
+            deltas: dict[tuple, float] = {}
+            uploaders: dict[int, int] = {}
+            for row in batch:
+                if row.uploader_id is None:
+                    continue  # video deleted since
+                uploaders[row.video_id] = row.uploader_id
+                for period in PERIODS:
+                    key = (period, row.video_id)
+                    value = math.log(row.weight) + _rate(period) * _seconds(row.created_at)
+                    deltas[key] = _logaddexp(deltas.get(key), value)
+
+            touched = defaultdict(set)  # period -> uploader ids whose lists change
+            if deltas:
+                result = await db.execute(
+                    select(scores.c.period, scores.c.video_id, scores.c.log_score)
+                    .where(scores.c.video_id.in_(list(uploaders)))
+                )
+                current = {(period, video_id): log_score for period, video_id, log_score in result.all()}
+                await db.execute(_upsert_stmt(db), [
+                    {
+                        "period": period,
+                        "video_id": video_id,
+                        "uploader_id": uploaders[video_id],
+                        "log_score": _logaddexp(current.get((period, video_id)), delta),
+                    }
+                    for (period, video_id), delta in deltas.items()
+                ])
+                for period, video_id in deltas:
+                    touched[period].add(uploaders[video_id])
+
+            # Forget scores that have decayed to nothing, and any list entry they held
+            now = _seconds(datetime.utcnow())
+            floor = math.log(settings.TRENDING_MIN_SCORE)
+            for period in PERIODS:
+                threshold = _rate(period) * now + floor
+                pruned = await db.execute(
+                    delete(scores).where(scores.c.period == period, scores.c.log_score < threshold)
+                )
+                self.pruned_scores += max(pruned.rowcount, 0)
+                await db.execute(delete(top).where(top.c.period == period, top.c.log_score < threshold))
+
+            for period, uploader_ids in touched.items():
+                for uploader_id in (ALL_UPLOADERS, *sorted(uploader_ids)):
+                    await _rebuild_top(db, period, uploader_id)
+                    self.rebuilt_lists += 1
+
+            moved = await db.execute(
+                update(state)
+                .where(state.c.id == 1, state.c.last_event_id == last)
+                .values(last_event_id=newest, updated_at=datetime.utcnow())
+            )
+            if moved.rowcount != 1:
+                # Another worker applied this batch first
+                await db.rollback()
+                return 0, False
+            await db.execute(delete(events).where(events.c.id <= newest))
+            await db.commit()
+
+        self.applied_events += len(batch)
+        self.last_event_id = newest
+        return len(batch), len(batch) >= self.batch_size
+
+    async def _run(self):
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.update()
+
+    def start(self):
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._stopping = True
+            self._wakeup.set()
+            await self._task
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "runs": self.runs,
+            "failed_runs": self.failed_runs,
+            "applied_events": self.applied_events,
+            "rebuilt_lists": self.rebuilt_lists,
+            "pruned_scores": self.pruned_scores,
+            "last_event_id": self.last_event_id,
+            "last_run_seconds": self.last_run_seconds,
+            "interval_seconds": self.interval,
+        }
+
+
+trending_updater = TrendingUpdater(
+    interval=settings.TRENDING_INTERVAL_SECONDS,
+    batch_size=settings.TRENDING_BATCH_EVENTS,
+)
+
+
+async def _main():
+    # python -m app.services.trending  -- apply all pending events now
+    from app.database import dispose_engines
+
+    applied = await trending_updater.update()
+    print(f"Applied {applied} events")
+    await dispose_engines()
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
@@ -0,0 +1,297 @@
+# app/services/uploads.py
+# Resumable chunked uploads into local media storage.
+#
+# An upload is created with its final size and gets a file at
+# MEDIA_ROOT/uploads/<id>.part. Each chunk is a PATCH whose Upload-Offset
+# must equal the bytes received so far. Its body is written straight to
+# that position as it streams in and fed to a running SHA-256, so a chunk
+# is never buffered whole and no byte is read back. The new offset is
+# stored once the chunk is fsynced, also when the client drops mid-chunk,
+# so a retry resumes from the last durable byte. When the last byte
+# arrives the file is renamed to MEDIA_ROOT/media/<id>: assembly is a
+# rename and the digest is already known.
+#
+# Running hashes are kept in memory (a bounded LRU). After a restart, or
+# when a chunk lands on another worker, the received prefix is hashed from
+# disk once and hashing continues incrementally from there.
+#
+# File work (open and lock, writes with their hashing, fsync) runs in worker
+# threads, so a slow disk stalls the upload rather than the event loop.
+import asyncio
+import hashlib
+import os
+import secrets
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import AsyncIterator, Iterable, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.requests import ClientDisconnect
+
+from app.core.config import settings
+from app.models.upload import Upload
+from app.schemas.upload_schema import UploadCreate
+
+try:
+    import fcntl
+except ImportError:  # Windows: chunks of one upload aren't locked against each other
+    fcntl = None
+
+_HASH_READ_BYTES = 1024 * 1024
+
+
+def part_path(upload_id: str) -> str:
+    return os.path.join(settings.MEDIA_ROOT, "uploads", f"{upload_id}.part")
+
+
+def media_path(upload_id: str) -> str:
+    return os.path.join(settings.MEDIA_ROOT, "media", upload_id)
+
+
+def media_url(upload_id: str) -> str:
+    return f"{settings.MEDIA_PUBLIC_URL.rstrip('/')}/media/{upload_id}"
+
+
+def view(upload: Upload) -> dict:
+    """The UploadRead fields of `upload`."""
+    return {
+        "id": upload.id,
+        "filename": upload.filename,
+        "content_type": upload.content_type,
+        "size": upload.size,
+        "offset": upload.offset,
+        "created_at": upload.created_at,
+        "completed_at": upload.completed_at,
+        "sha256": upload.sha256,
+        "media_url": media_url(upload.id) if upload.completed_at else None,
+    }
+
+
+# ----- Running hashes -----
+
+class Hashers:
+    """SHA-256 state per in-progress upload, valid at a known offset."""
+
+    def __init__(self, max_uploads: int):
+        self.max_uploads = max_uploads
+        self._states: OrderedDict[str, tuple[int, "hashlib._Hash"]] = OrderedDict()
+        self.rebuilt = 0
+
+    def take(self, upload_id: str, offset: int):
+        state = self._states.pop(upload_id, None)
+        if state is None or state[0] != offset:
+            return None
+        return state[1]
+
+    def put(self, upload_id: str, offset: int, hasher):
+        self._states[upload_id] = (offset, hasher)
+        while len(self._states) > self.max_uploads:
+            self._states.popitem(last=False)
+
+    def drop(self, upload_id: str):
+        self._states.pop(upload_id, None)
+
+    def stats(self) -> dict:
+        return {"tracked": len(self._states), "max_uploads": self.max_uploads, "rebuilt": self.rebuilt}
+
+
+hashers = Hashers(max_uploads=settings.UPLOAD_HASHERS_MAX)
+
+
+def _hash_prefix(path: str, length: int):
+    hasher = hashlib.sha256()
+    with open(path, "rb") as file:
+        while length > 0:
+            piece = file.read(min(_HASH_READ_BYTES, length))
+            if not piece:
+                break
+            hasher.update(piece)
+            length -= len(piece)
+    return hasher
+
+
+async def _hasher_at(upload_id: str, path: str, offset: int):
+    hasher = hashers.take(upload_id, offset)
+    if hasher is None and offset == 0:
+        hasher = hashlib.sha256()
+    elif hasher is None:
+        hashers.rebuilt += 1
+        hasher = await asyncio.to_thread(_hash_prefix, path, offset)
+    return hasher
+
+
+# ----- Writes -----
+
+async def create(db: AsyncSession, user_id: int, payload: UploadCreate) -> Upload:
+    upload = Upload(
+        id=secrets.token_hex(16),
+        user_id=user_id,
+        filename=payload.filename,
+        content_type=payload.content_type,
+        size=payload.size,
+        offset=0,
+        expected_sha256=payload.sha256.lower() if payload.sha256 else None,
+    )
+    path = part_path(upload.id)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    os.close(os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644))
+    db.add(upload)
+    await db.commit()
+    return upload
+
+
+def _open_locked(path: str) -> int:
+    try:
+        fd = os.open(path, os.O_WRONLY)
+    except FileNotFoundError:
+        raise HTTPException(status_code=409, detail="Upload file is missing; start a new upload")
+    if fcntl is not None:
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            raise HTTPException(status_code=409, detail="Another chunk of this upload is being written")
+    return fd
+
+
+@asynccontextmanager
+async def _chunk_lock(path: str):
+    """The part file open for writing, locked against other chunks of the upload.
+
+    flock locks belong to the open file, so this excludes concurrent PATCHes
+    in the same worker as well as in other workers on the host.
+    """
+    fd = await asyncio.to_thread(_open_locked, path)
+    try:
+        yield fd
+    finally:
+        os.close(fd)
+
+
+def _write_at(fd: int, hasher, piece: bytes, position: int) -> int:
+    """Write all of `piece` at `position` and hash it; returns the new position."""
+    view_ = memoryview(piece)
+    while view_:
+        written = os.pwrite(fd, view_, position)
+        hasher.update(view_[:written])
+        view_ = view_[written:]
+        position += written
+    return position
+
+
+def _offset_conflict(expected: int) -> HTTPException:
+    return HTTPException(
+        status_code=409,
+        detail=f"Upload-Offset must be {expected}",
+        headers={"Upload-Offset": str(expected)},
+    )
+
+
+async def write_chunk(
+    db: AsyncSession,
+    upload_id: str,
+    offset: int,
+    chunks: AsyncIterator[bytes],
+    declared_length: Optional[int] = None,
+) -> Upload:
+    """Append the request body at `offset`; completes the upload at its last byte."""
+    async with _chunk_lock(part_path(upload_id)) as fd:
+        # Read under the lock: the offset can't move until it's released
+        upload = await db.get(Upload, upload_id, populate_existing=True)
+        # Don't hold a transaction open while the body streams in
+        await db.commit()
+        if upload is None:
+            raise HTTPException(status_code=404, detail="Upload not found")
+        if upload.completed_at is not None:
+            raise HTTPException(status_code=409, detail="Upload is already complete")
+        if offset != upload.offset:
+            raise _offset_conflict(upload.offset)
+
+        limit = min(upload.size - offset, settings.UPLOAD_MAX_CHUNK_BYTES)
+        if declared_length is not None and declared_length > limit:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Chunk too large: at most {limit} bytes fit at this offset",
+                headers={"Upload-Offset": str(offset)},
+            )
+
+        hasher = await _hasher_at(upload_id, part_path(upload_id), offset)
+        position = offset
+        overflow = False
+        try:
+            async for piece in chunks:
+                room = offset + limit - position
+                if len(piece) > room:
+                    piece, overflow = piece[:room], True
+                position = await asyncio.to_thread(_write_at, fd, hasher, piece, position)
+                if overflow:
+                    break
+        except ClientDisconnect:
+            pass  # keep what arrived; the client resumes from the stored offset
+
+        if position > offset:
+            await asyncio.to_thread(os.fsync, fd)
+            await db.execute(update(Upload).where(Upload.id == upload_id).values(offset=position))
+            await db.commit()
+            upload.offset = position
+        hashers.put(upload_id, position, hasher)
+
+        if position == upload.size:
+            await _complete(db, upload, hasher)
+
+    if overflow and upload.completed_at is None:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Chunk too large: stored the first {position - offset} bytes",
+            headers={"Upload-Offset": str(position)},
+        )
+    return upload
+
+
+async def _complete(db: AsyncSession, upload: Upload, hasher):
+    digest = hasher.hexdigest()
+    hashers.drop(upload.id)
+    if upload.expected_sha256 and digest != upload.expected_sha256:
+        await discard(db, upload)
+        raise HTTPException(status_code=422, detail="Checksum mismatch: the upload was discarded")
+
+    target = media_path(upload.id)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    os.replace(part_path(upload.id), target)
+    upload.sha256 = digest
+    upload.completed_at = datetime.utcnow()
+    await db.execute(
+        update(Upload)
+        .where(Upload.id == upload.id)
+        .values(sha256=upload.sha256, completed_at=upload.completed_at)
+    )
+    await db.commit()
+
+
+async def discard(db: AsyncSession, upload: Upload):
+    """Delete an upload and its file."""
+    await db.execute(delete(Upload).where(Upload.id == upload.id))
+    await db.commit()
+    hashers.drop(upload.id)
+    remove_files([upload.id])
+
+
+def remove_files(upload_ids: Iterable[str]):
+    for upload_id in upload_ids:
+        for path in (part_path(upload_id), media_path(upload_id)):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+async def completed(db: AsyncSession, upload_id: str):
+    """(content_type, sha256) of a completed upload, or None."""
+    result = await db.execute(
+        select(Upload.content_type, Upload.sha256)
+        .where(Upload.id == upload_id, Upload.completed_at.isnot(None))
+    )
+    return result.one_or_none()
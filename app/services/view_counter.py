@@ -0,0 +1,155 @@
+# app/services/view_counter.py
+import asyncio
+import logging
+import time
+from collections import defaultdict
+
+from sqlalchemy import bindparam, update
+
+from app.core.config import settings
+from app.database import engine
+from app.models.trending import engagement_events_table
+from app.models.video import Video
+from app.services import trending
+from app.utils.response_cache import response_cache
+
+logger = logging.getLogger(__name__)
+
+videos = Video.__table__
+
+# One statement, executed as executemany over the whole batch
+_flush_stmt = (
+    update(videos)
+    .where(videos.c.id == bindparam("b_video_id"))
+    .values(views=videos.c.views + bindparam("b_views"))
+)
+
+
+class ViewCounter:
+    """Buffers view events in memory and writes them to `videos.views` in batches.
+
+    One counter per video id. A flush swaps the whole dict out before its
+    first await, so views recorded during the write land in the next batch.
+    `record` is meant to be called from the event loop; it never touches
+    the database.
+    """
+
+    def __init__(self, flush_interval: float, max_pending: int, max_videos: int):
+        self.counts: defaultdict[int, int] = defaultdict(int)
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.max_videos = max_videos
+
+        self._pending = 0
+        self._wakeup: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+        self._stopping = False
+
+        # Stats
+        self.recorded_events = 0
+        self.flushed_events = 0
+        self.dropped_events = 0
+        self.flushes = 0
+        self.failed_flushes = 0
+        self.last_batch_size = 0
+        self.max_batch_size = 0
+        self.last_flush_seconds = 0.0
+        self.max_flush_seconds = 0.0
+
+    def record(self, video_id: int, count: int = 1) -> bool:
+        if video_id not in self.counts and len(self.counts) >= self.max_videos:
+            self.dropped_events += count
+            return False
+        self.counts[video_id] += count
+        self._pending += count
+        self.recorded_events += count
+
+        if self._pending >= self.max_pending and self._wakeup is not None:
+            self._wakeup.set()
+        return True
+
+    def _drain(self) -> dict[int, int]:
+        batch, self.counts = self.counts, defaultdict(int)
+        self._pending = 0
+        return batch
+
+    async def flush(self) -> int:
+        batch = self._drain()
+        if not batch:
+            return 0
+
+        started = time.perf_counter()
+        params = [{"b_video_id": vid, "b_views": n} for vid, n in batch.items()]
+        try:
+            async with engine.begin() as conn:
+                await conn.execute(_flush_stmt, params)
+                # Views for unknown ids are logged too; the trending job skips them.
+                # No rows when views carry no weight: an empty executemany would
+                # insert one row of defaults.
+                rows = trending.event_rows("view", batch)
+                if rows:
+                    await conn.execute(engagement_events_table.insert(), rows)
+        except Exception:
+            self.failed_flushes += 1
+            logger.exception("View flush failed; re-buffering %d videos", len(batch))
+            for vid, n in batch.items():
+                self.recorded_events -= n  # record() counts them again
+                self.record(vid, n)
+            return 0
+        response_cache.invalidate(*(f"video:{vid}" for vid in batch))
+
+        elapsed = time.perf_counter() - started
+        events = sum(batch.values())
+        self.flushes += 1
+        self.flushed_events += events
+        self.last_batch_size = len(batch)
+        self.max_batch_size = max(self.max_batch_size, len(batch))
+        self.last_flush_seconds = elapsed
+        self.max_flush_seconds = max(self.max_flush_seconds, elapsed)
+        return events
+
+    async def _run(self):
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    def start(self):
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        # Let an in-progress flush finish instead of cancelling it mid-write
+        if self._task is not None:
+            self._stopping = True
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        await self.flush()
+
+    def stats(self) -> dict:
+        return {
+            "pending_events": self._pending,
+            "buffered_videos": len(self.counts),
+            "recorded_events": self.recorded_events,
+            "flushed_events": self.flushed_events,
+            "dropped_events": self.dropped_events,
+            "flushes": self.flushes,
+            "failed_flushes": self.failed_flushes,
+            "last_batch_size": self.last_batch_size,
+            "max_batch_size": self.max_batch_size,
+            "last_flush_seconds": self.last_flush_seconds,
+            "max_flush_seconds": self.max_flush_seconds,
+            "flush_interval_seconds": self.flush_interval,
+        }
+
+
+view_counter = ViewCounter(
+    flush_interval=settings.VIEW_FLUSH_INTERVAL_SECONDS,
+    max_pending=settings.VIEW_FLUSH_MAX_PENDING,
+    max_videos=settings.VIEW_BUFFER_MAX_VIDEOS,
+)
@@ -0,0 +1,286 @@
+# app/utils/admission.py
+import asyncio
+import math
+import time
+from collections import OrderedDict, deque
+from typing import Optional
+
+from fastapi import Depends, HTTPException, status
+from starlette.responses import JSONResponse
+
+from app.core.config import settings
+from app.core.principals import Principal
+from app.utils.dependencies import get_current_principal
+
+
+class Limiter:
+    """Concurrency limit with a bounded FIFO wait queue and a queueing deadline.
+
+    The limit adapts AIMD-style to the service time of admitted requests:
+    it grows by about one per limit's worth of fast completions and shrinks
+    by DECREASE (at most once per latency target) when a completion is
+    slower than the target. Waiting is bounded twice: by `max_queue` and by
+    `queue_timeout`. A request that would exceed either is shed instead
+    of joining an unbounded backlog.
+    """
+
+    DECREASE = 0.9
+
+    def __init__(
+        self,
+        name: str,
+        max_concurrency: int,
+        max_queue: int,
+        queue_timeout: float,
+        latency_target: float,
+        min_concurrency: int = 1,
+    ):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min(min_concurrency, max_concurrency)
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.latency_target = latency_target
+        self.limit = float(max_concurrency)
+        self.in_flight = 0
+        self._waiters: deque[asyncio.Future] = deque()
+        self._last_decrease = 0.0
+        self._service_time = latency_target  # moving average, for Retry-After
+
+        # Stats
+        self.admitted = 0
+        self.queued_total = 0
+        self.max_queued = 0
+        self.shed_queue_full = 0
+        self.shed_timeout = 0
+
+    async def acquire(self) -> bool:
+        # Fast path: a free slot and nobody ahead
+        if self.in_flight < int(self.limit) and not self._waiters:
+            self.in_flight += 1
+            self.admitted += 1
+            return True
+        if len(self._waiters) >= self.max_queue:
+            self.shed_queue_full += 1
+            return False
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self.queued_total += 1
+        self.max_queued = max(self.max_queued, len(self._waiters))
+        try:
+            await asyncio.wait_for(waiter, self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.shed_timeout += 1
+            return False
+        except asyncio.CancelledError:
+            # A slot handed over just as the client went away goes to the next waiter
+            if waiter.done() and not waiter.cancelled():
+                self.in_flight -= 1
+                self._wake()
+            raise
+        finally:
+            if not waiter.done() or waiter.cancelled():
+                try:
+                    self._waiters.remove(waiter)
+                except ValueError:
+                    pass
+        self.admitted += 1
+        return True
+
+    def release(self, service_seconds: float):
+        self.in_flight -= 1
+        self._service_time += (service_seconds - self._service_time) * 0.1
+        now = time.monotonic()
+        if service_seconds > self.latency_target:
+            if now - self._last_decrease >= self.latency_target:
+                self.limit = max(self.min_concurrency, self.limit * self.DECREASE)
+                self._last_decrease = now
+        else:
+            self.limit = min(self.max_concurrency, self.limit + 1 / self.limit)
+        self._wake()
+
+    def _wake(self):
+        # Slots pass straight to waiters, in arrival order
+        while self._waiters and self.in_flight < int(self.limit):
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(True)
+
+    def retry_after(self) -> int:
+        # Time for the current backlog to drain at the current limit
+        backlog = len(self._waiters) + self.in_flight
+        return max(1, math.ceil(backlog * self._service_time / max(self.limit, 1)))
+
+    def stats(self) -> dict:
+        return {
+            "limit": round(self.limit, 2),
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "queued": len(self._waiters),
+            "max_queue": self.max_queue,
+            "max_queued": self.max_queued,
+            "admitted": self.admitted,
+            "queued_total": self.queued_total,
+            "shed_queue_full": self.shed_queue_full,
+            "shed_timeout": self.shed_timeout,
+            "service_time_seconds": round(self._service_time, 4),
+        }
+
+
+def _limiters() -> dict[str, Limiter]:
+    timeout = settings.ADMISSION_QUEUE_TIMEOUT_SECONDS
+    return {
+        "reads": Limiter(
+            "reads", settings.ADMISSION_READ_CONCURRENCY, settings.ADMISSION_READ_QUEUE,
+            timeout, settings.ADMISSION_READ_LATENCY_TARGET_MS / 1000,
+        ),
+        "writes": Limiter(
+            "writes", settings.ADMISSION_WRITE_CONCURRENCY, settings.ADMISSION_WRITE_QUEUE,
+            timeout, settings.ADMISSION_WRITE_LATENCY_TARGET_MS / 1000,
+        ),
+        "auth": Limiter(
+            "auth", settings.ADMISSION_AUTH_CONCURRENCY, settings.ADMISSION_AUTH_QUEUE,
+            timeout, settings.ADMISSION_AUTH_LATENCY_TARGET_MS / 1000,
+        ),
+    }
+
+
+limiters = _limiters()
+
+_SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+# Observability has to keep answering under overload; bulk jobs are
+# admin-only, run for minutes and batch their own writes; media transfers
+# are bound by the client's bandwidth and would pin slots for their length
+_EXEMPT_PREFIXES = ("/metrics", "/internal", "/bulk", "/media", "/uploads", "/docs", "/openapi.json")
+
+
+def route_class(scope) -> Optional[str]:
+    path = scope["path"]
+    if path.startswith(_EXEMPT_PREFIXES):
+        return None
+    if path.startswith("/auth"):
+        return "auth"  # bcrypt-bound
+    return "reads" if scope["method"] in _SAFE_METHODS else "writes"  # writes share one SQLite writer
+
+
+class AdmissionMiddleware:
+    """Admits each HTTP request through its route class's limiter.
+
+    Requests that can't get a slot in time are answered 503 with
+    Retry-After before any routing, parsing or database work.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        name = route_class(scope)
+        if name is None:
+            await self.app(scope, receive, send)
+            return
+
+        limiter = limiters[name]
+        if not await limiter.acquire():
+            response = JSONResponse(
+                {"detail": "Server is busy, try again later"},
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                headers={"Retry-After": str(limiter.retry_after())},
+            )
+            await response(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release(time.perf_counter() - started)
+
+
+# ----- Per-user rate limits -----
+
+class TokenBuckets:
+    """One token bucket per user: `rate` tokens a second, up to `burst`.
+
+    Buckets live in a bounded LRU. An evicted bucket has been idle longest,
+    and an idle bucket refills to full, so evicting one loses nothing.
+    """
+
+    def __init__(self, name: str, rate: float, burst: int, max_keys: int):
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self._buckets: OrderedDict[int, tuple[float, float]] = OrderedDict()
+
+        # Stats
+        self.allowed = 0
+        self.throttled = 0
+
+    def take(self, key: int) -> float:
+        """Spend one token. Returns 0 if allowed, else seconds until one is available."""
+        now = time.monotonic()
+        tokens, updated = self._buckets.get(key, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+        if tokens < 1:
+            self.throttled += 1
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            return (1 - tokens) / self.rate
+        self._buckets[key] = (tokens - 1, now)
+        self._buckets.move_to_end(key)
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        self.allowed += 1
+        return 0.0
+
+    def stats(self) -> dict:
+        return {
+            "rate_per_second": self.rate,
+            "burst": self.burst,
+            "tracked_users": len(self._buckets),
+            "allowed": self.allowed,
+            "throttled": self.throttled,
+        }
+
+
+rate_limits = {
+    # Likes, watch-later and subscriptions
+    "engagement": TokenBuckets(
+        "engagement", settings.RATE_LIMIT_ENGAGEMENT_PER_SECOND, settings.RATE_LIMIT_ENGAGEMENT_BURST,
+        settings.RATE_LIMIT_MAX_USERS,
+    ),
+    "comments": TokenBuckets(
+        "comments", settings.RATE_LIMIT_COMMENTS_PER_SECOND, settings.RATE_LIMIT_COMMENTS_BURST,
+        settings.RATE_LIMIT_MAX_USERS,
+    ),
+}
+
+
+def rate_limit(name: str):
+    """Dependency charging one token from the caller's `name` bucket; 429 when empty."""
+    buckets = rate_limits[name]
+
+    async def check(current_user: Principal = Depends(get_current_principal)):
+        if buckets.rate <= 0:
+            return
+        wait = buckets.take(current_user.id)
+        if wait:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Rate limit exceeded, slow down",
+                headers={"Retry-After": str(math.ceil(wait))},
+            )
+
+    return check
+
+
+def stats() -> dict:
+    return {
+        "limiters": {name: limiter.stats() for name, limiter in limiters.items()},
+        "rate_limits": {name: buckets.stats() for name, buckets in rate_limits.items()},
+    }
@@ -0,0 +1,153 @@
+# app/utils/batch_loader.py
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Hashable, Iterable, List, Optional
+
+from fastapi import HTTPException, Query
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class BatchLoader:
+    """DataLoader-style lookups by key, shared by every request in the process.
+
+    Single-flight: a key already being fetched joins that fetch instead of
+    issuing its own query, so a thousand concurrent requests for one video
+    cost one lookup. Batching: new keys wait up to `window` seconds (or
+    until `max_batch` are waiting) and are then fetched together with one
+    `fetch(keys)` call, which returns {key: value} and leaves missing keys
+    out; those load as None.
+
+    Nothing is kept once a fetch finishes, so there is no cache to go stale.
+    A write that changes a key calls `forget(key)`: loads after it start a
+    new fetch rather than joining one that may have read the old row.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        fetch: Callable[[list], Awaitable[dict]],
+        window: float,
+        max_batch: int,
+    ):
+        self.name = name
+        self.fetch = fetch
+        self.window = window
+        self.max_batch = max_batch
+        self._pending: dict[Hashable, asyncio.Future] = {}  # waiting for the window
+        self._in_flight: dict[Hashable, asyncio.Future] = {}  # being fetched
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: set[asyncio.Task] = set()
+
+        # Stats
+        self.loads = 0
+        self.coalesced = 0
+        self.batches = 0
+        self.fetched_keys = 0
+        self.largest_batch = 0
+        self.failed_batches = 0
+
+    async def load(self, key: Hashable) -> Any:
+        # Shielded: a caller that goes away doesn't cancel the fetch others share
+        return await asyncio.shield(self._future(key))
+
+    async def load_many(self, keys: Iterable[Hashable]) -> List[Any]:
+        """Values in the order of `keys`, None where a key doesn't exist."""
+        futures = [self._future(key) for key in keys]
+        if not futures:
+            return []
+        return await asyncio.shield(asyncio.gather(*futures))
+
+    def forget(self, key: Hashable):
+        # Keys still pending haven't been read yet and stay
+        self._in_flight.pop(key, None)
+
+    def _future(self, key: Hashable) -> asyncio.Future:
+        self.loads += 1
+        future = self._in_flight.get(key) or self._pending.get(key)
+        if future is not None:
+            self.coalesced += 1
+            return future
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending[key] = future
+        if len(self._pending) >= self.max_batch:
+            self._dispatch()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._dispatch)
+        return future
+
+    def _dispatch(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, {}
+        if not batch:
+            return
+        self._in_flight.update(batch)
+        task = asyncio.get_running_loop().create_task(self._run(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: dict):
+        self.batches += 1
+        self.fetched_keys += len(batch)
+        self.largest_batch = max(self.largest_batch, len(batch))
+        try:
+            values = await self.fetch(list(batch))
+        except Exception as exc:
+            self.failed_batches += 1
+            logger.exception("%s loader: fetching %d keys failed", self.name, len(batch))
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(exc)
+        else:
+            for key, future in batch.items():
+                if not future.done():
+                    future.set_result(values.get(key))
+        finally:
+            for key, future in batch.items():
+                if self._in_flight.get(key) is future:
+                    del self._in_flight[key]
+
+    def stats(self) -> dict:
+        return {
+            "loads": self.loads,
+            "coalesced": self.coalesced,
+            "batches": self.batches,
+            "fetched_keys": self.fetched_keys,
+            "largest_batch": self.largest_batch,
+            "failed_batches": self.failed_batches,
+            "pending": len(self._pending),
+            "in_flight": len(self._in_flight),
+            "window_ms": self.window * 1000,
+            "max_batch": self.max_batch,
+        }
+
+
+# ----- Multi-get requests -----
+
+def batch_ids(
+    ids: List[str] = Query(..., description="Ids to fetch: `ids=1,2,3` or `ids=1&ids=2`"),
+) -> List[int]:
+    """The requested ids, de-duplicated in request order."""
+    try:
+        parsed = [int(part) for value in ids for part in value.split(",") if part.strip()]
+    except ValueError:
+        raise HTTPException(status_code=422, detail="ids must be integers")
+    unique = list(dict.fromkeys(parsed))
+    if not unique:
+        raise HTTPException(status_code=422, detail="At least one id is required")
+    if len(unique) > settings.MAX_BATCH_IDS:
+        raise HTTPException(status_code=422, detail=f"At most {settings.MAX_BATCH_IDS} ids per request")
+    return unique
+
+
+def batch_result(ids: List[int], values: List[Any]) -> dict:
+    return {
+        "items": [value for value in values if value is not None],
+        "missing": [key for key, value in zip(ids, values) if value is None],
+    }
@@ -1,35 +1,87 @@
 # app/utils/dependencies.py
+from calendar import timegm
 from fastapi import Depends, HTTPException, status
+from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from app.core.security import SECRET_KEY, ALGORITHM
-from app.database import AsyncSessionLocal
-from app.models.user import User
+from app.core.principals import Principal, principal_cache
+from app.database import AsyncSessionLocal, ReadSessionLocal
+from app.models.user import User, RoleEnum
 from sqlalchemy.future import select
 
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
+
+credentials_exception = HTTPException(
+    status_code=status.HTTP_401_UNAUTHORIZED,
+    detail="Could not validate credentials",
+    headers={"WWW-Authenticate": "Bearer"},
+)
+
+
 async def get_db():
     async with AsyncSessionLocal() as session:
         yield session
 
 
-async def get_current_user(token: str = Depends(lambda: None), db=Depends(get_db)):
-    from fastapi.security import OAuth2PasswordBearer
-    oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
-    token = await oauth2_scheme()
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-    )
+async def get_read_db():
+    # Read-only pool: GET routes never wait for the writer connection
+    async with ReadSessionLocal() as session:
+        yield session
+
+
+async def _principal_from_db(user_filter, issued_at) -> Principal:
+    async with ReadSessionLocal() as session:
+        result = await session.execute(
+            select(User.id, User.email, User.role, User.credentials_changed_at)
+            .where(user_filter, User.deleted_at.is_(None))
+        )
+        row = result.one_or_none()
+    if row is None:
+        raise credentials_exception
+    # iat has whole seconds; a token from the second of the change is kept
+    if row.credentials_changed_at is not None and (
+        issued_at is None or issued_at < timegm(row.credentials_changed_at.utctimetuple())
+    ):
+        raise credentials_exception
+    return Principal(id=row.id, email=row.email, role=row.role)
+
+
+async def get_current_principal(token: str = Depends(oauth2_scheme)) -> Principal:
+    principal = principal_cache.get(token)
+    if principal is not None:
+        return principal
 
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
-            raise credentials_exception
     except JWTError:
         raise credentials_exception
+    email = payload.get("sub")
+    user_id = payload.get("uid")
+    if email is None:
+        raise credentials_exception
+
+    # The users row decides, not the claims: deletions and revocations made
+    # by any worker apply here once the cached entry expires. One primary-key
+    # probe per token per PRINCIPAL_CACHE_TTL_SECONDS.
+    if user_id is None:
+        # Tokens issued before the id claim existed
+        principal = await _principal_from_db(User.email == email, payload.get("iat"))
+    else:
+        principal = await _principal_from_db(User.id == user_id, payload.get("iat"))
 
-    result = await db.execute(select(User).where(User.email == email))
-    user = result.scalar_one_or_none()
-    if not user:
+    principal_cache.put(token, principal, token_exp=payload.get("exp"))
+    return principal
+
+
+async def get_current_user(principal: Principal = Depends(get_current_principal), db=Depends(get_db)):
+    # Full User row, for routes that read more than id/role
+    user = await db.get(User, principal.id)
+    if not user or user.deleted_at is not None:
         raise credentials_exception
     return user
+
+
+async def require_admin(principal: Principal = Depends(get_current_principal)) -> Principal:
+    if principal.role != RoleEnum.admin:
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return principal
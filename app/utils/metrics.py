@@ -0,0 +1,275 @@
+# app/utils/metrics.py
+import bisect
+import logging
+import re
+import time
+from collections import defaultdict
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, Optional
+
+from sqlalchemy import event
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200)
+
+
+class Histogram:
+    """Prometheus-style histogram keyed by label values.
+
+    Buckets are stored non-cumulative so observing is one bisect and one
+    increment; they are summed up when rendered.
+    """
+
+    def __init__(self, name: str, help_text: str, label_names: tuple, buckets: tuple):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self._counts: dict[tuple, list] = {}
+        self._sums: dict[tuple, float] = defaultdict(float)
+
+    def observe(self, labels: tuple, value: float):
+        counts = self._counts.get(labels)
+        if counts is None:
+            counts = self._counts[labels] = [0] * (len(self.buckets) + 1)
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        self._sums[labels] += value
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help_text}"
+        yield f"# TYPE {self.name} histogram"
+        for labels, counts in sorted(self._counts.items()):
+            base = _label_pairs(self.label_names, labels)
+            running = 0
+            for bound, count in zip(self.buckets, counts):
+                running += count
+                yield f'{self.name}_bucket{{{base},le="{_number(bound)}"}} {running}'
+            running += counts[-1]
+            yield f'{self.name}_bucket{{{base},le="+Inf"}} {running}'
+            yield f"{self.name}_sum{{{base}}} {_number(self._sums[labels])}"
+            yield f"{self.name}_count{{{base}}} {running}"
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, label_names: tuple):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self._values: dict[tuple, float] = defaultdict(float)
+
+    def inc(self, labels: tuple = (), amount: float = 1):
+        self._values[labels] += amount
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help_text}"
+        yield f"# TYPE {self.name} counter"
+        for labels, value in sorted(self._values.items()):
+            yield f"{self.name}{_braced(self.label_names, labels)} {_number(value)}"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_pairs(names: tuple, values: tuple) -> str:
+    return ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+
+
+def _braced(names: tuple, values: tuple) -> str:
+    return "{" + _label_pairs(names, values) + "}" if names else ""
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+# ----- Per-request SQL accounting -----
+
+# Expanding IN lists render one placeholder per value; fold them so
+# "IN (?, ?)" and "IN (?, ?, ?)" count as the same statement shape
+_PARAM = r"(?:\?|%s|\$\d+|:\w+)"
+_ITEM = rf"(?:{_PARAM}|\(\s*{_PARAM}(?:\s*,\s*{_PARAM})*\s*\))"
+_IN_LIST = re.compile(rf"\bIN\s*\(\s*{_ITEM}(?:\s*,\s*{_ITEM})*\s*\)", re.IGNORECASE)
+
+
+def statement_shape(statement: str) -> str:
+    return " ".join(_IN_LIST.sub("IN (...)", statement).split())
+
+
+@dataclass
+class RequestStats:
+    queries: int = 0
+    db_seconds: float = 0.0
+    statements: dict = field(default_factory=lambda: defaultdict(int))
+    # (seconds, statement) of the slowest statements, kept short
+    slowest: list = field(default_factory=list)
+
+    def add(self, statement: str, seconds: float):
+        self.queries += 1
+        self.db_seconds += seconds
+        self.statements[statement] += 1
+        keep = settings.METRICS_SLOW_STATEMENTS
+        if len(self.slowest) < keep:
+            bisect.insort(self.slowest, (seconds, statement))
+        elif keep and seconds > self.slowest[0][0]:
+            self.slowest.pop(0)
+            bisect.insort(self.slowest, (seconds, statement))
+
+    def repeated_shapes(self, threshold: int) -> dict:
+        # Cheap common case: no single statement text is repeated enough
+        if self.queries <= threshold:
+            return {}
+        shapes = defaultdict(int)
+        for statement, count in self.statements.items():
+            shapes[statement_shape(statement)] += count
+        return {shape: count for shape, count in shapes.items() if count > threshold}
+
+
+_current_request: ContextVar[Optional[RequestStats]] = ContextVar("current_request_stats", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_request.get() is not None:
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_request.get()
+    if stats is None:
+        return
+    started = conn.info.get("query_started")
+    if started:
+        stats.add(statement, time.perf_counter() - started.pop())
+
+
+def _handle_error(exception_context):
+    # A failed statement never reaches after_cursor_execute
+    connection = exception_context.connection
+    if connection is not None and connection.info.get("query_started"):
+        connection.info["query_started"].pop()
+
+
+def instrument_engine(engine):
+    """Attribute the engine's statements to the request that issued them."""
+    sync_engine = engine.sync_engine
+    if event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(sync_engine, "handle_error", _handle_error)
+
+
+# ----- Registry -----
+
+class Metrics:
+    def __init__(self):
+        labels = ("method", "route")
+        self.requests = Counter("http_requests_total", "HTTP requests by route and status.", ("method", "route", "status"))
+        self.latency = Histogram(
+            "http_request_duration_seconds", "Time spent serving the request.", labels, LATENCY_BUCKETS
+        )
+        self.db_queries = Histogram(
+            "http_request_db_queries", "SQL statements executed per request.", labels, QUERY_COUNT_BUCKETS
+        )
+        self.db_time = Histogram(
+            "http_request_db_duration_seconds", "Time spent in SQL statements per request.", labels, LATENCY_BUCKETS
+        )
+        self.slow_requests = Counter(
+            "http_slow_requests_total", "Requests slower than METRICS_SLOW_REQUEST_MS.", labels
+        )
+        self.n_plus_one = Counter(
+            "http_n_plus_one_requests_total",
+            "Requests that repeated one statement shape more than METRICS_N_PLUS_ONE_THRESHOLD times.",
+            labels,
+        )
+        self.in_flight = 0
+        self._collectors: list[tuple[str, Callable[[], dict]]] = []
+
+    def register_collector(self, prefix: str, stats: Callable[[], dict]):
+        """Export the numeric fields of a component's stats() as gauges."""
+        self._collectors.append((prefix, stats))
+
+    def observe(self, method: str, route: str, status: int, seconds: float, stats: RequestStats):
+        labels = (method, route)
+        self.requests.inc((method, route, str(status)))
+        self.latency.observe(labels, seconds)
+        self.db_queries.observe(labels, stats.queries)
+        self.db_time.observe(labels, stats.db_seconds)
+
+        if seconds * 1000 >= settings.METRICS_SLOW_REQUEST_MS:
+            self.slow_requests.inc(labels)
+            logger.warning(
+                "Slow request %s %s: %.1f ms, %d queries, %.1f ms in SQL%s",
+                method, route, seconds * 1000, stats.queries, stats.db_seconds * 1000,
+                "".join(f"\n  {took * 1000:.1f} ms  {sql}" for took, sql in reversed(stats.slowest)),
+            )
+
+        repeated = stats.repeated_shapes(settings.METRICS_N_PLUS_ONE_THRESHOLD)
+        if repeated:
+            self.n_plus_one.inc(labels)
+            for shape, count in repeated.items():
+                logger.warning("Possible N+1 in %s %s: statement ran %d times: %s", method, route, count, shape)
+
+    def render(self) -> str:
+        lines = []
+        for metric in (self.requests, self.latency, self.db_queries, self.db_time, self.slow_requests, self.n_plus_one):
+            lines.extend(metric.render())
+        lines.append("# HELP http_requests_in_flight Requests currently being served.")
+        lines.append("# TYPE http_requests_in_flight gauge")
+        lines.append(f"http_requests_in_flight {self.in_flight}")
+        for prefix, stats in self._collectors:
+            for key, value in stats().items():
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                name = f"{prefix}_{key}"
+                lines.append(f"# TYPE {name} gauge")
+                lines.append(f"{name} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+
+
+class MetricsMiddleware:
+    """Times each HTTP request and labels it with its route template.
+
+    Plain ASGI rather than BaseHTTPMiddleware: no extra task per request,
+    and the context variable set here is the one the SQL hooks see.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        stats = RequestStats()
+        token = _current_request.set(stats)
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        metrics.in_flight += 1
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            metrics.in_flight -= 1
+            _current_request.reset(token)
+            # The router stores the matched route in the scope; unmatched
+            # paths share one label so they can't blow up the series count
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            metrics.observe(scope["method"], path, status, elapsed, stats)
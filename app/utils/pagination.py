@@ -0,0 +1,82 @@
+# app/utils/pagination.py
+import base64
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Optional, Sequence
+
+from fastapi import HTTPException, Query
+from sqlalchemy import tuple_
+
+from app.core.config import settings
+
+
+@dataclass
+class PageParams:
+    cursor: Optional[str]
+    limit: int
+
+
+def page_params(
+    cursor: Optional[str] = Query(None, description="Opaque cursor returned as `next_cursor`"),
+    limit: int = Query(settings.DEFAULT_PAGE_SIZE, ge=1, le=settings.MAX_PAGE_SIZE),
+) -> PageParams:
+    return PageParams(cursor=cursor, limit=limit)
+
+
+# ----- Cursor encoding -----
+# A cursor is the sort key of the last row of a page: (sort_value, id).
+# It is base64url(JSON) so clients treat it as opaque.
+
+def encode_cursor(sort_value: Any, row_id: int) -> str:
+    if isinstance(sort_value, datetime):
+        key = {"t": sort_value.isoformat(), "id": row_id}
+    else:
+        key = {"v": sort_value, "id": row_id}
+    raw = json.dumps(key, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[Any, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        key = json.loads(base64.urlsafe_b64decode(padded))
+        if "t" in key:
+            return datetime.fromisoformat(key["t"]), int(key["id"])
+        return key["v"], int(key["id"])
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+# ----- Keyset seek -----
+
+def keyset(stmt, sort_col, id_col, params: PageParams, descending: bool = True):
+    """Apply a `(sort_col, id_col)` seek plus limit to `stmt`.
+
+    One extra row is fetched so `build_page` can tell whether a next page exists.
+    """
+    if params.cursor:
+        sort_value, row_id = decode_cursor(params.cursor)
+        if descending:
+            stmt = stmt.where(tuple_(sort_col, id_col) < tuple_(sort_value, row_id))
+        else:
+            stmt = stmt.where(tuple_(sort_col, id_col) > tuple_(sort_value, row_id))
+    if descending:
+        stmt = stmt.order_by(sort_col.desc(), id_col.desc())
+    else:
+        stmt = stmt.order_by(sort_col.asc(), id_col.asc())
+    return stmt.limit(params.limit + 1)
+
+
+def keyset_by_id(stmt, id_col, params: PageParams):
+    """Seek on a single unique column, for rows that carry no timestamp."""
+    if params.cursor:
+        _, row_id = decode_cursor(params.cursor)
+        stmt = stmt.where(id_col < row_id)
+    return stmt.order_by(id_col.desc()).limit(params.limit + 1)
+
+
+def build_page(rows: Sequence, params: PageParams, key: Callable[[Any], tuple[Any, int]]) -> dict:
+    items = list(rows[: params.limit])
+    next_cursor = encode_cursor(*key(items[-1])) if len(rows) > params.limit else None
+    return {"items": items, "next_cursor": next_cursor}
@@ -0,0 +1,41 @@
+# app/utils/projection.py
+# Lightweight read path for list endpoints.
+#
+# List statements select exactly the columns of the response schema, so rows
+# come back as plain tuples: no ORM entities, no identity map, no attribute
+# instrumentation. Routes then return the page through `json_page`, which
+# encodes it with orjson directly. FastAPI skips response-model validation
+# for a returned Response, so each row is converted once instead of
+# ORM -> pydantic -> dict -> json. The schema still documents the route,
+# and the columns come from it, so the two can't drift apart.
+from typing import Any, Callable, Sequence
+
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+
+from app.utils.pagination import PageParams, build_page
+
+
+def columns(model, schema: type[BaseModel]) -> tuple:
+    """The model's columns behind every field of `schema`, in field order.
+
+    A field without a column is a KeyError at import time rather than a
+    key silently missing from responses.
+    """
+    table = model.__table__
+    return tuple(table.c[name] for name in schema.model_fields)
+
+
+def as_dicts(rows: Sequence) -> list[dict]:
+    return [row._asdict() for row in rows]
+
+
+def row_page(rows: Sequence, params: PageParams, key: Callable[[Any], tuple[Any, int]]) -> dict:
+    """`build_page` over projected rows, with the items as plain dicts."""
+    data = build_page(rows, params, key)
+    data["items"] = as_dicts(data["items"])
+    return data
+
+
+def json_page(rows: Sequence, params: PageParams, key: Callable[[Any], tuple[Any, int]]) -> ORJSONResponse:
+    return ORJSONResponse(row_page(rows, params, key))
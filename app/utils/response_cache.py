@@ -0,0 +1,197 @@
+# app/utils/response_cache.py
+import hashlib
+import itertools
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Hashable, Iterable
+
+from fastapi import Request, Response
+from pydantic import TypeAdapter
+
+from app.core.config import settings
+
+
+@dataclass
+class CacheEntry:
+    body: bytes
+    etag: str
+    expires_at: float
+    tags: tuple
+
+
+class ResponseCache:
+    """In-process LRU of serialized response bodies with a TTL and a byte budget.
+
+    Entries carry tags such as "video:5" or "user:3". Write routes call
+    `invalidate(...)` with the tags of the rows they changed, which drops
+    exactly the entries built from those rows.
+    """
+
+    def __init__(self, max_bytes: int, ttl: float, max_entry_bytes: int):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.max_entry_bytes = max_entry_bytes
+        self._entries: OrderedDict[Hashable, CacheEntry] = OrderedDict()
+        self._keys_by_tag: dict[str, set] = {}
+        self._bytes = 0
+
+        # Invalidation sequence: an entry rendered before one of its tags was
+        # invalidated is never stored, so a write racing a read can't leave
+        # stale data behind.
+        self._seq = itertools.count(1)
+        self._current_seq = 0
+        self._tag_invalidated_at: dict[str, int] = {}
+        self._renders_in_flight = 0
+        self._listeners: list[Callable[[tuple], None]] = []
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self.not_modified = 0
+
+    def begin(self) -> int:
+        self._renders_in_flight += 1
+        return self._current_seq
+
+    def finish(self):
+        self._renders_in_flight -= 1
+        if self._renders_in_flight == 0:
+            # Invalidation marks only matter to renders that were in flight
+            self._tag_invalidated_at.clear()
+
+    def get(self, key: Hashable):
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        if entry.expires_at <= time.monotonic():
+            self._remove(key)
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key: Hashable, body: bytes, tags: Iterable[str], started_seq: int) -> CacheEntry:
+        tags = tuple(set(tags))
+        entry = CacheEntry(body=body, etag=make_etag(body), expires_at=time.monotonic() + self.ttl, tags=tags)
+        if len(body) > self.max_entry_bytes:
+            return entry
+        if any(self._tag_invalidated_at.get(tag, 0) > started_seq for tag in tags):
+            return entry
+
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = entry
+        self._bytes += len(body)
+        for tag in tags:
+            self._keys_by_tag.setdefault(tag, set()).add(key)
+        while self._bytes > self.max_bytes and self._entries:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+        return entry
+
+    def _remove(self, key: Hashable):
+        entry = self._entries.pop(key)
+        self._bytes -= len(entry.body)
+        for tag in entry.tags:
+            keys = self._keys_by_tag.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_tag[tag]
+
+    def invalidate(self, *tags: str):
+        self._current_seq = next(self._seq)
+        for tag in tags:
+            self._tag_invalidated_at[tag] = self._current_seq
+            for key in list(self._keys_by_tag.get(tag, ())):
+                self._remove(key)
+                self.invalidations += 1
+        for listener in self._listeners:
+            listener(tags)
+
+    def add_listener(self, listener: Callable[[tuple], None]):
+        """Call `listener(tags)` on every invalidation (e.g. to drop other per-row state)."""
+        self._listeners.append(listener)
+
+    def clear(self):
+        self._entries.clear()
+        self._keys_by_tag.clear()
+        self._bytes = 0
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "not_modified": self.not_modified,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
+
+
+def make_etag(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+response_cache = ResponseCache(
+    max_bytes=settings.RESPONSE_CACHE_MAX_BYTES,
+    ttl=settings.RESPONSE_CACHE_TTL_SECONDS,
+    max_entry_bytes=settings.RESPONSE_CACHE_MAX_ENTRY_BYTES,
+)
+
+_adapters: dict[Any, TypeAdapter] = {}
+
+
+def _adapter(model) -> TypeAdapter:
+    adapter = _adapters.get(model)
+    if adapter is None:
+        adapter = _adapters[model] = TypeAdapter(model)
+    return adapter
+
+
+async def cached_json(
+    request: Request,
+    key: Hashable,
+    model,
+    produce: Callable[[], Awaitable[Any]],
+    tags: Callable[[Any], Iterable[str]],
+) -> Response:
+    """Serve `key` from the cache, or render it with `produce` and cache it.
+
+    `model` is the route's response model, so the cached body is exactly
+    what FastAPI would have serialized. `tags` maps the payload to the
+    invalidation tags of the rows it was built from.
+    """
+    entry = response_cache.get(key)
+    if entry is None:
+        started_seq = response_cache.begin()
+        try:
+            adapter = _adapter(model)
+            value = adapter.validate_python(await produce(), from_attributes=True)
+            body = adapter.dump_json(value)
+            entry = response_cache.put(key, body, tags(value), started_seq)
+        finally:
+            response_cache.finish()
+
+    headers = {"ETag": entry.etag, "Cache-Control": "no-cache"}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_matches(if_none_match, entry.etag):
+        response_cache.not_modified += 1
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry.body, media_type="application/json", headers=headers)
@@ -0,0 +1,77 @@
+# benchmarks/compare.py
+"""Diff two benchmark reports route by route.
+
+    python -m benchmarks.compare baseline.json current.json [--tolerance 10]
+
+A route regresses when its p95 latency grows, or its throughput drops,
+by more than --tolerance percent, or when it starts returning errors.
+Exits 1 if any route regressed.
+"""
+import argparse
+import json
+import sys
+
+LATENCY_KEYS = ("p50_ms", "p95_ms", "p99_ms")
+
+
+def _change(before, after):
+    if before in (None, 0) or after is None:
+        return None
+    return (after - before) / before * 100
+
+
+def compare(baseline: dict, current: dict, tolerance: float = 10.0) -> dict:
+    routes = {}
+    regressions = []
+    for route in sorted(set(baseline["routes"]) | set(current["routes"])):
+        before = baseline["routes"].get(route)
+        after = current["routes"].get(route)
+        if before is None or after is None:
+            routes[route] = {"only_in": "current" if before is None else "baseline"}
+            continue
+
+        entry = {f"{key}_change_pct": _change(before[key], after[key]) for key in LATENCY_KEYS}
+        entry["per_second_change_pct"] = _change(before["per_second"], after["per_second"])
+        if "rows_per_second" in before and "rows_per_second" in after:
+            entry["rows_per_second_change_pct"] = _change(before["rows_per_second"], after["rows_per_second"])
+        entry["errors"] = {"baseline": before["errors"], "current": after["errors"]}
+
+        reasons = []
+        if (entry["p95_ms_change_pct"] or 0) > tolerance:
+            reasons.append("p95 latency")
+        if (entry["per_second_change_pct"] or 0) < -tolerance:
+            reasons.append("throughput")
+        if after["errors"] > before["errors"]:
+            reasons.append("errors")
+        if reasons:
+            regressions.append({"route": route, "reasons": reasons})
+        routes[route] = entry
+
+    return {
+        "tolerance_pct": tolerance,
+        "baseline_revision": baseline.get("meta", {}).get("git_revision"),
+        "current_revision": current.get("meta", {}).get("git_revision"),
+        "total_per_second_change_pct": _change(baseline["total"]["per_second"], current["total"]["per_second"]),
+        "routes": routes,
+        "regressions": regressions,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--tolerance", type=float, default=10.0, help="allowed regression in percent")
+    args = parser.parse_args(argv)
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    result = compare(baseline, current, args.tolerance)
+    print(json.dumps(result, indent=2))
+    sys.exit(1 if result["regressions"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+# benchmarks/login_storm.py
+"""Latency of an unrelated GET endpoint while a burst of logins runs.
+
+    python -m benchmarks.login_storm
+    HASH_WORKERS=0 python -m benchmarks.login_storm   # hash inline on the event loop
+
+Runs the app in-process through httpx's ASGI transport against a
+throwaway SQLite database and prints a JSON report.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.stats import summarize
+
+
+async def probe(client, path, stop: asyncio.Event, samples: list):
+    while not stop.is_set():
+        started = time.perf_counter()
+        await client.get(path)
+        samples.append((time.perf_counter() - started) * 1000)
+        await asyncio.sleep(0.005)
+
+
+async def run(args):
+    import httpx
+    from app.main import app
+    from app.database import AsyncSessionLocal
+    from app.models import User
+    from app.core.security import hash_password
+
+    async with app.router.lifespan_context(app):
+        password_hash = hash_password("benchmark")
+        async with AsyncSessionLocal() as db:
+            db.add_all(
+                User(username=f"bench{i}", email=f"bench{i}@example.com", password_hash=password_hash)
+                for i in range(args.users)
+            )
+            await db.commit()
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            # Baseline: probe alone
+            stop = asyncio.Event()
+            baseline = []
+            task = asyncio.create_task(probe(client, args.probe_path, stop, baseline))
+            await asyncio.sleep(args.baseline_seconds)
+            stop.set()
+            await task
+
+            # Storm: probe while logins run
+            stop = asyncio.Event()
+            during = []
+            statuses = {}
+            sem = asyncio.Semaphore(args.concurrency)
+
+            async def login(i):
+                async with sem:
+                    r = await client.post(
+                        "/auth/login",
+                        json={"email": f"bench{i % args.users}@example.com", "password": "benchmark"},
+                    )
+                    statuses[r.status_code] = statuses.get(r.status_code, 0) + 1
+
+            task = asyncio.create_task(probe(client, args.probe_path, stop, during))
+            started = time.perf_counter()
+            await asyncio.gather(*(login(i) for i in range(args.logins)))
+            storm_seconds = time.perf_counter() - started
+            stop.set()
+            await task
+
+    return {
+        "hash_workers": int(os.environ.get("HASH_WORKERS", "4")),
+        "bcrypt_rounds": int(os.environ.get("BCRYPT_ROUNDS", "12")),
+        "probe_path": args.probe_path,
+        "baseline": summarize(baseline),
+        "during_logins": summarize(during),
+        "logins": {
+            "total": args.logins,
+            "seconds": storm_seconds,
+            "per_second": args.logins / storm_seconds,
+            "status_codes": statuses,
+        },
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--probe-path", default="/videos/")
+    parser.add_argument("--baseline-seconds", type=float, default=2.0)
+    args = parser.parse_args(argv)
+
+    # The app uses a relative SQLite path; keep the benchmark database out of the repo
+    workdir = tempfile.mkdtemp(prefix="streambase-bench-")
+    sys.path.insert(0, os.getcwd())
+    os.chdir(workdir)
+    report = asyncio.run(run(args))
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,302 @@
+# benchmarks/query_plans.py
+"""Check that no hot route statement full-scans a table.
+
+    python -m benchmarks.query_plans
+    python -m benchmarks.query_plans --verbose     # print every plan
+
+Migrates and seeds a throwaway SQLite database, calls each user-facing
+route (and the background jobs) once through the ASGI app, following
+cursors to a second page, and records every SQL statement issued. Each
+one is then run through EXPLAIN QUERY PLAN with the parameters it was
+issued with. A plan step that scans a model table without an index
+("SCAN comments" rather than "SCAN comments USING INDEX ...") fails the
+check: the script prints the statement, the routes that issued it and
+its plan, and exits 1.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+
+from benchmarks.seed import PASSWORD, SCALES, seed
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Not plannable, or not queries
+_SKIP_PREFIXES = ("PRAGMA", "BEGIN", "COMMIT", "ROLLBACK", "SAVEPOINT", "RELEASE", "EXPLAIN")
+
+
+class StatementLog:
+    """Distinct statements in first-seen order, with parameters and callers."""
+
+    def __init__(self):
+        self.label = None
+        self.statements: dict[str, tuple] = {}
+        self.callers: dict[str, set] = {}
+
+    def before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        # Unlabelled: startup and the check's own setup queries
+        if self.label is None or statement.lstrip().upper().startswith(_SKIP_PREFIXES):
+            return
+        if executemany:
+            parameters = parameters[0] if parameters else ()
+        self.statements.setdefault(statement, parameters)
+        self.callers.setdefault(statement, set()).add(self.label)
+
+
+def full_scans(plan: list, tables: set) -> list:
+    """Plan steps that read a whole table rather than an index."""
+    scans = []
+    for detail in plan:
+        words = detail.split()
+        if len(words) >= 2 and words[0] == "SCAN" and words[1] in tables and "USING" not in words:
+            scans.append(detail)
+    return scans
+
+
+async def _follow(client, label, path, log, headers=None, params=None):
+    """GET `path` and, when the response has a next page, that page too."""
+    log.label = label
+    response = await client.get(path, headers=headers, params=params)
+    if response.status_code != 200:
+        raise RuntimeError(f"{label}: {response.status_code} {response.text}")
+    body = response.json()
+    cursor = body.get("next_cursor") if isinstance(body, dict) else None
+    if cursor:
+        response = await client.get(path, headers=headers, params={**(params or {}), "cursor": cursor})
+        if response.status_code != 200:
+            raise RuntimeError(f"{label} (page 2): {response.status_code} {response.text}")
+    return body
+
+
+async def exercise(client, log):
+    """Call every user-facing route once, in an order that leaves data for the next."""
+    from sqlalchemy import func, select
+    from app.core.security import create_user_token
+    from app.database import AsyncSessionLocal
+    from app.models import Comment, User, Video
+
+    async with AsyncSessionLocal() as db:
+        admin = await db.get(User, 1)
+        # The most followed creator and the most discussed video have the most rows behind them
+        creator = (await db.execute(
+            select(User).where(User.id != 1).order_by(User.subscriber_count.desc()).limit(1)
+        )).scalar_one()
+        video_id = (await db.execute(select(Video.id).order_by(Video.comment_count.desc()).limit(1))).scalar_one()
+        viewer = (await db.execute(select(User).order_by(User.id.desc()).limit(1))).scalar_one()
+        commenter_id = (await db.execute(
+            select(Comment.user_id).group_by(Comment.user_id).order_by(func.count().desc()).limit(1)
+        )).scalar_one()
+
+    auth = {"Authorization": f"Bearer {create_user_token(viewer)}"}
+    as_admin = {"Authorization": f"Bearer {create_user_token(admin)}"}
+    as_creator = {"Authorization": f"Bearer {create_user_token(creator)}"}
+
+    async def call(label, method, path, headers=auth, **kwargs):
+        log.label = label
+        response = await client.request(method, path, headers=headers, **kwargs)
+        if response.status_code >= 400:
+            raise RuntimeError(f"{label}: {response.status_code} {response.text}")
+        return response.json() if response.content else None
+
+    # Auth
+    registered = await call("POST /auth/register", "POST", "/auth/register", headers=None, json={
+        "username": "plan-check", "email": "plan-check@example.com", "password": PASSWORD,
+    })
+    await call("POST /auth/login", "POST", "/auth/login", headers=None, json={
+        "email": "plan-check@example.com", "password": PASSWORD,
+    })
+
+    # Videos
+    uploaded = await call("POST /videos/", "POST", "/videos/", headers=as_creator, json={
+        "title": "Plan check upload", "video_url": "https://cdn.example.com/plan-check.mp4",
+        "tags": ["tag1", "tag2", "plan check"], "category": "music",
+    })
+    await _follow(client, "GET /videos/", "/videos/", log)
+    # Filters the counters answer, then ones whose facets are counted by walking the matches
+    for params in ({"category": "music"}, {"tags": "tag1"}, {"tags": "tag1", "category": "music"},
+                   {"tags": "tag1,tag2"}, {"tags": "tag3,tag1", "category": "music"}):
+        await _follow(client, "GET /videos/ (filtered)", "/videos/", log, params=params)
+    await call("PUT /videos/{video_id}/tags", "PUT", f"/videos/{uploaded['id']}/tags", headers=as_creator, json={
+        "tags": ["tag2", "tag4"], "category": "travel",
+    })
+    await _follow(client, "GET /videos/uploader/{user_id}", f"/videos/uploader/{creator.id}", log)
+    await _follow(client, "GET /videos/search", "/videos/search", log, params={"q": "tutorial pyth"})
+    await _follow(client, "GET /videos/{video_id}", f"/videos/{video_id}", log)
+    await _follow(client, "GET /videos/batch", "/videos/batch", log, params={"ids": f"{video_id},{uploaded['id']}"})
+    await _follow(client, "GET /videos/{video_id}/liked-by", f"/videos/{video_id}/liked-by", log)
+    await _follow(client, "GET /videos/{video_id}/watch-later-by", f"/videos/{video_id}/watch-later-by", log)
+    await call("POST /videos/{video_id}/view", "POST", f"/videos/{video_id}/view")
+    # Idempotent removes first, so the adds below don't hit "already liked"
+    await call("DELETE /videos/{video_id}/like", "DELETE", f"/videos/{video_id}/like")
+    await call("POST /videos/{video_id}/like", "POST", f"/videos/{video_id}/like")
+    await call("PUT /videos/{video_id}/like", "PUT", f"/videos/{video_id}/like")
+    await call("POST /videos/likes/batch", "POST", "/videos/likes/batch", json={"ids": [video_id, uploaded["id"]]})
+
+    # Uploads
+    media = b"plan check media"
+    upload = await call("POST /uploads/", "POST", "/uploads/", headers=as_creator, json={
+        "filename": "plan-check.mp4", "size": len(media), "content_type": "video/mp4",
+    })
+    await call("PATCH /uploads/{upload_id}", "PATCH", f"/uploads/{upload['id']}",
+               headers={**as_creator, "Upload-Offset": "0"}, content=media)
+    await call("GET /uploads/{upload_id}", "GET", f"/uploads/{upload['id']}", headers=as_creator)
+    await call("POST /videos/ (upload)", "POST", "/videos/", headers=as_creator, json={
+        "title": "Plan check media", "upload_id": upload["id"],
+    })
+    log.label = "GET /media/{upload_id}"
+    response = await client.get(f"/media/{upload['id']}", headers={"Range": "bytes=0-3"})
+    if response.status_code != 206:
+        raise RuntimeError(f"GET /media/{{upload_id}}: {response.status_code}")
+
+    # Users
+    await _follow(client, "GET /users/me", "/users/me", log, headers=auth)
+    await _follow(client, "GET /users/{user_id}", f"/users/{creator.id}", log)
+    await _follow(client, "GET /users/batch", "/users/batch", log, params={"ids": f"{creator.id},{viewer.id}"})
+    await call("DELETE /users/{user_id}/subscription", "DELETE", f"/users/{creator.id}/subscription")
+    await call("POST /users/{user_id}/subscribe", "POST", f"/users/{creator.id}/subscribe")
+    await call("DELETE /users/{user_id}/unsubscribe", "DELETE", f"/users/{creator.id}/unsubscribe")
+    await call("PUT /users/{user_id}/subscription", "PUT", f"/users/{creator.id}/subscription")
+    await call("POST /users/subscriptions/batch", "POST", "/users/subscriptions/batch", json={"ids": [2, 3]})
+    await _follow(client, "GET /users/{user_id}/subscribers", f"/users/{creator.id}/subscribers", log)
+    await _follow(client, "GET /users/{user_id}/subscriptions", f"/users/{viewer.id}/subscriptions", log)
+    await call("POST /users/watchlater/{video_id}", "POST", f"/users/watchlater/{video_id}")
+    await call("PUT /users/watchlater/{video_id}", "PUT", f"/users/watchlater/{video_id}")
+    await call("POST /users/watchlater/batch", "POST", "/users/watchlater/batch", json={"ids": [uploaded["id"]]})
+    await _follow(client, "GET /users/me/feed", "/users/me/feed", log, headers=auth)
+    await _follow(client, "GET /users/me/liked", "/users/me/liked", log, headers=auth)
+    await _follow(client, "GET /users/me/watch-later", "/users/me/watch-later", log, headers=auth)
+    await call("DELETE /users/watchlater/{video_id}", "DELETE", f"/users/watchlater/{video_id}")
+    # On the registered account: a role change revokes the user's tokens
+    await call("PUT /users/{user_id}/role", "PUT", f"/users/{registered['id']}/role", headers=as_admin, json={"role": "creator"})
+
+    # Comments
+    root = await call("POST /comments/", "POST", "/comments/", json={"video_id": video_id, "content": "plan check"})
+    reply = await call("POST /comments/", "POST", "/comments/", json={
+        "video_id": video_id, "content": "plan check reply", "parent_id": root["id"],
+    })
+    await call("PUT /comments/{comment_id}", "PUT", f"/comments/{reply['id']}", json={
+        "video_id": video_id, "content": "edited",
+    })
+    await _follow(client, "GET /comments/video/{video_id}", f"/comments/video/{video_id}", log)
+    await _follow(client, "GET /comments/video/{video_id}/threads", f"/comments/video/{video_id}/threads", log)
+    await _follow(client, "GET /comments/{comment_id}/replies", f"/comments/{root['id']}/replies", log)
+    await _follow(client, "GET /comments/{comment_id}/thread", f"/comments/{root['id']}/thread", log)
+    await _follow(client, "GET /comments/user/{user_id}", f"/comments/user/{commenter_id}", log)
+    await _follow(client, "GET /comments/video/{video_id}/stats", f"/comments/video/{video_id}/stats", log)
+    await call("DELETE /comments/{comment_id}", "DELETE", f"/comments/{root['id']}")
+
+    # Background jobs, then the routes that read what they wrote
+    from app.services.feed import feed_trimmer
+    from app.services.trending import trending_updater
+    from app.services.view_counter import view_counter
+
+    log.label = "job: view_counter.flush"
+    await view_counter.flush()
+    log.label = "job: trending_updater.update"
+    await trending_updater.update()
+    log.label = "job: feed_trimmer.trim"
+    await feed_trimmer.trim()
+    for period in ("hour", "day", "week"):
+        await _follow(client, "GET /videos/trending", "/videos/trending", log, params={"period": period})
+    await _follow(client, "GET /videos/trending", "/videos/trending", log, params={"uploader_id": creator.id})
+
+    from app.services.related import related_updater
+
+    # The first run builds the index: a deliberate pass over every like,
+    # so it goes unlabelled. The second applies events and is checked.
+    log.label = None
+    await related_updater.update()
+    await call("PUT /videos/{video_id}/like", "PUT", f"/videos/{uploaded['id']}/like")
+    await call("PUT /users/watchlater/{video_id}", "PUT", f"/users/watchlater/{video_id}")
+    log.label = "job: related_updater.update"
+    await related_updater.update()
+    await _follow(client, "GET /videos/{video_id}/related", f"/videos/{video_id}/related", log)
+
+    await call("DELETE /videos/{video_id}", "DELETE", f"/videos/{uploaded['id']}", headers=as_creator)
+    await call("DELETE /users/{user_id}", "DELETE", f"/users/{viewer.id}", headers=as_admin)
+
+    # The largest account goes through the background purge
+    from app.core.config import settings
+    from app.services.purge import account_purger
+
+    threshold = settings.ACCOUNT_PURGE_THRESHOLD
+    settings.ACCOUNT_PURGE_THRESHOLD = 0
+    try:
+        await call("DELETE /users/{user_id} (soft)", "DELETE", f"/users/{creator.id}", headers=as_admin)
+    finally:
+        settings.ACCOUNT_PURGE_THRESHOLD = threshold
+    log.label = "job: account_purger.purge"
+    await account_purger.purge()
+    log.label = "job: related_updater.update"
+    await related_updater.update()
+
+
+async def explain(log: StatementLog) -> list:
+    """(statement, plan details) for every logged statement."""
+    from app.database import engine
+
+    plans = []
+    async with engine.connect() as conn:
+        for statement, parameters in log.statements.items():
+            result = await conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)
+            plans.append((statement, [row[-1] for row in result.all()]))
+        await conn.rollback()
+    return plans
+
+
+async def run(args) -> int:
+    import httpx
+    from sqlalchemy import event
+    from app.database import Base, dispose_engines, engine, read_engine
+    from app.main import app
+
+    await seed(SCALES[args.scale])
+
+    log = StatementLog()
+    engines = {engine.sync_engine, read_engine.sync_engine}
+    for sync_engine in engines:
+        event.listen(sync_engine, "before_cursor_execute", log.before_cursor_execute)
+    try:
+        async with app.router.lifespan_context(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://plans") as client:
+                await exercise(client, log)
+    finally:
+        for sync_engine in engines:
+            event.remove(sync_engine, "before_cursor_execute", log.before_cursor_execute)
+
+    tables = set(Base.metadata.tables)
+    failures = 0
+    for statement, plan in await explain(log):
+        scans = full_scans(plan, tables)
+        if not scans and not args.verbose:
+            continue
+        failures += bool(scans)
+        print("FULL SCAN" if scans else "ok", "--", ", ".join(sorted(log.callers[statement])))
+        print("  " + " ".join(statement.split()))
+        for detail in plan:
+            print(f"    {detail}")
+        print()
+
+    await dispose_engines()
+    print(f"{len(log.statements)} statements checked, {failures} with a full table scan")
+    return 1 if failures else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", choices=sorted(SCALES), default="tiny")
+    parser.add_argument("--verbose", action="store_true", help="print every plan, not just failures")
+    args = parser.parse_args(argv)
+
+    # The app uses a relative SQLite path; keep the database out of the repo
+    workdir = tempfile.mkdtemp(prefix="streambase-plans-")
+    sys.path.insert(0, REPO_ROOT)
+    os.chdir(workdir)
+    sys.exit(asyncio.run(run(args)))
+
+
+if __name__ == "__main__":
+    main()
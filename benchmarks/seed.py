@@ -0,0 +1,225 @@
+# benchmarks/seed.py
+"""Seed a synthetic dataset for benchmarking.
+
+    python -m benchmarks.seed --scale small        # into ./youtube.db (DATABASE_URL)
+
+Popularity is power-law distributed: a few creators hold most
+subscribers, a few videos collect most likes and comments, and a few
+users do most of the liking. The same --seed always produces the same
+dataset.
+"""
+import argparse
+import asyncio
+import bisect
+import itertools
+import json
+import random
+import time
+from dataclasses import asdict, dataclass, replace
+from datetime import datetime, timedelta
+
+PASSWORD = "benchmark"
+
+
+@dataclass(frozen=True)
+class Scale:
+    users: int
+    creators: int
+    videos: int
+    likes: int
+    comments: int
+    subscriptions: int
+    watch_later: int
+    skew: float = 1.1  # Zipf exponent; higher is more concentrated
+    seed: int = 42
+
+
+SCALES = {
+    "tiny": Scale(users=200, creators=20, videos=500, likes=2_000, comments=1_000, subscriptions=1_000, watch_later=500),
+    "small": Scale(users=2_000, creators=100, videos=10_000, likes=50_000, comments=20_000, subscriptions=20_000, watch_later=10_000),
+    "medium": Scale(users=20_000, creators=1_000, videos=100_000, likes=500_000, comments=200_000, subscriptions=200_000, watch_later=100_000),
+    "large": Scale(users=200_000, creators=10_000, videos=1_000_000, likes=5_000_000, comments=2_000_000, subscriptions=2_000_000, watch_later=1_000_000),
+}
+
+
+class Zipf:
+    """Draws from `ids` with P(rank k) proportional to 1 / k**s.
+
+    Ranks are shuffled onto ids so the popular rows aren't simply the
+    oldest ones, unless `ranked` says the ids are already in popularity order.
+    """
+
+    def __init__(self, ids, s: float, rng: random.Random, ranked: bool = False):
+        self.ids = list(ids)
+        if not ranked:
+            rng.shuffle(self.ids)
+        self.cum_weights = list(itertools.accumulate(1 / (k ** s) for k in range(1, len(self.ids) + 1)))
+        self.rng = rng
+
+    def draw(self):
+        x = self.rng.random() * self.cum_weights[-1]
+        return self.ids[bisect.bisect_left(self.cum_weights, x)]
+
+
+def _pairs(count: int, left: Zipf, right: Zipf, exclude_equal: bool = False):
+    # Unique pairs; skewed draws collide, so cap the attempts
+    pairs = set()
+    attempts = 0
+    while len(pairs) < count and attempts < count * 20:
+        attempts += 1
+        a, b = left.draw(), right.draw()
+        if exclude_equal and a == b:
+            continue
+        pairs.add((a, b))
+    return sorted(pairs)
+
+
+async def _insert(conn, table, rows, chunk: int = 5_000):
+    for start in range(0, len(rows), chunk):
+        await conn.execute(table.insert(), rows[start:start + chunk])
+
+
+async def seed(scale: Scale) -> dict:
+    """Create the schema and load the dataset through the app's engine."""
+    from app.core.security import hash_password
+    from app.database import AsyncSessionLocal, engine, migrate
+    from app.models import Comment, User, Video
+    from app.models.user import RoleEnum, likes_table, subscriptions_table, watch_later_table
+    from app.services import feed
+    from app.models.tag import tags_table, video_tags_table
+    from app.services.counters import recompute_counters, recompute_facet_counts
+    from app.services.threads import child_path
+
+    rng = random.Random(scale.seed)
+    started = time.perf_counter()
+    await migrate()
+
+    password_hash = hash_password(PASSWORD)
+    user_rows = [
+        {
+            "id": i,
+            "username": f"user{i}",
+            "email": f"user{i}@example.com",
+            "password_hash": password_hash,
+            "role": (RoleEnum.admin if i == 1 else RoleEnum.creator if i <= scale.creators + 1 else RoleEnum.viewer).name,
+        }
+        for i in range(1, scale.users + 1)
+    ]
+    creator_ids = range(2, scale.creators + 2)
+    user_ids = range(1, scale.users + 1)
+    video_ids = range(1, scale.videos + 1)
+
+    creators = Zipf(creator_ids, scale.skew, rng)
+    active_users = Zipf(user_ids, scale.skew, rng)
+    popular_videos = Zipf(video_ids, scale.skew, rng)
+
+    now = datetime.utcnow()
+    upload_times = {}
+    video_rows = []
+    for vid in video_ids:
+        upload_times[vid] = now - timedelta(seconds=rng.randrange(365 * 24 * 3600))
+        video_rows.append({
+            "id": vid,
+            "title": f"Video {vid} {rng.choice(['tutorial', 'vlog', 'review', 'highlights', 'live'])}",
+            "description": f"Synthetic video {vid} about {rng.choice(['python', 'music', 'gaming', 'cooking', 'travel'])}",
+            "video_url": f"https://cdn.example.com/{vid}.mp4",
+            "upload_time": upload_times[vid],
+            "uploader_id": creators.draw(),
+        })
+
+    # Tags and categories draw from their own generator, so adding them left
+    # the rest of a seed's dataset unchanged
+    label_rng = random.Random(f"labels-{scale.seed}")
+    tag_rows = [{"id": i, "name": f"tag{i}"} for i in range(1, 201)]
+    popular_tags = Zipf([t["id"] for t in tag_rows], scale.skew, label_rng)
+    categories = ["music", "gaming", "education", "travel", "cooking", "sports", "news", "comedy"]
+    video_tag_rows = []
+    for row in video_rows:
+        row["category"] = label_rng.choice(categories + [None])
+        for tag_id in {popular_tags.draw() for _ in range(label_rng.randrange(5))}:
+            video_tag_rows.append({"video_id": row["id"], "tag_id": tag_id, "upload_time": row["upload_time"]})
+
+    comment_rows = []
+    for cid in range(1, scale.comments + 1):
+        vid = popular_videos.draw()
+        comment_rows.append({
+            "id": cid,
+            "content": f"Comment {cid}",
+            "created_at": upload_times[vid] + timedelta(seconds=rng.randrange(7 * 24 * 3600)),
+            "user_id": active_users.draw(),
+            "video_id": vid,
+            "path": child_path("", cid),
+        })
+
+    likes = _pairs(scale.likes, active_users, popular_videos)
+    watch_later = _pairs(scale.watch_later, active_users, popular_videos)
+    subscriptions = _pairs(scale.subscriptions, Zipf(user_ids, 0.5, rng), creators, exclude_equal=True)
+
+    async with engine.begin() as conn:
+        await _insert(conn, User.__table__, user_rows)
+        await _insert(conn, Video.__table__, video_rows)
+        await _insert(conn, tags_table, tag_rows)
+        await _insert(conn, video_tags_table, video_tag_rows)
+        await _insert(conn, Comment.__table__, comment_rows)
+        await _insert(conn, likes_table, [{"user_id": u, "video_id": v} for u, v in likes])
+        await _insert(conn, watch_later_table, [{"user_id": u, "video_id": v} for u, v in watch_later])
+        await _insert(conn, subscriptions_table, [{"subscriber_id": u, "subscribed_to_id": c} for u, c in subscriptions])
+
+    async with AsyncSessionLocal() as db:
+        await recompute_counters(db)
+        await recompute_facet_counts(db)
+        for start in range(0, scale.videos, 5_000):
+            await feed.fan_out_many(db, range(start + 1, min(start + 5_000, scale.videos) + 1))
+        await db.commit()
+    await feed.feed_trimmer.trim()
+
+    return {
+        "scale": asdict(scale),
+        "rows": {
+            "users": len(user_rows),
+            "videos": len(video_rows),
+            "video_tags": len(video_tag_rows),
+            "comments": len(comment_rows),
+            "likes": len(likes),
+            "watch_later": len(watch_later),
+            "subscriptions": len(subscriptions),
+        },
+        "seconds": time.perf_counter() - started,
+    }
+
+
+def scale_from_args(args) -> Scale:
+    scale = SCALES[args.scale]
+    overrides = {
+        name: getattr(args, name)
+        for name in ("users", "creators", "videos", "likes", "comments", "subscriptions", "watch_later", "skew", "seed")
+        if getattr(args, name, None) is not None
+    }
+    return replace(scale, **overrides)
+
+
+def add_scale_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    for name in ("users", "creators", "videos", "likes", "comments", "subscriptions", "watch-later"):
+        parser.add_argument(f"--{name}", type=int, help="override the preset")
+    parser.add_argument("--skew", type=float, help="Zipf exponent (default 1.1)")
+    parser.add_argument("--seed", type=int, help="random seed (default 42)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    add_scale_arguments(parser)
+    args = parser.parse_args(argv)
+
+    async def run():
+        from app.database import dispose_engines
+        try:
+            return await seed(scale_from_args(args))
+        finally:
+            await dispose_engines()
+
+    print(json.dumps(asyncio.run(run()), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+# benchmarks/stats.py
+import statistics
+from collections import defaultdict
+
+
+def percentile(samples, pct):
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))
+    return ordered[index]
+
+
+def summarize(samples):
+    return {
+        "count": len(samples),
+        "p50_ms": percentile(samples, 50),
+        "p95_ms": percentile(samples, 95),
+        "p99_ms": percentile(samples, 99),
+        "mean_ms": statistics.fmean(samples) if samples else None,
+    }
+
+
+class Recorder:
+    """Latency samples and status codes per route label ("GET /videos/{video_id}")."""
+
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+        self.failures = defaultdict(int)  # transport errors, no status code
+        self.rows = defaultdict(int)  # list items returned, for operations that count them
+
+    def record(self, route: str, status: int | None, elapsed_ms: float, rows: int | None = None):
+        if status is None:
+            self.failures[route] += 1
+            return
+        self.samples[route].append(elapsed_ms)
+        self.statuses[route][status] += 1
+        if rows is not None:
+            self.rows[route] += rows
+
+    def report(self, seconds: float) -> dict:
+        routes = {}
+        for route in sorted(set(self.samples) | set(self.failures)):
+            statuses = self.statuses[route]
+            errors = self.failures[route] + sum(n for code, n in statuses.items() if code >= 500)
+            count = len(self.samples[route])
+            routes[route] = {
+                **summarize(self.samples[route]),
+                "per_second": count / seconds if seconds else None,
+                "errors": errors,
+                "status_codes": {str(code): n for code, n in sorted(statuses.items())},
+            }
+            if route in self.rows:
+                routes[route]["rows_per_second"] = self.rows[route] / seconds if seconds else None
+        total = sum(len(s) for s in self.samples.values())
+        all_samples = [ms for s in self.samples.values() for ms in s]
+        return {
+            "total": {
+                **summarize(all_samples),
+                "per_second": total / seconds if seconds else None,
+                "errors": sum(r["errors"] for r in routes.values()),
+                "seconds": seconds,
+                **({"rows_per_second": sum(self.rows.values()) / seconds} if self.rows and seconds else {}),
+            },
+            "routes": routes,
+        }
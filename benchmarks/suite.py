@@ -0,0 +1,209 @@
+# benchmarks/suite.py
+"""Run a workload mix against the app and report per-route latency.
+
+    python -m benchmarks.suite --workload browse --scale small
+    python -m benchmarks.suite --workload watch --target uvicorn --out run.json
+    python -m benchmarks.suite --workload browse --baseline baseline.json
+
+Seeds a throwaway SQLite database, then drives app.main:app with
+--concurrency closed-loop clients for --duration seconds, either
+in-process through httpx's ASGI transport or over HTTP against a real
+uvicorn process. Prints (or writes) a JSON report; with --baseline the
+report also carries a comparison (see benchmarks.compare).
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import asynccontextmanager
+
+from benchmarks import compare
+from benchmarks.seed import add_scale_arguments, scale_from_args, seed
+from benchmarks.stats import Recorder
+from benchmarks.workloads import WORKLOADS, load_dataset, picker
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@asynccontextmanager
+async def asgi_client():
+    import httpx
+    from app.main import app
+
+    async with app.router.lifespan_context(app):
+        # Unhandled exceptions become 500s and are counted, as they would be over HTTP
+        transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=30) as client:
+            yield client
+
+
+@asynccontextmanager
+async def uvicorn_client(workers: int):
+    import httpx
+
+    port = _free_port()
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [REPO_ROOT, os.environ.get("PYTHONPATH")]))}
+    server = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "app.main:app",
+            "--host", "127.0.0.1", "--port", str(port),
+            "--workers", str(workers), "--log-level", "warning",
+        ],
+        env=env,
+    )
+    try:
+        async with httpx.AsyncClient(
+            base_url=f"http://127.0.0.1:{port}",
+            timeout=30,
+            limits=httpx.Limits(max_connections=None, max_keepalive_connections=None),
+        ) as client:
+            deadline = time.monotonic() + 30
+            while True:
+                try:
+                    await client.get("/openapi.json")
+                    break
+                except httpx.TransportError:
+                    if server.poll() is not None or time.monotonic() > deadline:
+                        raise RuntimeError("uvicorn did not start")
+                    await asyncio.sleep(0.1)
+            yield client
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+async def drive(client, data, workload: str, concurrency: int, duration: float, warmup: float, seed_value: int):
+    recorder = Recorder()
+    rngs = [random.Random(seed_value + i) for i in range(concurrency)]
+    measuring_from = time.perf_counter() + warmup
+    stop_at = measuring_from + duration
+
+    async def worker(rng):
+        import httpx
+
+        choose = picker(workload, rng)
+        while time.perf_counter() < stop_at:
+            operation = choose()
+            started = time.perf_counter()
+            rows = None
+            try:
+                route, response, *counted = await operation(client, data, rng)
+                status = response.status_code
+                rows = counted[0] if counted else None
+            except httpx.TransportError:
+                route, status = operation.__name__, None
+            if started >= measuring_from:
+                recorder.record(route, status, (time.perf_counter() - started) * 1000, rows)
+
+    await asyncio.gather(*(worker(rng) for rng in rngs))
+    return recorder.report(duration)
+
+
+async def run(args) -> dict:
+    from app.database import dispose_engines
+
+    scale = scale_from_args(args)
+    seeded = await seed(scale)
+    data = await load_dataset(random.Random(scale.seed), scale.skew)
+
+    if args.target == "uvicorn":
+        # The server opens its own connections to the same database file
+        await dispose_engines()
+        client_context = uvicorn_client(args.workers)
+    else:
+        client_context = asgi_client()
+
+    async with client_context as client:
+        results = await drive(
+            client, data, args.workload, args.concurrency, args.duration, args.warmup, scale.seed
+        )
+    await dispose_engines()
+
+    return {
+        "meta": {
+            "workload": args.workload,
+            "target": args.target,
+            "workers": args.workers if args.target == "uvicorn" else None,
+            "concurrency": args.concurrency,
+            "duration_seconds": args.duration,
+            "warmup_seconds": args.warmup,
+            "dataset": seeded,
+            "git_revision": _git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            # Settings overridden through the environment for this run
+            "settings": {name: os.environ[name] for name in _setting_names() if name in os.environ},
+        },
+        **results,
+    }
+
+
+def _setting_names():
+    from app.core.config import Settings
+    return set(Settings.model_fields)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workload", choices=sorted(WORKLOADS), default="browse")
+    parser.add_argument("--target", choices=["asgi", "uvicorn"], default="asgi")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--warmup", type=float, default=2.0)
+    parser.add_argument("--out", help="write the report here instead of stdout")
+    parser.add_argument("--baseline", help="compare against a stored report")
+    parser.add_argument("--tolerance", type=float, default=10.0, help="allowed regression in percent")
+    add_scale_arguments(parser)
+    parser.set_defaults(scale="tiny")
+    args = parser.parse_args(argv)
+
+    out = os.path.abspath(args.out) if args.out else None
+    baseline = os.path.abspath(args.baseline) if args.baseline else None
+
+    # The app uses a relative SQLite path; keep the benchmark database out of the repo
+    workdir = tempfile.mkdtemp(prefix="streambase-bench-")
+    sys.path.insert(0, REPO_ROOT)
+    os.chdir(workdir)
+    report = asyncio.run(run(args))
+
+    exit_code = 0
+    if baseline:
+        with open(baseline) as f:
+            report["comparison"] = compare.compare(json.load(f), report, args.tolerance)
+        exit_code = 1 if report["comparison"]["regressions"] else 0
+
+    text = json.dumps(report, indent=2)
+    if out:
+        with open(out, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    main()
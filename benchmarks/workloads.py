@@ -0,0 +1,212 @@
+# benchmarks/workloads.py
+# Scripted request mixes. Each operation issues one request and returns the
+# route label it is reported under, so per-route numbers line up across runs.
+# List operations also return how many rows the page held, reported as rows/sec.
+import random
+from dataclasses import dataclass
+from typing import Awaitable, Callable
+
+from benchmarks.seed import PASSWORD, Zipf
+
+
+@dataclass
+class Dataset:
+    """What the workloads need to know about the seeded database."""
+
+    users: int
+    videos: Zipf  # hot videos first
+    creators: Zipf
+    tokens: list  # bearer headers for a sample of users
+    search_terms: list
+    page_size: int  # MAX_PAGE_SIZE, for the full-page list operations
+
+    def headers(self, rng: random.Random) -> dict:
+        return rng.choice(self.tokens)
+
+
+async def load_dataset(rng: random.Random, skew: float, token_users: int = 200) -> Dataset:
+    from sqlalchemy import func, select
+    from app.core.config import settings
+    from app.core.security import create_user_token
+    from app.database import AsyncSessionLocal
+    from app.models import RoleEnum, User, Video
+
+    async with AsyncSessionLocal() as db:
+        # Popularity as seeded, so the mix hits hot rows the way real traffic does
+        hot_videos = (await db.execute(select(Video.id).order_by(Video.like_count.desc(), Video.id))).scalars().all()
+        hot_creators = (
+            await db.execute(select(User.id).where(User.role != RoleEnum.viewer).order_by(User.subscriber_count.desc()))
+        ).scalars().all()
+        user_count = (await db.execute(select(func.count(User.id)))).scalar_one()
+        sample = (await db.execute(select(User).order_by(User.id).limit(token_users))).scalars().all()
+
+    return Dataset(
+        users=user_count,
+        videos=Zipf(hot_videos, skew, rng, ranked=True),
+        creators=Zipf(hot_creators, skew, rng, ranked=True),
+        tokens=[{"Authorization": f"Bearer {create_user_token(u)}"} for u in sample],
+        search_terms=["python", "music", "tutorial", "review", "cooking", "live", "travel", "gaming"],
+        page_size=settings.MAX_PAGE_SIZE,
+    )
+
+
+Operation = Callable[[object, Dataset, random.Random], Awaitable[tuple]]
+
+
+# ----- Operations -----
+# Each returns (route label, response)
+
+async def list_videos(client, data, rng):
+    return "GET /videos/", await client.get("/videos/")
+
+
+async def video_detail(client, data, rng):
+    return "GET /videos/{video_id}", await client.get(f"/videos/{data.videos.draw()}")
+
+
+async def video_comments(client, data, rng):
+    return "GET /comments/video/{video_id}", await client.get(f"/comments/video/{data.videos.draw()}")
+
+
+async def comment_stats(client, data, rng):
+    return "GET /comments/video/{video_id}/stats", await client.get(f"/comments/video/{data.videos.draw()}/stats")
+
+
+async def creator_videos(client, data, rng):
+    return "GET /videos/uploader/{user_id}", await client.get(f"/videos/uploader/{data.creators.draw()}")
+
+
+async def search_videos(client, data, rng):
+    return "GET /videos/search", await client.get("/videos/search", params={"q": rng.choice(data.search_terms)})
+
+
+async def trending(client, data, rng):
+    return "GET /videos/trending", await client.get("/videos/trending", params={"period": rng.choice(["hour", "day", "week"])})
+
+
+async def home_feed(client, data, rng):
+    return "GET /users/me/feed", await client.get("/users/me/feed", headers=data.headers(rng))
+
+
+async def my_profile(client, data, rng):
+    return "GET /users/me", await client.get("/users/me", headers=data.headers(rng))
+
+
+async def record_view(client, data, rng):
+    return "POST /videos/{video_id}/view", await client.post(f"/videos/{data.videos.draw()}/view")
+
+
+async def like_video(client, data, rng):
+    return "PUT /videos/{video_id}/like", await client.put(f"/videos/{data.videos.draw()}/like", headers=data.headers(rng))
+
+
+async def add_comment(client, data, rng):
+    return "POST /comments/", await client.post(
+        "/comments/",
+        json={"video_id": data.videos.draw(), "content": f"bench {rng.random():.6f}"},
+        headers=data.headers(rng),
+    )
+
+
+def _rows(response) -> int:
+    import orjson
+
+    return len(orjson.loads(response.content)["items"]) if response.status_code == 200 else 0
+
+
+async def _full_page(client, data, route, path, **kwargs):
+    response = await client.get(path, params={"limit": data.page_size}, **kwargs)
+    return route, response, _rows(response)
+
+
+async def videos_page(client, data, rng):
+    return await _full_page(client, data, "GET /videos/", "/videos/")
+
+
+async def comments_page(client, data, rng):
+    return await _full_page(client, data, "GET /comments/video/{video_id}", f"/comments/video/{data.videos.draw()}")
+
+
+async def subscribers_page(client, data, rng):
+    return await _full_page(client, data, "GET /users/{user_id}/subscribers", f"/users/{data.creators.draw()}/subscribers")
+
+
+async def liked_page(client, data, rng):
+    return await _full_page(client, data, "GET /users/me/liked", "/users/me/liked", headers=data.headers(rng))
+
+
+GRID_CARDS = 24  # video cards per grid render
+
+
+async def video_cards(client, data, rng):
+    # A grid of cards in one multi-get rather than one detail request per card
+    ids = ",".join(str(data.videos.draw()) for _ in range(GRID_CARDS))
+    response = await client.get("/videos/batch", params={"ids": ids})
+    return "GET /videos/batch", response, _rows(response)
+
+
+async def user_cards(client, data, rng):
+    ids = ",".join(str(data.creators.draw()) for _ in range(GRID_CARDS))
+    response = await client.get("/users/batch", params={"ids": ids})
+    return "GET /users/batch", response, _rows(response)
+
+
+async def login(client, data, rng):
+    user = rng.randrange(1, data.users + 1)
+    return "POST /auth/login", await client.post(
+        "/auth/login", json={"email": f"user{user}@example.com", "password": PASSWORD}
+    )
+
+
+# ----- Mixes -----
+# (weight, operation)
+
+WORKLOADS: dict[str, list[tuple[int, Operation]]] = {
+    "browse": [
+        (30, video_detail),
+        (15, list_videos),
+        (15, creator_videos),
+        (10, video_comments),
+        (10, search_videos),
+        (10, home_feed),
+        (5, trending),
+        (5, comment_stats),
+        (5, my_profile),
+    ],
+    "watch": [
+        (40, video_detail),
+        (35, record_view),
+        (15, like_video),
+        (10, video_comments),
+    ],
+    "comment_burst": [
+        (50, add_comment),
+        (30, video_comments),
+        (20, comment_stats),
+    ],
+    # Full pages, where per-row decoding and encoding dominate
+    "list_pages": [
+        (40, videos_page),
+        (30, comments_page),
+        (15, subscribers_page),
+        (15, liked_page),
+    ],
+    # Card grids over hot, overlapping ids: multi-gets plus single lookups
+    # of the same videos, which the batch loaders coalesce
+    "card_grid": [
+        (50, video_cards),
+        (20, user_cards),
+        (30, video_detail),
+    ],
+    # Reads stay in the mix so the report shows what logins do to them
+    "login_storm": [
+        (40, login),
+        (40, video_detail),
+        (20, list_videos),
+    ],
+}
+
+
+def picker(workload: str, rng: random.Random) -> Callable[[], Operation]:
+    weights, operations = zip(*WORKLOADS[workload])
+    return lambda: rng.choices(operations, weights=weights)[0]
@@ -0,0 +1,73 @@
+"""cascade deletes and soft-deleted accounts
+
+Adds ON DELETE CASCADE to the foreign keys of likes, watch_later and
+subscriptions, so deleting a user or a video is one statement and the
+database removes the rows that point at it. Adds users.deleted_at, set
+when a large account is handed to the background purge, with a partial
+index over the accounts still waiting for it.
+
+The original foreign keys were created without names. On SQLite the three
+tables are rebuilt from the definitions below; on PostgreSQL the
+constraints carry the default <table>_<column>_fkey names.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 16:23:42.763304
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+# (table, [(column, referenced table)], [(index name, columns)]) as of this revision
+ASSOCIATIONS = [
+    ('likes', [('user_id', 'users'), ('video_id', 'videos')], [('ix_likes_video_user', ['video_id', 'user_id'])]),
+    ('watch_later', [('user_id', 'users'), ('video_id', 'videos')], [('ix_watch_later_video_user', ['video_id', 'user_id'])]),
+    ('subscriptions', [('subscriber_id', 'users'), ('subscribed_to_id', 'users')], [('ix_subscriptions_subscribed_to', ['subscribed_to_id', 'subscriber_id'])]),
+]
+
+
+def _table(name, columns, indexes, ondelete):
+    return sa.Table(
+        name,
+        sa.MetaData(),
+        *(
+            sa.Column(column, sa.Integer(), sa.ForeignKey(f'{target}.id', ondelete=ondelete), primary_key=True)
+            for column, target in columns
+        ),
+        *(sa.Index(index, *index_columns) for index, index_columns in indexes),
+    )
+
+
+def _set_ondelete(ondelete):
+    if op.get_bind().dialect.name == 'sqlite':
+        for name, columns, indexes in ASSOCIATIONS:
+            with op.batch_alter_table(name, recreate='always', copy_from=_table(name, columns, indexes, ondelete)):
+                pass
+        return
+    for name, columns, _ in ASSOCIATIONS:
+        for column, target in columns:
+            constraint = f'{name}_{column}_fkey'
+            op.drop_constraint(constraint, name, type_='foreignkey')
+            op.create_foreign_key(constraint, name, target, [column], ['id'], ondelete=ondelete)
+
+
+def upgrade():
+    _set_ondelete('CASCADE')
+
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('deleted_at', sa.DateTime(), nullable=True))
+        batch_op.create_index('ix_users_deleted_at', ['deleted_at'], unique=False, sqlite_where=sa.text('deleted_at IS NOT NULL'), postgresql_where=sa.text('deleted_at IS NOT NULL'))
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_index('ix_users_deleted_at', sqlite_where=sa.text('deleted_at IS NOT NULL'), postgresql_where=sa.text('deleted_at IS NOT NULL'))
+        batch_op.drop_column('deleted_at')
+
+    _set_ondelete(None)
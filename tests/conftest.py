@@ -0,0 +1,76 @@
+# tests/conftest.py
+# Run from the repo root: python -m pytest
+import asyncio
+import contextlib
+import itertools
+import os
+import tempfile
+
+import httpx
+import pytest
+
+# SQLAlchemy makes a relative SQLite path absolute when the engine is built,
+# i.e. when app.database is first imported (collecting a test module can do
+# that): point the app at a throwaway database before anything imports it
+_DB_PATH = os.path.join(tempfile.mkdtemp(prefix="streambase-tests-"), "youtube.db")
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{_DB_PATH}"
+
+_emails = itertools.count(1)
+
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    # Each test starts from an empty database; uploaded media and the like
+    # land in tmp_path
+    from app.database import dispose_engines
+
+    monkeypatch.chdir(tmp_path)
+    for suffix in ("", "-wal", "-shm"):
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(_DB_PATH + suffix)
+    yield tmp_path
+    asyncio.run(dispose_engines())
+
+
+@pytest.fixture
+def app_client():
+    """Factory for an async context: migrates the test's database, runs the
+    app's lifespan and yields an httpx client talking to it over ASGI."""
+    @contextlib.asynccontextmanager
+    async def client():
+        from app.database import dispose_engines, migrate
+        from app.main import app
+        from app.utils.response_cache import response_cache
+
+        await migrate()
+        response_cache.clear()
+        try:
+            async with app.router.lifespan_context(app):
+                transport = httpx.ASGITransport(app=app)
+                async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+                    yield http
+        finally:
+            await dispose_engines()
+
+    return client
+
+
+async def _make_user(role: str = "creator") -> tuple:
+    from app.core.security import create_user_token
+    from app.database import AsyncSessionLocal
+    from app.models import User
+
+    n = next(_emails)
+    async with AsyncSessionLocal() as db:
+        user = User(username=f"user{n}", email=f"user{n}@example.com", password_hash="x", role=role)
+        db.add(user)
+        await db.commit()
+    return user, {"Authorization": f"Bearer {create_user_token(user)}"}
+
+
+@pytest.fixture
+def make_user():
+    """Coroutine function: (user, auth headers) for a new account. Emails are
+    unique across the run, so a token never matches one cached by an earlier
+    test."""
+    return _make_user
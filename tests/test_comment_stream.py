@@ -0,0 +1,87 @@
+# tests/test_comment_stream.py
+import orjson
+
+from app.services.comment_stream import CREATED, DELETED, RESYNC, UPDATED, CommentHub
+
+
+def _decode(messages):
+    return [orjson.loads(data) for data in messages]
+
+
+def _drain(subscription):
+    messages = []
+    while not subscription.queue.empty():
+        messages.append(subscription.queue.get_nowait())
+    return _decode(messages)
+
+
+def test_reconnect_replays_edits_and_deletes():
+    hub = CommentHub(max_queue=10, replay_size=10, replay_videos=10)
+    watcher, missed = hub.subscribe(1)
+    assert missed == []
+    hub.publish(1, CREATED, {"comment": {"id": 1, "content": "first"}})
+    [seen] = _drain(watcher)
+    hub.unsubscribe(watcher)
+
+    # While the client is away
+    hub.publish(1, UPDATED, {"comment": {"id": 1, "content": "edited"}})
+    hub.publish(2, CREATED, {"comment": {"id": 2, "content": "other video"}})
+    hub.publish(1, DELETED, {"id": 1, "deleted": 0})
+
+    watcher, missed = hub.subscribe(1, after=seen["seq"])
+    assert [(m["type"], m["seq"] > seen["seq"]) for m in _decode(missed)] == [(UPDATED, True), (DELETED, True)]
+    assert _decode(missed)[0]["comment"]["content"] == "edited"
+    # Then live messages, none of them sent twice
+    hub.publish(1, CREATED, {"comment": {"id": 3, "content": "next"}})
+    [live] = _drain(watcher)
+    assert live["seq"] > _decode(missed)[-1]["seq"]
+    assert hub.subscribe(1, after=live["seq"])[1] == []
+
+
+def test_a_gap_longer_than_the_buffer_resyncs():
+    hub = CommentHub(max_queue=10, replay_size=2, replay_videos=10)
+    hub.publish(1, CREATED, {"comment": {"id": 1}})
+    first = hub._seq
+    for comment_id in (2, 3, 4):
+        hub.publish(1, CREATED, {"comment": {"id": comment_id}})
+
+    _, missed = hub.subscribe(1, after=first)
+    [message] = _decode(missed)
+    assert message == {"type": RESYNC, "seq": hub._seq}
+    # The last two are still held
+    _, missed = hub.subscribe(1, after=first + 2)
+    assert [m["comment"]["id"] for m in _decode(missed)] == [4]
+    assert hub.stats()["resyncs"] == 1
+
+
+def test_numbers_from_elsewhere_resync():
+    hub = CommentHub(max_queue=10, replay_size=10, replay_videos=10)
+    hub.publish(1, CREATED, {"comment": {"id": 1}})
+    # A comment id, or a number from before a restart: below this hub's range
+    assert _decode(hub.subscribe(1, after=5)[1])[0]["type"] == RESYNC
+    # Ahead of this hub: another worker's
+    assert _decode(hub.subscribe(1, after=hub._seq + 1)[1])[0]["type"] == RESYNC
+
+
+def test_forgetting_a_video_resyncs_its_gaps_only():
+    hub = CommentHub(max_queue=10, replay_size=10, replay_videos=1)
+    start = hub._seq
+    hub.publish(1, CREATED, {"comment": {"id": 1}})
+    hub.publish(2, CREATED, {"comment": {"id": 2}})  # evicts video 1's messages
+
+    assert _decode(hub.subscribe(1, after=start)[1])[0]["type"] == RESYNC
+    assert hub.subscribe(1, after=hub._seq)[1] == []
+    assert [m["comment"]["id"] for m in _decode(hub.subscribe(2, after=start + 1)[1])] == [2]
+
+
+def test_a_slow_subscriber_is_dropped():
+    hub = CommentHub(max_queue=3, replay_size=10, replay_videos=10)
+    fast, _ = hub.subscribe(1)
+    slow, _ = hub.subscribe(1)
+    for comment_id in range(4):
+        hub.publish(1, CREATED, {"comment": {"id": comment_id}})
+        fast.queue.get_nowait()
+
+    assert slow.dropped and not fast.dropped
+    assert slow.queue.get_nowait() is None
+    assert hub.stats()["subscribers"] == 1
@@ -0,0 +1,114 @@
+# tests/test_media.py
+# MediaFileResponse overrides FileResponse._handle_simple and
+# _handle_single_range, private Starlette methods: these pin the behaviour
+# that has to survive a Starlette upgrade.
+import asyncio
+import hashlib
+
+from sqlalchemy import update
+
+from app.routes.media import MediaFileResponse
+
+DATA = bytes(range(256)) * 40  # 10240 bytes
+ETAG = f'"{hashlib.sha256(DATA).hexdigest()}"'
+
+
+async def _upload(client, auth) -> str:
+    response = await client.post("/uploads/", headers=auth, json={
+        "filename": "clip.mp4", "size": len(DATA), "content_type": "video/mp4",
+    })
+    assert response.status_code == 201, response.text
+    upload_id = response.json()["id"]
+    response = await client.patch(f"/uploads/{upload_id}", headers={**auth, "Upload-Offset": "0"}, content=DATA)
+    assert response.status_code == 200, response.text
+    return upload_id
+
+
+def test_full_partial_and_unsatisfiable_requests(app_client, make_user):
+    async def scenario():
+        async with app_client() as client:
+            _, auth = await make_user()
+            url = f"/media/{await _upload(client, auth)}"
+            return (
+                await client.get(url),
+                await client.get(url, headers={"Range": "bytes=100-199"}),
+                await client.get(url, headers={"Range": f"bytes={len(DATA)}-"}),
+                await client.get(url, headers={"Range": "bytes=100-199", "If-Range": ETAG}),
+                await client.get(url, headers={"Range": "bytes=100-199", "If-Range": '"stale"'}),
+                await client.head(url),
+            )
+
+    full, partial, unsatisfiable, fresh, stale, head = asyncio.run(scenario())
+
+    assert full.status_code == 200
+    assert full.content == DATA
+    assert full.headers["content-type"] == "video/mp4"
+    assert full.headers["etag"] == ETAG
+    assert full.headers["accept-ranges"] == "bytes"
+    assert full.headers["x-content-type-options"] == "nosniff"
+    assert "content-disposition" not in full.headers
+
+    assert partial.status_code == 206
+    assert partial.content == DATA[100:200]
+    assert partial.headers["content-range"] == f"bytes 100-199/{len(DATA)}"
+    assert partial.headers["content-length"] == "100"
+
+    assert unsatisfiable.status_code == 416
+    assert unsatisfiable.headers["content-range"].endswith(f"*/{len(DATA)}")
+
+    assert fresh.status_code == 206
+    assert fresh.content == DATA[100:200]
+    # A stale If-Range gets the whole, current file
+    assert stale.status_code == 200
+    assert stale.content == DATA
+
+    assert head.status_code == 200
+    assert head.content == b""
+    assert head.headers["content-length"] == str(len(DATA))
+
+
+def test_types_outside_the_allowlist_are_attachments(app_client, make_user):
+    from app.database import AsyncSessionLocal
+    from app.models.upload import Upload
+
+    async def scenario():
+        async with app_client() as client:
+            _, auth = await make_user()
+            upload_id = await _upload(client, auth)
+            # As stored by an upload made before content types were checked
+            async with AsyncSessionLocal() as db:
+                await db.execute(update(Upload).where(Upload.id == upload_id).values(content_type="text/html"))
+                await db.commit()
+            return await client.get(f"/media/{upload_id}")
+
+    response = asyncio.run(scenario())
+    assert response.status_code == 200
+    assert response.headers["content-disposition"] == "attachment"
+    assert response.headers["x-content-type-options"] == "nosniff"
+
+
+def test_zerocopy_sends_the_file_descriptor(tmp_path):
+    path = tmp_path / "clip"
+    path.write_bytes(DATA)
+
+    async def call(headers):
+        messages = []
+
+        async def send(message):
+            if "file" in message:
+                # The descriptor is closed once send returns
+                message = {**message, "file": "fd"}
+            messages.append(message)
+
+        scope = {"type": "http", "method": "GET", "headers": headers, "extensions": {"http.response.zerocopysend": {}}}
+        await MediaFileResponse(str(path))(scope, None, send)
+        return messages
+
+    start, body = asyncio.run(call([]))
+    assert start["status"] == 200
+    assert body == {"type": "http.response.zerocopysend", "file": "fd", "offset": 0, "count": len(DATA), "more_body": False}
+
+    start, body = asyncio.run(call([(b"range", b"bytes=100-199")]))
+    assert start["status"] == 206
+    assert (b"content-range", f"bytes 100-199/{len(DATA)}".encode()) in start["headers"]
+    assert body == {"type": "http.response.zerocopysend", "file": "fd", "offset": 100, "count": 100, "more_body": False}
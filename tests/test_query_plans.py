@@ -0,0 +1,26 @@
+# tests/test_query_plans.py
+# The query plan check as a test, so a statement that starts full-scanning a
+# table fails the suite. Run from the repo root: python -m pytest
+import argparse
+import asyncio
+
+from benchmarks import query_plans
+
+
+def test_full_scans_flags_unindexed_table_scans():
+    plan = [
+        "SCAN videos",
+        "SCAN videos USING INDEX ix_videos_upload_time",
+        "SCAN comments USING COVERING INDEX ix_comments_path",
+        "SEARCH likes USING COVERING INDEX ix_likes_video_user (video_id=?)",
+        "SCAN anon_1",
+        "USE TEMP B-TREE FOR ORDER BY",
+    ]
+    assert query_plans.full_scans(plan, {"videos", "comments", "likes"}) == ["SCAN videos"]
+
+
+def test_no_route_or_job_full_scans_a_table(capsys):
+    failed = asyncio.run(query_plans.run(argparse.Namespace(scale="tiny", verbose=False)))
+    report = capsys.readouterr().out
+    assert failed == 0, report
+    assert " 0 with a full table scan" in report
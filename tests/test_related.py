@@ -0,0 +1,56 @@
+# tests/test_related.py
+from collections import defaultdict
+
+from app.services.related import RelatedUpdater, apply_event
+
+
+def _fold(window, events, size=3):
+    pair_deltas, norm_deltas = defaultdict(float), defaultdict(float)
+    for video_id, weight, seq in events:
+        apply_event(window, video_id, weight, seq, size, pair_deltas, norm_deltas)
+    return {k: v for k, v in pair_deltas.items() if v}, {k: v for k, v in norm_deltas.items() if v}
+
+
+def test_add_pairs_the_new_video_with_the_window():
+    window = {}
+    pair_deltas, norm_deltas = _fold(window, [(1, 1.0, 1), (2, 2.0, 2)])
+    assert window == {1: [1.0, 1], 2: [2.0, 2]}
+    assert pair_deltas == {(2, 1): 2.0, (1, 2): 2.0}
+    assert norm_deltas == {1: 1.0, 2: 4.0}
+
+
+def test_remove_takes_back_what_the_add_put_in():
+    window = {}
+    _fold(window, [(1, 1.0, 1), (2, 2.0, 2)])
+    pair_deltas, norm_deltas = _fold(window, [(2, -2.0, 3)])
+    assert window == {1: [1.0, 1]}
+    assert pair_deltas == {(2, 1): -2.0, (1, 2): -2.0}
+    assert norm_deltas == {2: -4.0}
+    # Removing what the window doesn't hold changes nothing
+    assert _fold(window, [(9, -1.0, 4)]) == ({}, {})
+    assert window == {1: [1.0, 1]}
+
+
+def test_a_full_window_evicts_its_oldest_engagement():
+    window = {}
+    _fold(window, [(1, 1.0, 1), (2, 1.0, 2), (3, 1.0, 3)])
+    pair_deltas, norm_deltas = _fold(window, [(4, 1.0, 4)])
+    assert window == {2: [1.0, 2], 3: [1.0, 3], 4: [1.0, 4]}
+    # 4 is paired with 1..3, then 1 leaves and its pairs go with it
+    assert pair_deltas == {
+        (4, 2): 1.0, (2, 4): 1.0, (4, 3): 1.0, (3, 4): 1.0,
+        (1, 2): -1.0, (2, 1): -1.0, (1, 3): -1.0, (3, 1): -1.0,
+    }
+    assert norm_deltas == {4: 1.0, 1: -1.0}
+
+
+def test_built_windows_evict_their_oldest_video_first():
+    # build() passes each user's vector newest first
+    window_rows, pair_sums, norm_sums = [], defaultdict(float), defaultdict(float)
+    RelatedUpdater._accumulate(7, [(30, 1.0), (20, 1.0), (10, 1.0)], window_rows, pair_sums, norm_sums)
+    window = {row["video_id"]: [row["weight"], row["seq"]] for row in window_rows}
+
+    _fold(window, [(40, 1.0, 1)])
+    assert set(window) == {20, 30, 40}
+    _fold(window, [(50, 1.0, 2)])
+    assert set(window) == {30, 40, 50}
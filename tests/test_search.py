@@ -0,0 +1,33 @@
+# tests/test_search.py
+import asyncio
+
+from app.services import search
+
+
+def test_highlight_escapes_text_and_marks_matches():
+    snippet = "\x02<script>\x03alert(1)</script> & <img src=x onerror=alert(2)>"
+    assert search.highlight(snippet) == (
+        "<mark>&lt;script&gt;</mark>alert(1)&lt;/script&gt; &amp; &lt;img src=x onerror=alert(2)&gt;"
+    )
+
+
+def test_search_snippets_are_escaped(app_client, make_user):
+    async def scenario():
+        async with app_client() as client:
+            _, auth = await make_user()
+            response = await client.post("/videos/", headers=auth, json={
+                "title": "Cats <script>alert(1)</script>",
+                "description": "<img src=x onerror=alert(2)> cats everywhere",
+                "video_url": "https://cdn.example.com/cats.mp4",
+            })
+            assert response.status_code == 201, response.text
+
+            response = await client.get("/videos/search", params={"q": "cats"})
+            assert response.status_code == 200, response.text
+            return response.json()["items"]
+
+    [hit] = asyncio.run(scenario())
+    assert hit["title"] == "Cats <script>alert(1)</script>"
+    assert hit["title_snippet"] == "<mark>Cats</mark> &lt;script&gt;alert(1)&lt;/script&gt;"
+    assert "<img" not in hit["description_snippet"]
+    assert hit["description_snippet"].startswith("&lt;img src=x onerror=alert(2)&gt; <mark>cats</mark>")
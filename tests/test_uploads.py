@@ -0,0 +1,103 @@
+# tests/test_uploads.py
+import asyncio
+import hashlib
+
+import pydantic
+import pytest
+from fastapi import HTTPException
+from starlette.requests import ClientDisconnect
+
+from app.core.config import settings
+from app.models.upload import Upload
+from app.schemas.upload_schema import UploadCreate
+from app.services import uploads
+
+
+@pytest.mark.parametrize("content_type", ["video/mp4", "Video/WebM", "audio/ogg", "image/png"])
+def test_media_content_types_are_accepted(content_type):
+    upload = UploadCreate(filename="a", size=1, content_type=content_type)
+    assert upload.content_type == content_type.lower()
+
+
+@pytest.mark.parametrize("content_type", [
+    "image/svg+xml", "text/html", "application/octet-stream", "video/mp4; codecs=avc1", "video/", "v" * 128,
+])
+def test_other_content_types_are_refused(content_type):
+    with pytest.raises(pydantic.ValidationError):
+        UploadCreate(filename="a", size=1, content_type=content_type)
+
+
+# ----- write_chunk -----
+
+async def _body(*pieces, disconnect=False):
+    for piece in pieces:
+        yield piece
+    if disconnect:
+        raise ClientDisconnect()
+
+
+def _write(make_user, scenario, size=10):
+    """Run scenario(db, upload_id) against a fresh upload of `size` bytes."""
+    from app.database import AsyncSessionLocal, migrate
+
+    async def run():
+        await migrate()
+        user, _ = await make_user()
+        async with AsyncSessionLocal() as db:
+            upload = await uploads.create(db, user.id, UploadCreate(filename="a", size=size, content_type="video/mp4"))
+            return await scenario(db, upload.id)
+
+    return asyncio.run(run())
+
+
+def test_chunk_at_the_wrong_offset_is_refused(make_user):
+    async def scenario(db, upload_id):
+        await uploads.write_chunk(db, upload_id, 0, _body(b"abc"))
+        with pytest.raises(HTTPException) as refused:
+            await uploads.write_chunk(db, upload_id, 5, _body(b"fgh"))
+        return refused.value, await db.get(Upload, upload_id, populate_existing=True)
+
+    refused, upload = _write(make_user, scenario)
+    assert refused.status_code == 409
+    assert refused.headers == {"Upload-Offset": "3"}
+    assert upload.offset == 3
+
+
+def test_oversized_chunk_stores_the_prefix_that_fits(make_user, monkeypatch):
+    monkeypatch.setattr(settings, "UPLOAD_MAX_CHUNK_BYTES", 4)
+
+    async def scenario(db, upload_id):
+        with pytest.raises(HTTPException) as declared:
+            await uploads.write_chunk(db, upload_id, 0, _body(b"abcdef"), declared_length=6)
+        with pytest.raises(HTTPException) as streamed:
+            await uploads.write_chunk(db, upload_id, 0, _body(b"ab", b"cdef"))
+        upload = await db.get(Upload, upload_id, populate_existing=True)
+        with open(uploads.part_path(upload_id), "rb") as part:
+            return declared.value, streamed.value, upload, part.read()
+
+    declared, streamed, upload, stored = _write(make_user, scenario)
+    # A Content-Length over the limit is refused before anything is read
+    assert declared.status_code == 413
+    assert declared.headers == {"Upload-Offset": "0"}
+    assert streamed.status_code == 413
+    assert streamed.detail == "Chunk too large: stored the first 4 bytes"
+    assert streamed.headers == {"Upload-Offset": "4"}
+    assert upload.offset == 4
+    assert stored == b"abcd"
+
+
+def test_upload_resumes_after_a_disconnect(make_user):
+    async def scenario(db, upload_id):
+        dropped = await uploads.write_chunk(db, upload_id, 0, _body(b"abc", b"de", disconnect=True))
+        offset = dropped.offset
+        # As after a restart: the running hash is rebuilt from the stored prefix
+        uploads.hashers.drop(upload_id)
+        done = await uploads.write_chunk(db, upload_id, offset, _body(b"fghij"))
+        with open(uploads.media_path(upload_id), "rb") as media:
+            return offset, done, media.read()
+
+    offset, done, stored = _write(make_user, scenario)
+    assert offset == 5
+    assert done.completed_at is not None
+    assert stored == b"abcdefghij"
+    assert done.sha256 == hashlib.sha256(b"abcdefghij").hexdigest()